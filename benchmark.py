@@ -0,0 +1,476 @@
+"""
+Tinlera Research Tool - Başlangıç performans ölçümü (headless)
+
+Kullanım:
+    python benchmark.py
+    python benchmark.py --history-sizes 0,1000,20000 --backends json,sqlite --repeat 5 --output bench.json
+
+Ölçülenler (tümü milisaniye):
+    imports      : her modülün ayrı bir süreçte soğuk import süresi
+    history      : sentetik geçmiş boyutlarına göre HistoryManager yükleme süresi
+    main_window  : MainWindow oluşturma, ilk çizim ve geçmişin hazır olma süresi
+    markdown     : büyük yanıtlarda eski regex zinciri ile MarkdownRenderer'ın karşılaştırması
+    page_fetch   : yerel bir HTTP sunucusuna karşı PageFetcher (ilk getirme, taze önbellek,
+                   304 ile yeniden doğrulama, yönlendirme) ve yerel adres engeli
+
+Qt "offscreen" platformunda çalışır; ekran gerektirmez. Ölçümler geçici bir
+çalışma dizininde yapılır, kullanıcının config/ ve data/ dizinlerine dokunulmaz.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Qt importundan önce ayarlanmalı
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+ROOT = Path(__file__).resolve().parent
+
+# Soğuk import süresi ölçülecek modüller (üçüncü parti + uygulama)
+IMPORT_MODULES = [
+    "PyQt6.QtWidgets",
+    "requests",
+    "huggingface_hub",
+    "ddgs",
+    "docx",
+    "PyPDF2",
+    "pdfplumber",
+    "PIL.Image",
+    "pygments",
+    "numpy",
+    "cryptography.fernet",
+    "src.core.hf_api",
+    "src.core.file_processor",
+    "src.core.web_search",
+    "src.core.history_manager",
+    "src.core.export_manager",
+    "src.ui.chat_widget",
+    "src.ui.main_window",
+]
+
+# İlk çizim için en fazla bekleme (sn)
+PAINT_TIMEOUT = 10
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+def _summary(samples):
+    """Tekrarların özeti (ms)"""
+    return {
+        "min": _ms(min(samples)),
+        "median": _ms(statistics.median(samples)),
+        "max": _ms(max(samples)),
+        "samples": [_ms(s) for s in samples],
+    }
+
+
+def measure_imports(modules, repeat: int):
+    """Her modülü temiz bir süreçte import edip süresini ölç"""
+    code = (
+        "import sys, time, importlib\n"
+        "started = time.perf_counter()\n"
+        "importlib.import_module(sys.argv[1])\n"
+        "print(time.perf_counter() - started)\n"
+    )
+    results = {}
+    for module in modules:
+        samples = []
+        error = None
+        for _ in range(repeat):
+            completed = subprocess.run(
+                [sys.executable, "-c", code, module],
+                cwd=ROOT, capture_output=True, text=True
+            )
+            if completed.returncode != 0:
+                error = (completed.stderr.strip().splitlines() or ["bilinmeyen hata"])[-1]
+                break
+            samples.append(float(completed.stdout.strip().splitlines()[-1]))
+        results[module] = {"error": error} if error else _summary(samples)
+    return results
+
+
+def synthetic_entries(count: int):
+    """Gerçekçi boyutlarda sentetik geçmiş kayıtları üret"""
+    base = datetime(2024, 1, 1)
+    response = "Bu bir örnek yanıttır. " * 40
+    for i in range(count):
+        yield {
+            "id": f"{base.strftime('%Y%m%d%H%M%S')}_{i}",
+            "timestamp": base.replace(minute=i % 60, second=(i // 60) % 60).isoformat(),
+            "model": f"model-{i % 5}",
+            "prompt": f"Örnek soru {i}: performans ölçümü için sentetik kayıt",
+            "response": response,
+            "files": [],
+            "web_search_results": [
+                {"title": f"Sonuç {j}", "url": f"https://example.com/{i}/{j}", "snippet": "Örnek snippet"}
+                for j in range(3)
+            ],
+        }
+
+
+def build_history(history_dir: Path, size: int, backend: str):
+    """Verilen boyutta sentetik geçmiş dosyası oluştur"""
+    from src.core.history_journal import HistoryJournal
+    from src.core.history_sqlite import SQLiteHistoryStore
+    
+    history_dir.mkdir(parents=True, exist_ok=True)
+    entries = list(synthetic_entries(size))
+    if backend == "sqlite":
+        store = SQLiteHistoryStore(history_dir / "history.db")
+        store.add_many(entries)
+        store.close()
+    else:
+        HistoryJournal(history_dir / "history.json", history_dir / "history.jsonl")._write_snapshot(entries)
+
+
+def measure_history(sizes, backends, repeat: int, workdir: Path):
+    """HistoryManager yükleme süresi (boyut x backend)"""
+    from src.core.history_manager import HistoryManager
+    
+    results = []
+    for backend in backends:
+        for size in sizes:
+            history_dir = workdir / f"history_{backend}_{size}"
+            started = time.perf_counter()
+            build_history(history_dir, size, backend)
+            build_time = time.perf_counter() - started
+            
+            samples = []
+            count = None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                manager = HistoryManager(history_dir=str(history_dir), backend=backend)
+                samples.append(time.perf_counter() - started)
+                count = manager.count()
+                if manager._db:
+                    manager._db.close()
+            results.append({
+                "backend": backend,
+                "size": size,
+                "loaded_entries": count,
+                "build_ms": _ms(build_time),
+                "load": _summary(samples),
+            })
+    return results
+
+
+def measure_main_window(history_size: int, backend: str, workdir: Path):
+    """MainWindow oluşturma, ilk çizim ve geçmişin hazır olma süresi"""
+    app_dir = workdir / "app"
+    build_history(app_dir / "data" / "history", history_size, backend)
+    (app_dir / "config").mkdir(parents=True, exist_ok=True)
+    (app_dir / "config" / "settings.json").write_text(
+        json.dumps({"history_backend": backend}), encoding="utf-8"
+    )
+    
+    previous_cwd = os.getcwd()
+    os.chdir(app_dir)
+    try:
+        started = time.perf_counter()
+        from PyQt6.QtCore import QObject, QEvent, QElapsedTimer
+        from PyQt6.QtWidgets import QApplication
+        from src.ui.main_window import MainWindow
+        imported = time.perf_counter()
+        
+        app = QApplication.instance() or QApplication([sys.argv[0]])
+        app_ready = time.perf_counter()
+        
+        window = MainWindow()
+        constructed = time.perf_counter()
+        
+        class PaintWatcher(QObject):
+            painted_at = None
+            
+            def eventFilter(self, obj, event):
+                if event.type() == QEvent.Type.Paint and self.painted_at is None:
+                    self.painted_at = time.perf_counter()
+                return False
+        
+        watcher = PaintWatcher()
+        window.installEventFilter(watcher)
+        window.show()
+        shown = time.perf_counter()
+        
+        timer = QElapsedTimer()
+        timer.start()
+        while watcher.painted_at is None and timer.elapsed() < PAINT_TIMEOUT * 1000:
+            app.processEvents()
+        first_paint = watcher.painted_at
+        
+        # Arka planda yüklenen geçmişin kullanılabilir hale gelmesi
+        _ = window.history_manager
+        history_ready = time.perf_counter()
+        
+        # first_paint_ms ve history_ready_ms import başından itibaren toplam süredir
+        result = {
+            "history_size": history_size,
+            "backend": backend,
+            "import_ms": _ms(imported - started),
+            "qapplication_ms": _ms(app_ready - imported),
+            "construct_ms": _ms(constructed - app_ready),
+            "show_ms": _ms(shown - constructed),
+            "first_paint_ms": _ms(first_paint - started) if first_paint else None,
+            "history_ready_ms": _ms(history_ready - started),
+        }
+        
+        window.close()
+        window.deleteLater()
+        app.processEvents()
+        return result
+    finally:
+        os.chdir(previous_cwd)
+
+
+def legacy_format_text(text: str) -> str:
+    """ChatWidget'ın eski biçimlendiricisi (karşılaştırma için aynen korunur)"""
+    code_pattern = r'```(\w+)?\n(.*?)```'
+    
+    def replace_code(match):
+        lang = match.group(1) or ""
+        code = match.group(2)
+        
+        try:
+            from pygments import highlight
+            from pygments.lexers import get_lexer_by_name, guess_lexer_for_filename
+            from pygments.formatters import HtmlFormatter
+            if lang:
+                lexer = get_lexer_by_name(lang, stripall=True)
+            else:
+                lexer = guess_lexer_for_filename("temp.py", code)
+            formatter = HtmlFormatter(style='default', nowrap=True)
+            highlighted = highlight(code, lexer, formatter)
+            return f'<div style="background-color: #f4f4f4; padding: 10px; border-radius: 5px; margin: 5px 0;"><pre style="margin: 0;">{highlighted}</pre></div>'
+        except:
+            return f'<div style="background-color: #f4f4f4; padding: 10px; border-radius: 5px; margin: 5px 0;"><pre style="margin: 0;">{code}</pre></div>'
+    
+    text = re.sub(code_pattern, replace_code, text, flags=re.DOTALL)
+    text = text.replace('\n', '<br>')
+    text = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', text)
+    text = re.sub(r'\*(.*?)\*', r'<i>\1</i>', text)
+    text = re.sub(r'`(.*?)`', r'<code style="background-color: #f0f0f0; padding: 2px 4px; border-radius: 3px;">\1</code>', text)
+    return text
+
+
+def synthetic_response(size: int) -> str:
+    """Yaklaşık size karakterlik, kod blokları içeren gerçekçi bir model yanıtı"""
+    sections = []
+    total = 0
+    while total < size:
+        # Her bölümün kodu farklı: renklendirme önbelleği ilk render'da yardım etmez
+        n = len(sections)
+        section = (
+            f"## Bölüm {n}\n"
+            "Bu yanıt **önemli** bir noktayı *vurgular* ve `inline_kod()` içerir. "
+            "Ayrıca **kalın içinde *italik*** ve bir [bağlantı](https://example.com/docs) vardır.\n\n"
+            "- Birinci madde **kalın**\n- İkinci madde `kod`\n- Üçüncü madde\n\n"
+            "```python\n"
+            + "".join(f"def fonksiyon_{n}_{i}(x, y):\n    return x * {i} + y  # açıklama\n" for i in range(8))
+            + "```\n\n"
+        )
+        sections.append(section)
+        total += len(section)
+    return "".join(sections)
+
+
+def unbalanced_response(size: int) -> str:
+    """Kapanmayan "*" / "**" / "`" dizileriyle dolu, yaklaşık size karakterlik tek satır"""
+    parts = []
+    total = 0
+    while total < size:
+        n = len(parts)
+        part = f"**Adım {n}: **şunu yap. **a *b `c "
+        parts.append(part)
+        total += len(part)
+    return "".join(parts)
+
+
+def measure_markdown(sizes, repeat: int):
+    """Eski regex zinciri ile MarkdownRenderer'ı büyük yanıtlarda karşılaştır"""
+    from src.core.markdown_renderer import MarkdownRenderer
+    
+    results = []
+    for size in sizes:
+        text = synthetic_response(size)
+        unbalanced = unbalanced_response(size)
+        legacy, cold, warm, adversarial = [], [], [], []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            legacy_format_text(text)
+            legacy.append(time.perf_counter() - started)
+            
+            renderer = MarkdownRenderer()
+            started = time.perf_counter()
+            renderer.render(text)
+            cold.append(time.perf_counter() - started)
+            
+            # Aynı mesajın yeniden render'ı (kod blokları önbellekte)
+            started = time.perf_counter()
+            renderer.render(text)
+            warm.append(time.perf_counter() - started)
+            
+            # Dengesiz vurgu: geri izleme patlaması regresyonu (boyutla doğrusal kalmalı)
+            started = time.perf_counter()
+            MarkdownRenderer().render(unbalanced)
+            adversarial.append(time.perf_counter() - started)
+        results.append({
+            "size_chars": len(text),
+            "legacy": _summary(legacy),
+            "renderer": _summary(cold),
+            "renderer_cached": _summary(warm),
+            "renderer_unbalanced": _summary(adversarial),
+        })
+    return results
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    """PageFetcher ölçümü için yerel sunucu: ETag destekli HTML sayfa ve yönlendirme"""
+    body = b""
+    etag = '"bench-1"'
+    
+    def do_GET(self):
+        if self.path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "/page")
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("ETag", self.etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.send_header("ETag", self.etag)
+        self.end_headers()
+        self.wfile.write(self.body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def measure_page_fetch(repeat: int, workdir: Path):
+    """PageFetcher'ı yerel HTTP sunucusuna karşı ölç ve davranışını doğrula"""
+    from src.core.page_fetcher import PageFetcher
+    
+    paragraphs = "".join(f"<p>Paragraf {i}: {'metin ' * 40}</p>" for i in range(500))
+    _PageHandler.body = (f"<html><head><title>Bench</title><script>x()</script></head>"
+                         f"<body>{paragraphs}</body></html>").encode("utf-8")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        cold, fresh, revalidated = [], [], []
+        checks = {}
+        for attempt in range(repeat):
+            cache_dir = workdir / f"pages_{attempt}"
+            fetcher = PageFetcher(cache_dir=str(cache_dir), allow_private_hosts=True)
+            started = time.perf_counter()
+            page = fetcher.fetch(f"{base}/page")
+            cold.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            cached = fetcher.fetch(f"{base}/page")
+            fresh.append(time.perf_counter() - started)
+            # TTL dolmuş gibi: koşullu istek, 304
+            fetcher.cache_ttl = 0
+            started = time.perf_counter()
+            fetcher.fetch(f"{base}/page")
+            revalidated.append(time.perf_counter() - started)
+            redirected = fetcher.fetch(f"{base}/redirect")
+            checks = {
+                "fetched": page["success"] and page["title"] == "Bench" and "x()" not in page["text"],
+                "fresh_cache_hit": cached["cached"],
+                "stats": dict(fetcher.stats),
+                "redirect_followed": redirected["success"],
+            }
+            fetcher.close()
+        
+        # Varsayılan ayarlarla loopback adresi reddedilmeli
+        guarded = PageFetcher(cache_dir=None)
+        blocked = guarded.fetch(f"{base}/page")
+        guarded.close()
+        checks["loopback_blocked"] = not blocked["success"] and guarded.stats["blocked"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+    return {
+        "page_bytes": len(_PageHandler.body),
+        "cold": _summary(cold),
+        "fresh_cache": _summary(fresh),
+        "revalidate_304": _summary(revalidated),
+        "checks": checks,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Tinlera Research Tool başlangıç ölçümü")
+    parser.add_argument("--history-sizes", default="0,1000,10000",
+                        help="Virgülle ayrılmış sentetik geçmiş boyutları")
+    parser.add_argument("--backends", default="json,sqlite", help="json, sqlite veya ikisi")
+    parser.add_argument("--repeat", type=int, default=3, help="Her ölçümün tekrar sayısı")
+    parser.add_argument("--window-history-size", type=int, default=1000,
+                        help="MainWindow ölçümünde kullanılacak geçmiş boyutu")
+    parser.add_argument("--skip-imports", action="store_true", help="Import ölçümünü atla")
+    parser.add_argument("--markdown-sizes", default="10000,100000,1000000",
+                        help="Markdown karşılaştırması için virgülle ayrılmış yanıt boyutları (karakter)")
+    parser.add_argument("--skip-markdown", action="store_true", help="Markdown karşılaştırmasını atla")
+    parser.add_argument("--skip-page-fetch", action="store_true", help="Sayfa getirme ölçümünü atla")
+    parser.add_argument("--output", help="JSON çıktı dosyası (verilmezse stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Ana fonksiyon"""
+    args = parse_args(argv)
+    sizes = [int(size) for size in args.history_sizes.split(",") if size.strip()]
+    backends = [backend.strip() for backend in args.backends.split(",") if backend.strip()]
+    repeat = max(args.repeat, 1)
+    
+    sys.path.insert(0, str(ROOT))
+    workdir = Path(tempfile.mkdtemp(prefix="tinlera_bench_"))
+    try:
+        report = {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "qt_platform": os.environ.get("QT_QPA_PLATFORM"),
+            "repeat": repeat,
+        }
+        if not args.skip_imports:
+            report["imports"] = measure_imports(IMPORT_MODULES, repeat)
+        report["history"] = measure_history(sizes, backends, repeat, workdir)
+        if not args.skip_markdown:
+            markdown_sizes = [int(size) for size in args.markdown_sizes.split(",") if size.strip()]
+            report["markdown"] = measure_markdown(markdown_sizes, repeat)
+        if not args.skip_page_fetch:
+            report["page_fetch"] = measure_page_fetch(repeat, workdir)
+        try:
+            report["main_window"] = measure_main_window(args.window_history_size, backends[0], workdir)
+        except ImportError as e:
+            report["main_window"] = {"error": f"{type(e).__name__}: {e}"}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
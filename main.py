@@ -2,10 +2,31 @@
 Tinlera Research Tool - Ana giriş noktası
 """
 import sys
+import time
+
+# Başlangıç süresi ölçümü ağır importlardan önce başlar
+_STARTED = time.perf_counter()
+
 from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 
 from src.ui.main_window import MainWindow
+from src.utils.constants import STARTUP_BUDGET_MS
+
+_IMPORTED = time.perf_counter()
+
+
+def _report_startup(window_ready: float):
+    """İlk çizimden sonra başlangıç süresini bütçeyle karşılaştır"""
+    now = time.perf_counter()
+    total_ms = (now - _STARTED) * 1000
+    if total_ms > STARTUP_BUDGET_MS:
+        print(
+            f"Uyarı: başlangıç {total_ms:.0f} ms sürdü (bütçe {STARTUP_BUDGET_MS} ms) - "
+            f"import {(_IMPORTED - _STARTED) * 1000:.0f} ms, "
+            f"pencere {(window_ready - _IMPORTED) * 1000:.0f} ms, "
+            f"ilk çizim {(now - window_ready) * 1000:.0f} ms"
+        )
 
 
 def main():
@@ -16,10 +37,12 @@ def main():
     # Ana pencere
     window = MainWindow()
     window.show()
+    window_ready = time.perf_counter()
+    # Olay döngüsünün ilk turunda (ilk çizimden sonra) çalışır
+    QTimer.singleShot(0, lambda: _report_startup(window_ready))
     
     sys.exit(app.exec())
 
 
 if __name__ == "__main__":
     main()
-
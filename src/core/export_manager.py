@@ -1,13 +1,37 @@
 """
-Export modülü - PDF, DOCX, TXT, Markdown export
+Export modülü - PDF, DOCX, TXT, Markdown, HTML export
 """
+import html
+import os
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
-from docx import Document
-from docx.shared import Inches, Pt
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-import markdown
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from .markdown_renderer import MarkdownRenderer
+from ..utils.constants import EXPORT_DOCX_VOLUME_ENTRIES, EXPORT_PROGRESS_EVERY
+
+HTML_HEAD = """<!DOCTYPE html>
+<html lang="tr">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: Arial, sans-serif; max-width: 900px; margin: 2em auto; line-height: 1.5; }}
+pre {{ white-space: pre-wrap; }}
+</style>
+</head>
+<body>
+"""
+HTML_FOOT = "</body>\n</html>\n"
+BATCH_SEPARATOR = "\n" + "=" * 80 + "\n"
+
+# (yazılan kayıt, toplam kayıt ya da bilinmiyorsa None)
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+
+class ExportCancelled(Exception):
+    """Export kullanıcı tarafından iptal edildi"""
 
 
 class ExportManager:
@@ -16,6 +40,14 @@ class ExportManager:
     def __init__(self, export_dir: str = "data/exports"):
         self.export_dir = Path(export_dir)
         self.export_dir.mkdir(parents=True, exist_ok=True)
+        self._markdown = None
+    
+    @property
+    def markdown(self) -> MarkdownRenderer:
+        """Yanıtları HTML'e çeviren renderer (sohbet görünümüyle aynı çıktı)"""
+        if self._markdown is None:
+            self._markdown = MarkdownRenderer()
+        return self._markdown
     
     def export_to_txt(self, entry: Dict, filename: Optional[str] = None) -> str:
         """TXT formatında export"""
@@ -47,14 +79,43 @@ class ExportManager:
         
         return str(filepath)
     
-    def export_to_docx(self, entry: Dict, filename: Optional[str] = None) -> str:
-        """DOCX formatında export"""
+    def export_to_html(self, entry: Dict, filename: Optional[str] = None) -> str:
+        """HTML formatında export (yanıtın markdown'u render edilir)"""
+        if not filename:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"research_{timestamp}.html"
+        
+        filepath = self.export_dir / filename
+        
+        content = self._format_entry(entry, format_type="html")
+        
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(HTML_HEAD.format(title="Araştırma Raporu"))
+            f.write(content)
+            f.write(HTML_FOOT)
+        
+        return str(filepath)
+    
+    def export_to_docx(self, entry: Dict, filename: Optional[str] = None,
+                       cancel_event: Optional[threading.Event] = None) -> str:
+        """DOCX formatında export
+        
+        cancel_event bölümler arasında kontrol edilir; iptalde ExportCancelled
+        fırlatılır ve dosya yazılmaz.
+        """
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"research_{timestamp}.docx"
         
         filepath = self.export_dir / filename
         
+        def check_cancelled():
+            if cancel_event is not None and cancel_event.is_set():
+                raise ExportCancelled()
+        
+        # python-docx yalnızca DOCX export'ta yüklenir (başlangıç süresi)
+        from docx import Document
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
         doc = Document()
         
         # Başlık
@@ -66,10 +127,12 @@ class ExportManager:
         date_para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
         
         # Model bilgisi
+        check_cancelled()
         doc.add_heading('Model Bilgisi', level=1)
         doc.add_paragraph(f"Model: {entry.get('model', 'Bilinmiyor')}")
         
         # Prompt
+        check_cancelled()
         doc.add_heading('Soru/Prompt', level=1)
         doc.add_paragraph(entry.get('prompt', ''))
         
@@ -78,6 +141,7 @@ class ExportManager:
         if files:
             doc.add_heading('Eklenen Dosyalar', level=1)
             for file_path in files:
+                check_cancelled()
                 doc.add_paragraph(f"• {file_path}", style='List Bullet')
         
         # Web arama sonuçları
@@ -85,22 +149,33 @@ class ExportManager:
         if web_results:
             doc.add_heading('Web Arama Sonuçları', level=1)
             for i, result in enumerate(web_results, 1):
+                check_cancelled()
                 doc.add_paragraph(f"{i}. {result.get('title', '')}", style='Heading 3')
                 doc.add_paragraph(f"URL: {result.get('url', '')}")
                 doc.add_paragraph(result.get('snippet', ''))
                 doc.add_paragraph()
         
         # Yanıt
+        check_cancelled()
         doc.add_heading('Yanıt', level=1)
         doc.add_paragraph(entry.get('response', ''))
         
         # Kaynaklar
+        check_cancelled()
         if web_results:
             doc.add_heading('Kaynaklar', level=1)
             for result in web_results:
                 doc.add_paragraph(result.get('url', ''), style='List Bullet')
         
-        doc.save(filepath)
+        # Kaydetme sırasında iptal/hata yarım dosya bırakmasın
+        check_cancelled()
+        tmp_path = self._part_path(filepath)
+        try:
+            doc.save(tmp_path)
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
         return str(filepath)
     
     def export_to_pdf(self, entry: Dict, filename: Optional[str] = None) -> str:
@@ -145,6 +220,38 @@ class ExportManager:
                 for result in web_results:
                     lines.append(f"- {result.get('url', '')}\n")
         
+        elif format_type == "html":
+            escape = html.escape
+            lines.append("<h1>Araştırma Raporu</h1>")
+            lines.append(f"<p><b>Tarih:</b> {escape(str(entry.get('timestamp', 'Bilinmiyor')))}<br>"
+                         f"<b>Model:</b> {escape(str(entry.get('model', 'Bilinmiyor')))}</p>")
+            lines.append("<h2>Soru/Prompt</h2>")
+            lines.append(self.markdown.render(entry.get('prompt', '')))
+            
+            files = entry.get('files', [])
+            if files:
+                lines.append("<h2>Eklenen Dosyalar</h2>")
+                lines.append("<ul>" + "".join(f"<li>{escape(str(path))}</li>" for path in files) + "</ul>")
+            
+            web_results = entry.get('web_search_results', [])
+            if web_results:
+                lines.append("<h2>Web Arama Sonuçları</h2>")
+                for i, result in enumerate(web_results, 1):
+                    url = escape(result.get('url', ''))
+                    lines.append(f"<h3>{i}. {escape(result.get('title', ''))}</h3>")
+                    lines.append(f'<p><b>URL:</b> <a href="{url}">{url}</a><br>'
+                                 f"{escape(result.get('snippet', ''))}</p>")
+            
+            lines.append("<h2>Yanıt</h2>")
+            lines.append(self.markdown.render(entry.get('response', '')))
+            
+            if web_results:
+                lines.append("<h2>Kaynaklar</h2>")
+                lines.append("<ul>" + "".join(
+                    f'<li><a href="{escape(result.get("url", ""))}">{escape(result.get("url", ""))}</a></li>'
+                    for result in web_results
+                ) + "</ul>")
+        
         else:  # txt
             lines.append("=" * 60)
             lines.append("ARAŞTIRMA RAPORU")
@@ -188,44 +295,139 @@ class ExportManager:
         
         return "\n".join(lines)
     
-    def export_multiple(self, entries: List[Dict], format_type: str = "txt", filename: Optional[str] = None) -> str:
-        """Birden fazla entry'yi export et"""
+    def export_multiple(self, entries: Iterable[Dict], format_type: str = "txt", filename: Optional[str] = None,
+                        progress: Optional[ProgressCallback] = None,
+                        cancel_event: Optional[threading.Event] = None) -> str:
+        """Birden fazla entry'yi export et (ilk dosyanın yolu; DOCX ciltleri için export_volumes)"""
+        return self.export_volumes(entries, format_type, filename, progress, cancel_event)[0]
+    
+    def export_volumes(self, entries: Iterable[Dict], format_type: str = "txt", filename: Optional[str] = None,
+                       progress: Optional[ProgressCallback] = None,
+                       cancel_event: Optional[threading.Event] = None,
+                       volume_entries: int = EXPORT_DOCX_VOLUME_ENTRIES,
+                       total: Optional[int] = None) -> List[str]:
+        """Kayıtları akış halinde export et, yazılan dosyaların yollarını döndür
+        
+        entries bir üreteç olabilir (ör. HistoryManager.iter_entries); kayıtlar
+        biçimlendirildikçe dosyaya yazılır, bellekte biriktirilmez. DOCX
+        çıktısı volume_entries kayıtta bir yeni dosyaya (name_2.docx, ...)
+        bölünür. cancel_event set edilirse yarım dosyalar silinir ve
+        ExportCancelled fırlatılır. total verilmezse len(entries) kullanılır
+        (üreteçlerde ilerleme toplamı ancak verilirse bilinir).
+        """
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"research_batch_{timestamp}.{format_type if format_type != 'docx' else 'docx'}"
         
+        if total is None and hasattr(entries, "__len__"):
+            total = len(entries)
+        tracked = self._track(entries, total, progress, cancel_event)
+        
         if format_type == "docx":
-            return self._export_multiple_docx(entries, filename)
+            return self._export_multiple_docx(tracked, filename, volume_entries)
+        
+        filepath = self.export_dir / filename
+        tmp_path = self._part_path(filepath)
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for part in self._iter_batch_parts(tracked, format_type):
+                    f.write(part)
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return [str(filepath)]
+    
+    def _iter_batch_parts(self, entries: Iterable[Dict], format_type: str) -> Iterator[str]:
+        """Toplu export'un metin parçaları (her seferinde tek kayıt biçimlendirilir)"""
+        if format_type == "html":
+            yield HTML_HEAD.format(title="Toplu Araştırma Raporu")
+            for i, entry in enumerate(entries):
+                yield ("\n<hr>\n" if i else "") + self._format_entry(entry, "html")
+            yield HTML_FOOT
         else:
-            content_parts = []
-            for entry in entries:
-                content_parts.append(self._format_entry(entry, format_type))
-                content_parts.append("\n" + "=" * 80 + "\n")
-            
-            filepath = self.export_dir / filename
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write("\n".join(content_parts))
-            
-            return str(filepath)
+            for i, entry in enumerate(entries):
+                yield ("\n" if i else "") + self._format_entry(entry, format_type) + "\n" + BATCH_SEPARATOR
+    
+    @staticmethod
+    def _track(entries: Iterable[Dict], total: Optional[int], progress: Optional[ProgressCallback],
+               cancel_event: Optional[threading.Event]) -> Iterator[Dict]:
+        """Kayıtları geçirirken iptali denetle ve ilerlemeyi bildir"""
+        done = 0
+        for entry in entries:
+            if cancel_event is not None and cancel_event.is_set():
+                raise ExportCancelled()
+            yield entry
+            done += 1
+            if progress and (done % EXPORT_PROGRESS_EVERY == 0 or done == total):
+                progress(done, total)
+        if progress and done != total:
+            progress(done, done)
+        if cancel_event is not None and cancel_event.is_set():
+            raise ExportCancelled()
+    
+    @staticmethod
+    def _part_path(path: Path) -> Path:
+        """Yazım sürerken kullanılan geçici dosya (bitince asıl ada taşınır)"""
+        return path.with_name(path.name + ".part")
     
-    def _export_multiple_docx(self, entries: List[Dict], filename: str) -> str:
-        """Birden fazla entry'yi DOCX olarak export et"""
+    @staticmethod
+    def _volume_path(filepath: Path, volume: int) -> Path:
+        """n. cildin yolu (ilk cilt verilen ad)"""
+        if volume == 1:
+            return filepath
+        return filepath.with_name(f"{filepath.stem}_{volume}{filepath.suffix}")
+    
+    def _export_multiple_docx(self, entries: Iterable[Dict], filename: str,
+                              volume_entries: int = EXPORT_DOCX_VOLUME_ENTRIES) -> List[str]:
+        """Birden fazla entry'yi DOCX olarak export et (volume_entries kayıtta bir yeni dosya)"""
         filepath = self.export_dir / filename
-        doc = Document()
+        from docx import Document
+        
+        written: List[Path] = []
+        doc = None
+        volume = 0
+        in_volume = 0
         
-        doc.add_heading('Toplu Araştırma Raporu', 0)
+        def save_volume():
+            path = self._volume_path(filepath, volume)
+            tmp_path = self._part_path(path)
+            doc.save(tmp_path)
+            os.replace(tmp_path, path)
+            written.append(path)
         
-        for i, entry in enumerate(entries, 1):
-            doc.add_page_break() if i > 1 else None
-            doc.add_heading(f'Araştırma {i}', level=1)
+        try:
+            for i, entry in enumerate(entries, 1):
+                if doc is None or in_volume >= volume_entries:
+                    if doc is not None:
+                        save_volume()
+                    # Önceki cildin belge ağacı burada bırakılır; bellek cilt boyutuyla sınırlı
+                    volume += 1
+                    in_volume = 0
+                    doc = Document()
+                    title = 'Toplu Araştırma Raporu' if volume == 1 else f'Toplu Araştırma Raporu (Cilt {volume})'
+                    doc.add_heading(title, 0)
+                
+                doc.add_page_break() if in_volume > 0 else None
+                in_volume += 1
+                doc.add_heading(f'Araştırma {i}', level=1)
+                
+                doc.add_paragraph(f"Tarih: {entry.get('timestamp', 'Bilinmiyor')}")
+                doc.add_paragraph(f"Model: {entry.get('model', 'Bilinmiyor')}")
+                doc.add_heading('Soru/Prompt', level=2)
+                doc.add_paragraph(entry.get('prompt', ''))
+                doc.add_heading('Yanıt', level=2)
+                doc.add_paragraph(entry.get('response', ''))
             
-            doc.add_paragraph(f"Tarih: {entry.get('timestamp', 'Bilinmiyor')}")
-            doc.add_paragraph(f"Model: {entry.get('model', 'Bilinmiyor')}")
-            doc.add_heading('Soru/Prompt', level=2)
-            doc.add_paragraph(entry.get('prompt', ''))
-            doc.add_heading('Yanıt', level=2)
-            doc.add_paragraph(entry.get('response', ''))
-        
-        doc.save(filepath)
-        return str(filepath)
-
+            if doc is None:
+                volume = 1
+                doc = Document()
+                doc.add_heading('Toplu Araştırma Raporu', 0)
+            save_volume()
+        except BaseException:
+            # İptal / hata: yarım kalan export'un tüm ciltlerini sil
+            for path in written:
+                path.unlink(missing_ok=True)
+            self._part_path(self._volume_path(filepath, volume)).unlink(missing_ok=True)
+            raise
+        return [str(path) for path in written]
@@ -0,0 +1,177 @@
+"""
+Export kuyruğu - Export işlerini arka plan thread'lerinde, ilerleme ve iptal desteğiyle çalıştırır
+"""
+import copy
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .export_manager import ExportManager, ExportCancelled
+from ..utils.constants import EXPORT_WORKERS
+
+# Biçim -> dosya uzantısı
+EXPORT_EXTENSIONS = {"txt": "txt", "markdown": "md", "html": "html", "docx": "docx"}
+
+
+@dataclass
+class ExportJob:
+    """Kuyruktaki tek export işi"""
+    id: int
+    description: str
+    format_type: str
+    # queued, running, done, failed, cancelled
+    status: str = "queued"
+    done: int = 0
+    total: Optional[int] = None
+    # Yazılan dosyalar (DOCX toplu export'ta birden fazla cilt olabilir)
+    paths: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    future: Optional[Future] = field(default=None, repr=False)
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+
+class ExportQueue:
+    """
+    Export işlerini max_workers thread'de paralel çalıştırır.
+    
+    Her durum değişikliğinde ve ilerlemede on_update, işin bir kopyasıyla
+    çağrılır (worker thread'inden; Qt tarafında sinyale bağlanmalıdır).
+    Sıradaki işler hiç başlamadan, çalışan toplu export'lar kayıt
+    aralarında, tek kayıtlık DOCX export'lar bölüm aralarında iptal edilir.
+    """
+    
+    def __init__(self, export_manager: ExportManager, max_workers: int = EXPORT_WORKERS,
+                 on_update: Optional[Callable[[ExportJob], None]] = None):
+        self.export_manager = export_manager
+        self.on_update = on_update
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="export")
+        self._lock = threading.Lock()
+        self._jobs: Dict[int, ExportJob] = {}
+        self._next_id = 1
+    
+    def _new_job(self, description: str, format_type: str, total: Optional[int]) -> ExportJob:
+        with self._lock:
+            job = ExportJob(self._next_id, description, format_type, total=total)
+            self._next_id += 1
+            self._jobs[job.id] = job
+        return job
+    
+    def _notify(self, job: ExportJob):
+        if self.on_update:
+            try:
+                self.on_update(copy.copy(job))
+            except Exception as e:
+                print(f"Export bildirimi hatası: {e}")
+    
+    @staticmethod
+    def _filename(prefix: str, job: ExportJob) -> str:
+        """Paralel işler aynı saniyede başlasa da çakışmayan dosya adı"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return f"{prefix}_{timestamp}_{job.id}.{EXPORT_EXTENSIONS.get(job.format_type, job.format_type)}"
+    
+    def submit_entry(self, entry: Dict, format_type: str) -> ExportJob:
+        """Tek kaydı export et (txt, markdown, html, docx)"""
+        job = self._new_job(f"Araştırma ({format_type})", format_type, total=1)
+        exporters = {
+            "txt": self.export_manager.export_to_txt,
+            "markdown": self.export_manager.export_to_markdown,
+            "html": self.export_manager.export_to_html,
+            # DOCX bölümler arasında iptal edilebilir; diğerleri tek yazımda biter
+            "docx": lambda entry, filename: self.export_manager.export_to_docx(
+                entry, filename, cancel_event=job.cancel_event),
+        }
+        export = exporters[format_type]
+        
+        def work():
+            path = export(entry, self._filename("research", job))
+            if job.cancel_event.is_set():
+                # Yazım sürerken iptal edildi; sonucu bırakma
+                Path(path).unlink(missing_ok=True)
+                raise ExportCancelled()
+            self._progress(job, 1, 1)
+            return [path]
+        
+        return self._submit(job, work)
+    
+    def submit_batch(self, entries: Iterable[Dict], format_type: str, total: Optional[int] = None,
+                     description: str = "Toplu export") -> ExportJob:
+        """Birden çok kaydı akış halinde export et (entries bir üreteç olabilir)"""
+        if total is None and hasattr(entries, "__len__"):
+            total = len(entries)
+        job = self._new_job(f"{description} ({format_type})", format_type, total=total)
+        
+        def work():
+            return self.export_manager.export_volumes(
+                entries, format_type, self._filename("research_batch", job),
+                progress=lambda done, count: self._progress(job, done, count),
+                cancel_event=job.cancel_event, total=total,
+            )
+        
+        return self._submit(job, work)
+    
+    def _progress(self, job: ExportJob, done: int, total: Optional[int]):
+        job.done = done
+        if total is not None:
+            job.total = total
+        self._notify(job)
+    
+    def _submit(self, job: ExportJob, work: Callable[[], List[str]]) -> ExportJob:
+        def run():
+            if job.cancel_event.is_set():
+                self._finish(job, "cancelled")
+                return
+            job.status = "running"
+            self._notify(job)
+            try:
+                job.paths = work()
+            except ExportCancelled:
+                self._finish(job, "cancelled")
+            except Exception as e:
+                print(f"Export hatası: {e}")
+                self._finish(job, "failed", str(e))
+            else:
+                self._finish(job, "done")
+        
+        self._notify(job)
+        job.future = self._executor.submit(run)
+        return job
+    
+    def _finish(self, job: ExportJob, status: str, error: Optional[str] = None):
+        job.status = status
+        job.error = error
+        with self._lock:
+            self._jobs.pop(job.id, None)
+        self._notify(job)
+    
+    def cancel(self, job_id: int) -> bool:
+        """İşi iptal et; sıradaysa hiç başlamaz"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            # Henüz başlamamıştı
+            self._finish(job, "cancelled")
+        return True
+    
+    def cancel_all(self) -> int:
+        """Tüm aktif işleri iptal et, iptal edilen iş sayısını döndür"""
+        return sum(self.cancel(job.id) for job in self.active_jobs())
+    
+    def active_jobs(self) -> List[ExportJob]:
+        """Sırada bekleyen ve çalışan işler"""
+        with self._lock:
+            return list(self._jobs.values())
+    
+    def shutdown(self):
+        """Aktif işleri iptal et ve thread'leri bırak"""
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
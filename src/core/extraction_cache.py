@@ -0,0 +1,204 @@
+"""
+Dosya çıkarım önbelleği - İçerik hash'ine göre adreslenen, LRU sınırlı disk önbelleği
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Çıkarım mantığı değişince eski kayıtların geçersiz olması için artırılır
+CACHE_VERSION = 1
+
+
+class ExtractionCache:
+    """
+    Yüklenen dosyalardan çıkarılan metni saklar.
+    
+    Anahtar dosya içeriğinin SHA-256 özetidir (aynı içerik farklı yolda da
+    eşleşir). Dosyayı tekrar okumamak için (yol, mtime, boyut) -> hash hızlı
+    yolu tutulur. Toplam boyut max_bytes'ı aşınca en eski erişilenler silinir.
+    """
+    
+    def __init__(self, cache_dir: str = "data/cache/extraction", max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.blob_dir = self.cache_dir / "blobs"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.cache_dir / "index.json"
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        # Kaydedilmemiş erişim zamanı / silinen kayıt var mı (flush() yazar)
+        self._dirty = False
+        self._load_index()
+    
+    def _load_index(self):
+        """İndeksi yükle"""
+        self._entries: Dict[str, Dict] = {}
+        self._by_stat: Dict[str, str] = {}
+        if self.index_file.exists():
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("version") == CACHE_VERSION:
+                    self._entries = data.get("entries", {})
+                    self._by_stat = data.get("by_stat", {})
+            except Exception as e:
+                print(f"Önbellek indeksi yükleme hatası: {e}")
+    
+    def _save_index(self):
+        """İndeksi atomik olarak kaydet (silinen kayıtların hızlı yol anahtarları da atılır)"""
+        live = set(self._entries)
+        self._by_stat = {k: v for k, v in self._by_stat.items() if v in live}
+        tmp_file = self.index_file.with_suffix(".json.tmp")
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({"version": CACHE_VERSION, "entries": self._entries, "by_stat": self._by_stat},
+                          f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_file, self.index_file)
+            self._dirty = False
+        except Exception as e:
+            print(f"Önbellek indeksi kaydetme hatası: {e}")
+    
+    @staticmethod
+    def _stat_key(file_path: str, variant: str) -> Optional[str]:
+        """(yol, mtime, boyut, varyant) hızlı yol anahtarı"""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return f"{os.path.abspath(file_path)}|{stat.st_mtime_ns}|{stat.st_size}|{variant}"
+    
+    @staticmethod
+    def hash_file(file_path: str) -> str:
+        """Dosya içeriğinin SHA-256 özeti"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _key(content_hash: str, variant: str) -> str:
+        """Önbellek anahtarı (içerik + çıkarım seçenekleri)"""
+        if not variant:
+            return content_hash
+        return hashlib.sha256(f"{content_hash}|{variant}".encode()).hexdigest()
+    
+    def _blob_path(self, key: str) -> Path:
+        return self.blob_dir / f"{key}.txt"
+    
+    def _resolve_key(self, file_path: str, variant: str) -> Optional[str]:
+        """Dosyanın önbellek anahtarını bul (önce hızlı yol)"""
+        stat_key = self._stat_key(file_path, variant)
+        if stat_key is None:
+            return None
+        with self._lock:
+            key = self._by_stat.get(stat_key)
+        if key:
+            return key
+        try:
+            key = self._key(self.hash_file(file_path), variant)
+        except OSError:
+            return None
+        with self._lock:
+            self._by_stat[stat_key] = key
+        return key
+    
+    def get(self, file_path: str, variant: str = "") -> Optional[str]:
+        """Önbellekteki metni al, yoksa None"""
+        key = self._resolve_key(file_path, variant)
+        with self._lock:
+            if not key or key not in self._entries:
+                self.misses += 1
+                return None
+            try:
+                text = self._blob_path(key).read_text(encoding='utf-8')
+            except OSError:
+                # Blob dışarıdan silinmiş
+                self._entries.pop(key, None)
+                self._dirty = True
+                self.misses += 1
+                return None
+            self._entries[key]["last_access"] = time.time()
+            self._dirty = True
+            self.hits += 1
+            return text
+    
+    def put(self, file_path: str, text: str, variant: str = ""):
+        """Çıkarılan metni kaydet"""
+        key = self._resolve_key(file_path, variant)
+        if not key:
+            return
+        data = text.encode('utf-8')
+        with self._lock:
+            try:
+                tmp_blob = self._blob_path(key).with_suffix(".tmp")
+                tmp_blob.write_bytes(data)
+                os.replace(tmp_blob, self._blob_path(key))
+            except OSError as e:
+                print(f"Önbellek yazma hatası: {e}")
+                return
+            self._entries[key] = {
+                "bytes": len(data),
+                "name": Path(file_path).name,
+                "created": time.time(),
+                "last_access": time.time(),
+            }
+            self._evict()
+            self._save_index()
+    
+    def _evict(self):
+        """Boyut sınırı aşılırsa en eski erişilenleri sil (LRU)"""
+        total = sum(entry["bytes"] for entry in self._entries.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(self._entries.items(), key=lambda item: item[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            try:
+                self._blob_path(key).unlink()
+            except OSError:
+                pass
+            total -= entry["bytes"]
+            del self._entries[key]
+    
+    def list_entries(self) -> List[Dict]:
+        """Önbellekteki kayıtlar (en son erişilen önce)"""
+        with self._lock:
+            items = [dict(entry, key=key) for key, entry in self._entries.items()]
+        return sorted(items, key=lambda entry: entry["last_access"], reverse=True)
+    
+    def stats(self) -> Dict:
+        """Önbellek istatistikleri"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(entry["bytes"] for entry in self._entries.values()),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+    
+    def clear(self):
+        """Önbelleği tamamen temizle"""
+        with self._lock:
+            for blob in self.blob_dir.glob("*"):
+                try:
+                    blob.unlink()
+                except OSError:
+                    pass
+            self._entries = {}
+            self._by_stat = {}
+            self.hits = 0
+            self.misses = 0
+            self._save_index()
+    
+    def flush(self):
+        """Erişim zamanlarını diske yaz (değişiklik yoksa yazmaz)"""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
@@ -1,19 +1,73 @@
 """
 Dosya işleme modülü - PDF, TXT, kod, resim okuma
 """
+import multiprocessing
 import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import (Future, ProcessPoolExecutor, ThreadPoolExecutor,
+                                FIRST_COMPLETED, wait)
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
-import PyPDF2
-import pdfplumber
-from PIL import Image
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
 import io
 
+from .extraction_cache import ExtractionCache
+from .prompt_packer import PromptPacker
+from ..utils.constants import (FILE_INGEST_MAX_WORKERS, FILE_INGEST_TIMEOUT, PDF_MAX_CHARS,
+                               SUPPORTED_FILE_EXTENSIONS)
+
+IMAGE_EXTENSIONS = SUPPORTED_FILE_EXTENSIONS["image"]
+
+# Paralel işlemede iptal kontrolü aralığı (sn)
+CANCEL_POLL_INTERVAL = 0.2
+
+
+def parse_page_ranges(spec: Optional[str], total: int) -> List[int]:
+    """'1-3,7,10-' biçimindeki 1 tabanlı aralığı 0 tabanlı sayfa indekslerine çevir"""
+    if not spec:
+        return list(range(total))
+    indices = []
+    seen = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start = int(start_text) if start_text.strip() else 1
+            end = int(end_text) if end_text.strip() else total
+        else:
+            start = end = int(part)
+        for page_no in range(max(start, 1), min(end, total) + 1):
+            if page_no not in seen:
+                seen.add(page_no)
+                indices.append(page_no - 1)
+    return indices
+
+
+def _process_file_worker(file_path: str, options: Dict[str, any]) -> Dict[str, any]:
+    """Process pool içinde tek dosya işle (pickle edilebilir olmalı)"""
+    return FileProcessor(**options).process_file(file_path)
+
 
 class FileProcessor:
     """Dosya işleme sınıfı"""
     
-    def __init__(self):
+    def __init__(self, cache: Optional[ExtractionCache] = None, pdf_pages: Optional[str] = None,
+                 pdf_max_pages: Optional[int] = None, pdf_max_chars: Optional[int] = PDF_MAX_CHARS,
+                 pdf_layout: bool = False):
+        self.cache = cache
+        # PDF çıkarım bütçesi: sayfa aralığı, en fazla sayfa / karakter, düzen koruma
+        self.pdf_pages = pdf_pages
+        self.pdf_max_pages = pdf_max_pages
+        self.pdf_max_chars = pdf_max_chars
+        self.pdf_layout = pdf_layout
+        # PDF'ler için uzun ömürlü process pool (ilk paralel işlemede açılır)
+        self.process_workers = FILE_INGEST_MAX_WORKERS
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
         self.supported_extensions = {
             ".pdf": self._read_pdf,
             ".txt": self._read_text,
@@ -44,30 +98,117 @@ class FileProcessor:
             ".webp": self._is_image,
         }
     
+    @property
+    def pdf_options(self) -> Dict[str, any]:
+        """PDF çıkarım seçenekleri (process pool'a aktarılır)"""
+        return {
+            "pdf_pages": self.pdf_pages,
+            "pdf_max_pages": self.pdf_max_pages,
+            "pdf_max_chars": self.pdf_max_chars,
+            "pdf_layout": self.pdf_layout,
+        }
+    
+    def _cache_variant(self, ext: str) -> str:
+        """Çıkarım seçeneklerine bağlı önbellek varyantı"""
+        if ext != ".pdf":
+            return ""
+        return (f"pdf:{self.pdf_pages or ''}:{self.pdf_max_pages or ''}:"
+                f"{self.pdf_max_chars or ''}:{int(self.pdf_layout)}")
+    
+    def iter_pdf_pages(self, file_path: str, pages: Optional[str] = None,
+                       layout: Optional[bool] = None) -> Iterator[Tuple[int, int, str]]:
+        """PDF sayfalarını tembel (lazy) olarak üret: (sayfa_no, toplam, metin)
+        
+        pages: "1-5,8" gibi 1 tabanlı sayfa aralığı; None ise tüm sayfalar.
+        layout=False iken hızlı PyPDF2, True iken düzeni koruyan pdfplumber
+        önce denenir; ilk sayfa üretilemezse diğerine geçilir.
+        """
+        if layout is None:
+            layout = self.pdf_layout
+        backends = [self._iter_pdfplumber, self._iter_pypdf2] if layout else [self._iter_pypdf2, self._iter_pdfplumber]
+        
+        errors = []
+        for backend in backends:
+            emitted = False
+            try:
+                for item in backend(file_path, pages):
+                    emitted = True
+                    yield item
+                return
+            except Exception as e:
+                # Sayfa üretildikten sonra backend değiştirmek tekrar üretir
+                if emitted:
+                    raise
+                errors.append(str(e))
+        raise RuntimeError(", ".join(errors))
+    
+    @staticmethod
+    def _iter_pypdf2(file_path: str, pages: Optional[str]) -> Iterator[Tuple[int, int, str]]:
+        """PyPDF2 ile sayfa sayfa oku"""
+        # Ağır PDF kütüphaneleri yalnızca PDF okunurken yüklenir (başlangıç süresi)
+        import PyPDF2
+        with open(file_path, 'rb') as file:
+            reader = PyPDF2.PdfReader(file)
+            total = len(reader.pages)
+            for index in parse_page_ranges(pages, total):
+                yield index + 1, total, reader.pages[index].extract_text() or ""
+    
+    @staticmethod
+    def _iter_pdfplumber(file_path: str, pages: Optional[str]) -> Iterator[Tuple[int, int, str]]:
+        """pdfplumber ile sayfa sayfa oku (her sayfadan sonra bellek bırakılır)"""
+        import pdfplumber
+        with pdfplumber.open(file_path) as pdf:
+            total = len(pdf.pages)
+            for index in parse_page_ranges(pages, total):
+                page = pdf.pages[index]
+                try:
+                    text = page.extract_text() or ""
+                finally:
+                    # Sayfa nesnelerinin önbelleğini bırak
+                    if hasattr(page, "close"):
+                        page.close()
+                    elif hasattr(page, "flush_cache"):
+                        page.flush_cache()
+                yield index + 1, total, text
+    
     def _read_pdf(self, file_path: str) -> Tuple[str, Optional[str]]:
-        """PDF dosyasını oku"""
+        """PDF dosyasını oku (sayfa/karakter bütçesi ile)"""
+        text_parts = []
+        chars = 0
+        pages_read = 0
+        total_pages = 0
+        truncated = False
         try:
-            # Önce pdfplumber ile dene (daha iyi)
-            with pdfplumber.open(file_path) as pdf:
-                text_parts = []
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        text_parts.append(text)
-                return "\n\n".join(text_parts), None
-        except Exception as e1:
-            try:
-                # PyPDF2 ile dene
-                with open(file_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    text_parts = []
-                    for page in pdf_reader.pages:
-                        text = page.extract_text()
-                        if text:
-                            text_parts.append(text)
-                    return "\n\n".join(text_parts), None
-            except Exception as e2:
-                return "", f"PDF okuma hatası: {e1}, {e2}"
+            for _, total_pages, text in self.iter_pdf_pages(file_path, self.pdf_pages):
+                pages_read += 1
+                if text:
+                    if self.pdf_max_chars:
+                        # Ayraçlar da bütçeden düşülür; kalan hiç yoksa dilim eklenmez
+                        remaining = self.pdf_max_chars - chars
+                        if remaining <= 0:
+                            truncated = True
+                            break
+                        if len(text) > remaining:
+                            text_parts.append(text[:remaining])
+                            truncated = True
+                            break
+                    text_parts.append(text)
+                    chars += len(text) + 2
+                # Sonraki sayfa hiç ayrıştırılmasın diye burada kes
+                if self.pdf_max_pages and pages_read >= self.pdf_max_pages:
+                    truncated = pages_read < len(parse_page_ranges(self.pdf_pages, total_pages))
+                    break
+        except Exception as e:
+            if not text_parts:
+                return "", f"PDF okuma hatası: {e}"
+            truncated = True
+        
+        content = "\n\n".join(text_parts)
+        if truncated:
+            # Oran istenen aralığa göre verilir (pdf_pages yoksa tüm sayfalar)
+            requested = len(parse_page_ranges(self.pdf_pages, total_pages))
+            content += f"\n\n[Not: istenen {requested} sayfanın {pages_read} sayfası okundu]"
+        return content, None
     
     def _read_text(self, file_path: str) -> Tuple[str, Optional[str]]:
         """Metin dosyasını oku"""
@@ -80,6 +221,7 @@ class FileProcessor:
     def _is_image(self, file_path: str) -> Tuple[str, Optional[str]]:
         """Resim dosyası kontrolü"""
         try:
+            from PIL import Image
             img = Image.open(file_path)
             img.verify()
             return file_path, None  # Resim yolu döndür
@@ -109,6 +251,12 @@ class FileProcessor:
                 "path": file_path
             }
         
+        # Metin çıkarımı önbellekte varsa dosyayı tekrar ayrıştırma
+        if ext not in IMAGE_EXTENSIONS and self.cache:
+            cached = self.cache.get(str(path), self._cache_variant(ext))
+            if cached is not None:
+                return self._text_result(file_path, cached, cached=True)
+        
         reader_func = self.supported_extensions[ext]
         content, error = reader_func(str(path))
         
@@ -116,13 +264,16 @@ class FileProcessor:
             return {
                 "success": False,
                 "error": error,
-                "type": "image" if ext in [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp"] else "text",
+                "type": "image" if ext in IMAGE_EXTENSIONS else "text",
                 "content": None,
                 "path": file_path
             }
         
         # Dosya tipini belirle
-        file_type = "image" if ext in [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp"] else "text"
+        file_type = "image" if ext in IMAGE_EXTENSIONS else "text"
+        
+        if file_type == "text" and self.cache:
+            self.cache.put(str(path), content, self._cache_variant(ext))
         
         return {
             "success": True,
@@ -134,18 +285,257 @@ class FileProcessor:
             "size": path.stat().st_size
         }
     
-    def process_multiple_files(self, file_paths: List[str]) -> List[Dict[str, any]]:
-        """Birden fazla dosyayı işle"""
-        results = []
-        for file_path in file_paths:
-            result = self.process_file(file_path)
-            results.append(result)
+    @staticmethod
+    def _text_result(file_path: str, content: str, cached: bool = False) -> Dict[str, any]:
+        """Başarılı metin sonucu oluştur"""
+        path = Path(file_path)
+        return {
+            "success": True,
+            "error": None,
+            "type": "text",
+            "content": content,
+            "path": file_path,
+            "name": path.name,
+            "size": path.stat().st_size,
+            "cached": cached
+        }
+    
+    def process_multiple_files(self, file_paths: List[str], parallel: bool = False,
+                               max_workers: Optional[int] = None,
+                               timeout: Optional[float] = FILE_INGEST_TIMEOUT,
+                               progress_callback: Optional[Callable[[int, int, str], None]] = None,
+                               cancel_event: Optional[threading.Event] = None) -> List[Dict[str, any]]:
+        """Birden fazla dosyayı işle
+        
+        parallel=True ise PDF'ler process pool'da, diğer dosyalar thread pool'da
+        işlenir. Sonuçlar her zaman girdi sırasıyla döner. progress_callback
+        (tamamlanan, toplam, dosya_yolu) ile her dosya bitince çağrılır.
+        cancel_event set edilirse bekleyen dosyalar "İptal edildi" hatasıyla döner.
+        """
+        if not parallel or len(file_paths) < 2:
+            results = []
+            for i, file_path in enumerate(file_paths, 1):
+                if cancel_event is not None and cancel_event.is_set():
+                    results.append(self._error_result(file_path, "İptal edildi"))
+                    continue
+                result = self.process_file(file_path)
+                results.append(result)
+                if progress_callback:
+                    progress_callback(i, len(file_paths), file_path)
+            return results
+        
+        return self._process_parallel(file_paths, max_workers or FILE_INGEST_MAX_WORKERS,
+                                      timeout, progress_callback, cancel_event)
+    
+    def _get_process_pool(self) -> Optional[ProcessPoolExecutor]:
+        """Uzun ömürlü PDF process pool'u (ilk kullanımda, spawn ile açılır)
+        
+        spawn, Qt/SQLite thread'leri çalışırken fork'un kilitli durumu
+        kopyalamasını önler; worker'lar açık kalır, her çağrıda yeniden
+        başlatılmaz.
+        """
+        with self._pool_lock:
+            if self._process_pool is None:
+                try:
+                    self._process_pool = ProcessPoolExecutor(
+                        max_workers=self.process_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                except (OSError, NotImplementedError) as e:
+                    print(f"Process pool başlatılamadı, thread kullanılacak: {e}")
+                    return None
+            return self._process_pool
+    
+    def _discard_process_pool(self, pool: ProcessPoolExecutor):
+        """Takılan worker'ları sonlandır; sonraki istek yeni havuz açar"""
+        with self._pool_lock:
+            if self._process_pool is pool:
+                self._process_pool = None
+        # ProcessPoolExecutor tek bir işi durdurmayı desteklemez; havuzun
+        # process'leri sonlandırılır, havuzdaki diğer işler yeniden gönderilir
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            if process.is_alive():
+                process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+    
+    def shutdown(self):
+        """Process pool'u kapat, önbellek erişim zamanlarını diske yaz"""
+        with self._pool_lock:
+            pool, self._process_pool = self._process_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if self.cache:
+            self.cache.flush()
+    
+    def _process_parallel(self, file_paths: List[str], max_workers: int,
+                          timeout: Optional[float],
+                          progress_callback: Optional[Callable[[int, int, str], None]],
+                          cancel_event: Optional[threading.Event] = None) -> List[Dict[str, any]]:
+        """Sınırlı eşzamanlılık ve dosya başına zaman aşımı ile paralel işleme"""
+        total = len(file_paths)
+        results: List[Optional[Dict[str, any]]] = [None] * total
+        done_count = 0
+        
+        # Önbellekte olan PDF'ler için process başlatma
+        pdf_indices = []
+        for i, p in enumerate(file_paths):
+            if Path(p).suffix.lower() != ".pdf":
+                continue
+            cached = self.cache.get(p, self._cache_variant(".pdf")) if self.cache and Path(p).exists() else None
+            if cached is None:
+                pdf_indices.append(i)
+                continue
+            results[i] = self._text_result(p, cached, cached=True)
+            done_count += 1
+            if progress_callback:
+                progress_callback(done_count, total, p)
+        
+        pdf_queue = deque(pdf_indices)
+        other_queue = deque(i for i, p in enumerate(file_paths) if Path(p).suffix.lower() != ".pdf")
+        
+        # Tek PDF için process'e aktarma maliyetine değmez
+        pdf_workers = min(max_workers, self.process_workers, len(pdf_queue))
+        if len(pdf_queue) < 2 or self._get_process_pool() is None:
+            other_queue.extend(pdf_queue)
+            pdf_queue.clear()
+        thread_pool = ThreadPoolExecutor(max_workers=max_workers) if other_queue else None
+        # Havuz başka bir çağrıda sonlandırıldığı için düşen işler bir kez yeniden denenir
+        retried = set()
+        
+        # future -> (girdi sırası, son tarih, gönderildiği process pool ya da None)
+        running: Dict[Future, Tuple[int, Optional[float], Optional[ProcessPoolExecutor]]] = {}
+        
+        def submit(index: int, pool: Optional[ProcessPoolExecutor]):
+            deadline = time.monotonic() + timeout if timeout else None
+            if pool is not None:
+                future = pool.submit(_process_file_worker, file_paths[index], self.pdf_options)
+            else:
+                future = thread_pool.submit(self.process_file, file_paths[index])
+            running[future] = (index, deadline, pool)
+        
+        def fill():
+            nonlocal thread_pool
+            # Havuz başına en fazla worker sayısı kadar iş gönderilir; böylece
+            # zaman aşımı kuyrukta beklemeyi değil işleme süresini ölçer
+            pdf_running = sum(1 for _, _, pool in running.values() if pool is not None)
+            while pdf_queue and pdf_running < pdf_workers:
+                pool = self._get_process_pool()
+                if pool is None:
+                    other_queue.extend(pdf_queue)
+                    pdf_queue.clear()
+                    break
+                submit(pdf_queue.popleft(), pool)
+                pdf_running += 1
+            if other_queue and thread_pool is None:
+                thread_pool = ThreadPoolExecutor(max_workers=max_workers)
+            other_running = len(running) - pdf_running
+            while other_queue and other_running < max_workers:
+                submit(other_queue.popleft(), None)
+                other_running += 1
+        
+        def report(index: int):
+            nonlocal done_count
+            done_count += 1
+            if progress_callback:
+                progress_callback(done_count, total, file_paths[index])
+        
+        def collect(future: Future):
+            """Biten işin sonucunu al (bozuk havuzda düşen iş bir kez yeniden kuyruğa alınır)"""
+            index, _, pool = running.pop(future)
+            try:
+                results[index] = future.result()
+                # Worker process önbelleğe erişemez; sonucu burada sakla
+                if pool is not None and self.cache and results[index].get("success"):
+                    self.cache.put(file_paths[index], results[index]["content"],
+                                   self._cache_variant(".pdf"))
+            except BrokenProcessPool as e:
+                # Bozuk havuz yeniden kullanılmasın
+                self._discard_process_pool(pool)
+                if index not in retried:
+                    retried.add(index)
+                    pdf_queue.appendleft(index)
+                    return
+                results[index] = self._error_result(file_paths[index], f"Dosya işleme hatası: {e}")
+            except Exception as e:
+                results[index] = self._error_result(file_paths[index], f"Dosya işleme hatası: {e}")
+            report(index)
+        
+        try:
+            fill()
+            while running:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                now = time.monotonic()
+                deadlines = [d for _, d, _ in running.values() if d is not None]
+                wait_for = max(min(deadlines) - now, 0) if deadlines else None
+                if cancel_event is not None:
+                    # İptal isteğini kaçırmamak için kısa aralıklarla uyan
+                    wait_for = CANCEL_POLL_INTERVAL if wait_for is None else min(wait_for, CANCEL_POLL_INTERVAL)
+                finished, _ = wait(list(running), timeout=wait_for, return_when=FIRST_COMPLETED)
+                
+                now = time.monotonic()
+                for future in list(running):
+                    if future not in running:
+                        # Zaman aşımı işlenirken sonucu alındı ya da kuyruğa geri alındı
+                        continue
+                    index, deadline, pool = running[future]
+                    if future in finished:
+                        collect(future)
+                    elif deadline is not None and now >= deadline:
+                        future.cancel()
+                        del running[future]
+                        results[index] = self._error_result(file_paths[index], f"Zaman aşımı ({timeout:g} sn)")
+                        report(index)
+                        if pool is not None:
+                            # Takılan worker'ı öldür; aynı havuzda bitmiş işlerin sonuçları
+                            # alınır, yalnızca bitmemişler yeni havuzda baştan çalıştırılır
+                            siblings = [other for other, (_, _, other_pool) in running.items()
+                                        if other_pool is pool]
+                            for other in siblings:
+                                if other.done():
+                                    collect(other)
+                            self._discard_process_pool(pool)
+                            for other in siblings:
+                                if other in running:
+                                    pdf_queue.appendleft(running.pop(other)[0])
+                fill()
+            
+            # İptal: thread'ler arka planda bitebilir, sonuçları kullanılmaz
+            for future, (index, _, _) in running.items():
+                future.cancel()
+                results[index] = self._error_result(file_paths[index], "İptal edildi")
+            for index in list(pdf_queue) + list(other_queue):
+                results[index] = self._error_result(file_paths[index], "İptal edildi")
+        finally:
+            # Zaman aşımına uğrayan thread işleri arka planda bitebilir; beklenmez.
+            # Process pool açık kalır (sonraki çağrılarda yeniden kullanılır).
+            if thread_pool:
+                thread_pool.shutdown(wait=False, cancel_futures=True)
+        
         return results
     
-    def format_for_prompt(self, files: List[Dict[str, any]], user_prompt: str) -> str:
-        """Dosya içeriklerini prompt formatına çevir"""
+    @staticmethod
+    def _error_result(file_path: str, error: str) -> Dict[str, any]:
+        """Hata sonucu oluştur"""
+        return {
+            "success": False,
+            "error": error,
+            "type": None,
+            "content": None,
+            "path": file_path
+        }
+    
+    def format_for_prompt(self, files: List[Dict[str, any]], user_prompt: str,
+                          max_tokens: Optional[int] = None,
+                          packer: Optional[PromptPacker] = None) -> str:
+        """Dosya içeriklerini prompt formatına çevir
+        
+        max_tokens verilirse dosya içerikleri bu bütçeye sığacak şekilde
+        dosyalar arasında adil paylaştırılıp deterministik olarak kısaltılır.
+        """
         prompt_parts = [user_prompt]
         
+        sections = []
         for file_info in files:
             if not file_info.get("success"):
                 continue
@@ -154,10 +544,27 @@ class FileProcessor:
             file_type = file_info.get("type")
             
             if file_type == "text":
-                content = file_info.get("content", "")
-                prompt_parts.append(f"\n\n--- {file_name} ---\n{content}\n--- End of {file_name} ---")
+                sections.append((file_name, file_info.get("content", "")))
             elif file_type == "image":
+                sections.append((file_name, None))
+        
+        if max_tokens is not None:
+            packer = packer or PromptPacker()
+            texts = [content for _, content in sections if content is not None]
+            overhead = sum(
+                packer.estimate_tokens(f"\n\n--- {name} ---\n\n--- End of {name} ---") if content is not None
+                else packer.estimate_tokens(f"\n\n[Resim eklendi: {name}]")
+                for name, content in sections
+            )
+            budgets = iter(packer.allocate([packer.estimate_tokens(t) for t in texts],
+                                           max(max_tokens - overhead, 0)))
+            sections = [(name, packer.truncate(content, next(budgets)) if content is not None else None)
+                        for name, content in sections]
+        
+        for file_name, content in sections:
+            if content is not None:
+                prompt_parts.append(f"\n\n--- {file_name} ---\n{content}\n--- End of {file_name} ---")
+            else:
                 prompt_parts.append(f"\n\n[Resim eklendi: {file_name}]")
         
         return "\n".join(prompt_parts)
-
@@ -1,26 +1,36 @@
 """
 HuggingFace Serverless Inference API client
 """
+import importlib.util
 import requests
 import time
 import base64
-from typing import Optional, Dict, Any, List
+import json
+from typing import Optional, Dict, Any, List, Iterator
 from pathlib import Path
 
-try:
-    from huggingface_hub import InferenceClient
-    HF_HUB_AVAILABLE = True
-except ImportError:
-    HF_HUB_AVAILABLE = False
+# huggingface_hub ağır bir import; yalnızca varlığı kontrol edilir, ilk kullanımda yüklenir
+HF_HUB_AVAILABLE = importlib.util.find_spec("huggingface_hub") is not None
 
-from ..utils.constants import HF_API_BASE_URL
+from .http_transport import PooledTransport
+from ..utils.constants import (HF_API_BASE_URL, HF_HUB_API_URL, HF_CHAT_COMPLETIONS_URL,
+                               DEFAULT_CONTEXT_LENGTH, MODEL_CONTEXT_LENGTHS,
+                               HTTP_POOL_CONNECTIONS,
+                               HTTP_POOL_MAXSIZE, HTTP_POOL_BLOCK)
 
 
 class HuggingFaceAPI:
     """HuggingFace API client sınıfı"""
     
-    def __init__(self, token: str, timeout: int = 60, max_retries: int = 3):
+    def __init__(self, token: str, timeout: int = 60, max_retries: int = 3,
+                 pool_connections: int = HTTP_POOL_CONNECTIONS,
+                 pool_maxsize: int = HTTP_POOL_MAXSIZE,
+                 pool_block: bool = HTTP_POOL_BLOCK,
+                 catalog_getter=None):
         self.token = token
+        # Opsiyonel ModelCatalog döndüren fonksiyon: arama/model bilgisi
+        # yanıtlarını yerelde tutar (katalog ilk Hub isteğinde açılır)
+        self._catalog_getter = catalog_getter
         self.timeout = timeout
         self.max_retries = max_retries
         self.base_url = HF_API_BASE_URL
@@ -28,14 +38,33 @@ class HuggingFaceAPI:
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json"
         }
-        # HuggingFace Hub InferenceClient kullan (daha güncel)
-        if HF_HUB_AVAILABLE and token:
-            try:
-                self.inference_client = InferenceClient(token=token, timeout=timeout)
-            except Exception:
-                self.inference_client = None
-        else:
-            self.inference_client = None
+        # Tüm HTTP istekleri tek bir havuzlu oturumdan geçer (TCP+TLS yeniden kullanımı)
+        self.transport = PooledTransport(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self._context_lengths: Dict[str, int] = {}
+        self._inference_client = None
+        self._inference_client_loaded = False
+    
+    @property
+    def catalog(self):
+        """Model kataloğu (yoksa None)"""
+        return self._catalog_getter() if self._catalog_getter else None
+    
+    @property
+    def inference_client(self):
+        """HuggingFace Hub InferenceClient (daha güncel); ilk erişimde oluşturulur"""
+        if not self._inference_client_loaded:
+            self._inference_client_loaded = True
+            if HF_HUB_AVAILABLE and self.token:
+                try:
+                    from huggingface_hub import InferenceClient
+                    self._inference_client = InferenceClient(token=self.token, timeout=self.timeout)
+                except Exception:
+                    self._inference_client = None
+        return self._inference_client
     
     def _make_request(self, model: str, payload: Dict[str, Any], is_image: bool = False) -> Optional[Dict[str, Any]]:
         """API isteği yap"""
@@ -54,7 +83,7 @@ class HuggingFaceAPI:
         
         for attempt in range(self.max_retries):
             try:
-                response = requests.post(
+                response = self.transport.post(
                     url,
                     headers=self.headers,
                     json=payload,
@@ -232,13 +261,118 @@ class HuggingFaceAPI:
         
         return self.generate_text(model, prompt, parameters)
     
+    def chat_completion_stream(self, model: str, messages: List[Dict[str, str]], parameters: Optional[Dict] = None) -> Iterator[str]:
+        """Chat completion yanıtını parça parça (token token) üret
+        
+        Önce InferenceClient'ın stream modunu, olmazsa SSE (text/event-stream)
+        üzerinden düz HTTP isteğini dener. Hata olursa RuntimeError fırlatır.
+        """
+        if not self.token:
+            raise RuntimeError("HuggingFace token gerekli")
+        
+        max_tokens = parameters.get("max_new_tokens", 250) if parameters else 250
+        temperature = parameters.get("temperature", 0.7) if parameters else 0.7
+        
+        if self.inference_client:
+            emitted = False
+            try:
+                stream = self.inference_client.chat_completion(
+                    messages=messages,
+                    model=model,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    stream=True,
+                )
+                for chunk in stream:
+                    delta = self._extract_stream_delta(chunk)
+                    if delta:
+                        emitted = True
+                        yield delta
+                return
+            except Exception as e:
+                # Parça gönderildikten sonra fallback yapılırsa metin tekrarlanır
+                if emitted:
+                    raise RuntimeError(f"Stream kesildi: {e}")
+                print(f"InferenceClient stream hatası, SSE fallback deneniyor: {e}")
+        
+        yield from self._stream_sse(model, messages, max_tokens, temperature)
+    
+    def _stream_sse(self, model: str, messages: List[Dict[str, str]], max_tokens: int, temperature: float) -> Iterator[str]:
+        """OpenAI uyumlu chat completions endpoint'inden SSE stream oku"""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True,
+        }
+        headers = dict(self.headers)
+        headers["Accept"] = "text/event-stream"
+        
+        try:
+            response = self.transport.post(
+                HF_CHAT_COMPLETIONS_URL,
+                headers=headers,
+                json=payload,
+                timeout=self.timeout,
+                stream=True,
+            )
+        except requests.exceptions.Timeout:
+            raise RuntimeError("Request timeout")
+        except requests.exceptions.RequestException as e:
+            raise RuntimeError(str(e))
+        
+        with response:
+            if response.status_code != 200:
+                raise RuntimeError(f"API hatası ({response.status_code}): {response.text}")
+            
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(data)
+                except ValueError:
+                    continue
+                if "error" in chunk:
+                    raise RuntimeError(str(chunk["error"]))
+                delta = self._extract_stream_delta(chunk)
+                if delta:
+                    yield delta
+    
+    @staticmethod
+    def _extract_stream_delta(chunk: Any) -> str:
+        """Stream parçasından metin içeriğini çıkar (dict veya dataclass)"""
+        if isinstance(chunk, dict):
+            choices = chunk.get("choices") or []
+            if not choices:
+                return ""
+            delta = choices[0].get("delta") or {}
+            return delta.get("content") or ""
+        
+        choices = getattr(chunk, "choices", None) or []
+        if not choices:
+            return ""
+        delta = getattr(choices[0], "delta", None)
+        return getattr(delta, "content", None) or ""
+    
     def search_models(self, query: str = "", task: str = "") -> List[Dict[str, Any]]:
-        """Model arama (HuggingFace Hub API)"""
+        """Model arama (HuggingFace Hub API)
+        
+        Katalog varsa: taze sonuç yerelden döner, bayatsa ETag ile yeniden
+        doğrulanır; Hub'a ulaşılamazsa yerel katalog araması kullanılır.
+        """
+        cache_key = f"{query}|{task}" if task else query
+        cached, fresh, etag = self.catalog.get_search(cache_key) if self.catalog else (None, False, None)
+        if cached is not None and fresh:
+            return cached
         if not self.token:
-            return []
+            return self._offline_search(query, cached)
         
         try:
-            url = "https://huggingface.co/api/models"
+            url = HF_HUB_API_URL
             params = {
                 "search": query,
                 "sort": "downloads",
@@ -249,42 +383,101 @@ class HuggingFaceAPI:
             if task:
                 params["pipeline_tag"] = task
             
-            response = requests.get(
+            headers = {"Authorization": f"Bearer {self.token}"}
+            if etag and cached is not None:
+                headers["If-None-Match"] = etag
+            
+            response = self.transport.get(
                 url,
-                headers={"Authorization": f"Bearer {self.token}"},
+                headers=headers,
                 params=params,
                 timeout=30
             )
             
+            if response.status_code == 304 and cached is not None:
+                self.catalog.touch_search(cache_key)
+                return cached
             if response.status_code == 200:
-                return response.json()
+                models = response.json()
+                if self.catalog:
+                    self.catalog.put_search(cache_key, models, response.headers.get("ETag"))
+                return models
             else:
                 print(f"Model arama hatası: {response.status_code}")
-                return []
+                return self._offline_search(query, cached)
         
         except Exception as e:
             print(f"Model arama hatası: {e}")
-            return []
+            return self._offline_search(query, cached)
+    
+    def _offline_search(self, query: str, cached: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Hub'a ulaşılamadığında: bayat önbellek, yoksa yerel katalog araması"""
+        if cached is not None:
+            return cached
+        if self.catalog and query:
+            return self.catalog.search(query)
+        return []
     
     def get_model_info(self, model: str) -> Optional[Dict[str, Any]]:
-        """Model bilgisi al"""
+        """Model bilgisi al (katalog varsa TTL + ETag ile önbellekli, çevrimdışıyken bayat bilgi)"""
+        cached, fresh, etag = self.catalog.get_info(model) if self.catalog else (None, False, None)
+        if cached is not None and fresh:
+            return cached
         if not self.token:
-            return None
+            return cached
         
         try:
-            url = f"https://huggingface.co/api/models/{model}"
-            response = requests.get(
+            url = f"{HF_HUB_API_URL}/{model}"
+            headers = {"Authorization": f"Bearer {self.token}"}
+            if etag and cached is not None:
+                headers["If-None-Match"] = etag
+            response = self.transport.get(
                 url,
-                headers={"Authorization": f"Bearer {self.token}"},
+                headers=headers,
                 timeout=30
             )
             
+            if response.status_code == 304 and cached is not None:
+                self.catalog.touch_info(model)
+                return cached
             if response.status_code == 200:
-                return response.json()
+                info = response.json()
+                if self.catalog:
+                    self.catalog.put_info(info, response.headers.get("ETag"))
+                return info
             else:
-                return None
+                return cached
         
         except Exception as e:
             print(f"Model bilgisi alma hatası: {e}")
-            return None
-
+            return cached
+    
+    def get_context_length(self, model: str) -> int:
+        """Modelin bağlam uzunluğu (Hub bilgisi, yoksa yerel tablo)"""
+        if model in self._context_lengths:
+            return self._context_lengths[model]
+        
+        length = None
+        info = self.get_model_info(model)
+        if info:
+            config = info.get("config") or {}
+            gguf = info.get("gguf") or {}
+            for value in (gguf.get("context_length"),
+                          config.get("max_position_embeddings"),
+                          (config.get("text_config") or {}).get("max_position_embeddings")):
+                if isinstance(value, int) and value > 0:
+                    length = value
+                    break
+        
+        if length is None:
+            length = MODEL_CONTEXT_LENGTHS.get(model, DEFAULT_CONTEXT_LENGTH)
+        self._context_lengths[model] = length
+        return length
+    
+    def get_transport_stats(self) -> Dict[str, Any]:
+        """Bağlantı havuzu istatistiklerini al"""
+        return self.transport.get_stats()
+    
+    def close(self):
+        """Havuzdaki bağlantıları kapat"""
+        self.transport.close()
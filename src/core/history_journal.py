@@ -0,0 +1,215 @@
+"""
+Geçmiş günlüğü - Append-only JSON-lines journal + atomik snapshot
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+
+class HistoryJournal:
+    """
+    Geçmiş için ekleme-tabanlı (append-only) depolama motoru.
+    
+    Kalıcı durum iki dosyadan oluşur:
+    - snapshot (history.json): son sıkıştırmadaki kayıtların JSON listesi
+    - journal (history.jsonl): snapshot'tan sonraki işlemler, satır başına bir JSON
+      {"op": "add", "entry": {...}} / {"op": "delete", "id": "..."} /
+      {"op": "delete", "ids": [...]} / {"op": "clear"}
+    
+    İşlemler idempotent olarak yeniden oynatılır; bu sayede sıkıştırma sırasında
+    çökme olsa bile snapshot + journal birlikte tutarlı durumu verir.
+    """
+    
+    def __init__(self, snapshot_file: Path, journal_file: Path,
+                 compact_every: int = 500, compact_bytes: int = 8 * 1024 * 1024):
+        self.snapshot_file = Path(snapshot_file)
+        self.journal_file = Path(journal_file)
+        self.compact_every = compact_every
+        self.compact_bytes = compact_bytes
+        self._lock = threading.RLock()
+        self._ops_since_compact = 0
+        self._compact_thread: Optional[threading.Thread] = None
+    
+    @property
+    def lock(self) -> threading.RLock:
+        """Bellek içi durum ile journal satırını birlikte değiştirmek için kilit
+        
+        compact() snapshot'ı bu kilit altında alır; kayıtları bu kilit altında
+        değiştirip ekleyen çağıran, snapshot'ın journal ofsetiyle tutarlı
+        olmasını sağlar.
+        """
+        return self._lock
+    
+    def load(self) -> List[Dict]:
+        """Snapshot'ı oku ve journal'ı üzerine uygula"""
+        entries: List[Dict] = []
+        if self.snapshot_file.exists():
+            try:
+                with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                    entries = json.load(f)
+            except Exception as e:
+                print(f"Geçmiş snapshot yükleme hatası: {e}")
+                entries = []
+        
+        ids = self._unique_ids(entries)
+        ops = 0
+        if self.journal_file.exists():
+            try:
+                with open(self.journal_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            op = json.loads(line)
+                        except ValueError:
+                            # Yarım yazılmış satır (çökme) - atla
+                            continue
+                        entries = self._apply(entries, ids, op)
+                        ops += 1
+            except Exception as e:
+                print(f"Geçmiş journal yükleme hatası: {e}")
+        
+        with self._lock:
+            self._ops_since_compact = ops
+        return entries
+    
+    @staticmethod
+    def _unique_ids(entries: List[Dict]) -> Set[str]:
+        """Eski sürümlerde çakışan id'leri ayır, id kümesini döndür
+        
+        İlk kayıt id'sini korur, sonrakilere sırayla "_dupN" eki verilir.
+        Snapshot her yüklemede aynı sırada okunduğundan üretilen id'ler
+        kararlıdır; journal bu id'lerle yapılan silmeleri doğru oynatır.
+        Journal eklemeleri mevcut id'yi atladığından çakışma yalnızca
+        snapshot'ta olabilir.
+        """
+        ids: Set[str] = set()
+        for entry in entries:
+            entry_id = entry.get("id")
+            if entry_id in ids:
+                n = 1
+                while f"{entry_id}_dup{n}" in ids:
+                    n += 1
+                entry_id = entry["id"] = f"{entry_id}_dup{n}"
+            ids.add(entry_id)
+        return ids
+    
+    @staticmethod
+    def _apply(entries: List[Dict], ids: Set[str], op: Dict) -> List[Dict]:
+        """Tek bir journal işlemini uygula (idempotent)"""
+        kind = op.get("op")
+        if kind == "add":
+            entry = op.get("entry") or {}
+            entry_id = entry.get("id")
+            if entry_id not in ids:
+                entries.append(entry)
+                ids.add(entry_id)
+        elif kind == "delete":
+            removed = set(op.get("ids") or [op.get("id")]) & ids
+            if removed:
+                entries = [e for e in entries if e.get("id") not in removed]
+                ids -= removed
+        elif kind == "clear":
+            entries = []
+            ids.clear()
+        return entries
+    
+    def _append(self, op: Dict):
+        """Journal'a tek satır ekle"""
+        line = json.dumps(op, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+            self._ops_since_compact += 1
+    
+    def append_add(self, entry: Dict):
+        """Ekleme işlemini kaydet"""
+        self._append({"op": "add", "entry": entry})
+    
+    def append_delete(self, entry_id: str):
+        """Silme işlemini (tombstone) kaydet"""
+        self._append({"op": "delete", "id": entry_id})
+    
+    def append_delete_many(self, entry_ids: List[str]):
+        """Birden fazla silme işlemini tek satırda kaydet"""
+        self._append({"op": "delete", "ids": list(entry_ids)})
+    
+    def append_clear(self):
+        """Temizleme işlemini kaydet"""
+        self._append({"op": "clear"})
+    
+    def needs_compaction(self) -> bool:
+        """Journal sıkıştırılmalı mı"""
+        with self._lock:
+            if self._ops_since_compact >= self.compact_every:
+                return True
+        try:
+            return self.journal_file.stat().st_size >= self.compact_bytes
+        except OSError:
+            return False
+    
+    def maybe_compact_async(self, snapshot_fn: Callable[[], List[Dict]]):
+        """Gerekirse arka planda sıkıştırma başlat"""
+        if not self.needs_compaction():
+            return
+        with self._lock:
+            if self._compact_thread and self._compact_thread.is_alive():
+                return
+            self._compact_thread = threading.Thread(
+                target=self.compact, args=(snapshot_fn,), daemon=True
+            )
+            self._compact_thread.start()
+    
+    def compact(self, snapshot_fn: Callable[[], List[Dict]]):
+        """Güncel durumu atomik olarak snapshot'a yaz ve journal'ı kısalt"""
+        # Snapshot ile journal ofseti aynı kilit altında alınır
+        with self._lock:
+            entries = snapshot_fn()
+            try:
+                offset = self.journal_file.stat().st_size
+            except OSError:
+                offset = 0
+            ops_at_snapshot = self._ops_since_compact
+        
+        try:
+            self._write_snapshot(entries)
+        except Exception as e:
+            print(f"Geçmiş sıkıştırma hatası: {e}")
+            return
+        
+        # Snapshot sırasında eklenen satırları koru, öncekileri at
+        with self._lock:
+            try:
+                tail = b""
+                if self.journal_file.exists():
+                    with open(self.journal_file, 'rb') as f:
+                        f.seek(offset)
+                        tail = f.read()
+                tmp_journal = self.journal_file.with_suffix(self.journal_file.suffix + ".tmp")
+                with open(tmp_journal, 'wb') as f:
+                    f.write(tail)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_journal, self.journal_file)
+                self._ops_since_compact = max(self._ops_since_compact - ops_at_snapshot, 0)
+            except Exception as e:
+                print(f"Geçmiş journal kısaltma hatası: {e}")
+    
+    def _write_snapshot(self, entries: List[Dict]):
+        """Snapshot'ı geçici dosyaya yazıp atomik rename ile değiştir"""
+        tmp_file = self.snapshot_file.with_suffix(self.snapshot_file.suffix + ".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.snapshot_file)
+    
+    def wait(self, timeout: Optional[float] = None):
+        """Arka plan sıkıştırmasının bitmesini bekle"""
+        thread = self._compact_thread
+        if thread and thread.is_alive():
+            thread.join(timeout)
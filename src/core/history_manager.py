@@ -1,46 +1,114 @@
 """
-Geçmiş yönetimi - JSON tabanlı kayıt sistemi
+Geçmiş yönetimi - JSON (append-only journal) veya SQLite tabanlı kayıt sistemi
 """
-import json
-import os
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
+
+from .history_journal import HistoryJournal
+from .history_sqlite import SQLiteHistoryStore
 
 
 class HistoryManager:
     """Geçmiş yönetim sınıfı"""
     
-    def __init__(self, history_dir: str = "data/history"):
+    def __init__(self, history_dir: str = "data/history", backend: str = "json"):
         self.history_dir = Path(history_dir)
         self.history_dir.mkdir(parents=True, exist_ok=True)
         self.history_file = self.history_dir / "history.json"
+        self.journal_file = self.history_dir / "history.jsonl"
+        self.db_file = self.history_dir / "history.db"
+        self.backend = backend
+        self._journal = HistoryJournal(self.history_file, self.journal_file)
+        self._db: Optional[SQLiteHistoryStore] = None
+        # JSON deposu: id -> kayıt (dict ekleme sırasını korur; silme O(1))
+        self._entries: Dict[str, Dict] = {}
+        self._next_seq = 0
         self._load_history()
     
     def _load_history(self):
-        """Geçmişi yükle"""
-        if self.history_file.exists():
+        """Geçmişi yükle (snapshot + journal veya SQLite)"""
+        if self.backend == "sqlite":
             try:
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    self.history = json.load(f)
+                self._db = SQLiteHistoryStore(self.db_file)
+                # Mevcut JSON geçmişini yalnızca bir kez içe aktar: sonradan temizlenen
+                # ya da tümü silinen geçmiş yeniden açılışta geri gelmesin
+                if self._db.get_meta("json_imported") is None:
+                    if self._db.is_empty() and (self.history_file.exists() or self.journal_file.exists()):
+                        self._db.add_many(self._journal.load())
+                    self._db.set_meta("json_imported", "1")
+                self._next_seq = self._seq_after(self._db.all_ids())
+                return
             except Exception as e:
-                print(f"Geçmiş yükleme hatası: {e}")
-                self.history = []
-        else:
-            self.history = []
-    
-    def _save_history(self):
-        """Geçmişi kaydet"""
+                print(f"SQLite geçmiş açılamadı, JSON'a dönülüyor: {e}")
+                self._db = None
+                self.backend = "json"
+        
         try:
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(self.history, f, indent=2, ensure_ascii=False)
+            # Journal çakışan eski id'leri yüklerken ayırır; id'ler tekildir
+            self._entries = {entry.get("id"): entry for entry in self._journal.load()}
         except Exception as e:
-            print(f"Geçmiş kaydetme hatası: {e}")
+            print(f"Geçmiş yükleme hatası: {e}")
+            self._entries = {}
+        self._next_seq = self._seq_after(self._entries.keys())
+    
+    @staticmethod
+    def _seq_after(entry_ids) -> int:
+        """Mevcut id'lerin sayaç kısmından sonraki değer"""
+        highest = -1
+        for entry_id in entry_ids:
+            suffix = str(entry_id).rsplit("_", 1)[-1]
+            if suffix.isdigit():
+                highest = max(highest, int(suffix))
+        return highest + 1
+    
+    def _exists(self, entry_id: str) -> bool:
+        """Id kullanımda mı"""
+        if self._db:
+            return self._db.exists(entry_id)
+        return entry_id in self._entries
+    
+    def _new_id(self) -> str:
+        """Çakışmasız, monoton artan kayıt id'si üret"""
+        stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        while True:
+            entry_id = f"{stamp}_{self._next_seq}"
+            self._next_seq += 1
+            if not self._exists(entry_id):
+                return entry_id
+    
+    @property
+    def history(self) -> Tuple[Dict, ...]:
+        """Tüm kayıtlar (ekleme sırasıyla, salt okunur)
+        
+        İki depoda da anlık kopya döner; değişiklikler add_entry /
+        delete_entry ile yapılmalıdır.
+        """
+        if self._db:
+            return tuple(self._db.all())
+        return tuple(self._entries.values())
+    
+    def _snapshot(self) -> List[Dict]:
+        """Sıkıştırma için geçmişin anlık kopyası"""
+        return list(self._entries.values())
     
-    def add_entry(self, model: str, prompt: str, response: str, files: List[str] = None, web_search_results: List[Dict] = None) -> str:
+    def _after_write(self):
+        """Journal büyüdüyse arka planda sıkıştır"""
+        self._journal.maybe_compact_async(self._snapshot)
+    
+    def compact(self):
+        """Journal'ı hemen snapshot'a sıkıştır"""
+        if self._db:
+            return
+        self._journal.wait()
+        self._journal.compact(self._snapshot)
+    
+    def add_entry(self, model: str, prompt: str, response: str, files: List[str] = None, web_search_results: List[Dict] = None,
+                  processed_files: List[Dict] = None, timings: Dict[str, float] = None,
+                  fetched_pages: List[Dict] = None) -> str:
         """Yeni kayıt ekle"""
         entry = {
-            "id": f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{len(self.history)}",
+            "id": self._new_id(),
             "timestamp": datetime.now().isoformat(),
             "model": model,
             "prompt": prompt,
@@ -48,43 +116,118 @@ class HistoryManager:
             "files": files or [],
             "web_search_results": web_search_results or []
         }
+        if processed_files:
+            entry["processed_files"] = processed_files
+        if timings:
+            entry["timings"] = timings
+        if fetched_pages:
+            entry["fetched_pages"] = fetched_pages
+        
+        if self._db:
+            self._db.add(entry)
+            return entry["id"]
         
-        self.history.append(entry)
-        self._save_history()
+        # Kayıt ve journal satırı, sıkıştırmanın snapshot aldığı kilit altında
+        with self._journal.lock:
+            self._entries[entry["id"]] = entry
+            try:
+                self._journal.append_add(entry)
+            except Exception as e:
+                print(f"Geçmiş kaydetme hatası: {e}")
+        self._after_write()
         return entry["id"]
     
     def get_entry(self, entry_id: str) -> Optional[Dict]:
         """Kayıt al"""
-        for entry in self.history:
-            if entry.get("id") == entry_id:
-                return entry
-        return None
+        if self._db:
+            return self._db.get(entry_id)
+        return self._entries.get(entry_id)
+    
+    def get_entries(self, entry_ids: List[str]) -> List[Dict]:
+        """Birden fazla kaydı (verilen sırayla) al, bulunmayanları atla"""
+        if self._db:
+            return self._db.get_many(list(entry_ids))
+        return [self._entries[entry_id] for entry_id in entry_ids if entry_id in self._entries]
     
     def get_all_entries(self) -> List[Dict]:
         """Tüm kayıtları al"""
-        return self.history.copy()
+        if self._db:
+            return self._db.all()
+        return list(self._entries.values())
+    
+    def iter_entries(self, batch_size: int = 500) -> Iterator[Dict]:
+        """Tüm kayıtları sırayla gez (toplu export için; liste kopyalanmaz)"""
+        if self._db:
+            yield from self._db.iter_all(batch_size)
+        else:
+            yield from self._snapshot()
+    
+    def get_last_entry(self) -> Optional[Dict]:
+        """Son eklenen kaydı al"""
+        if self._db:
+            return self._db.last()
+        return next(reversed(self._entries.values()), None)
+    
+    def count(self) -> int:
+        """Kayıt sayısı"""
+        if self._db:
+            return self._db.count()
+        return len(self._entries)
     
     def search_entries(self, query: str) -> List[Dict]:
         """Kayıtları ara"""
+        if self._db:
+            return self._db.search(query)
+        
         query_lower = query.lower()
         results = []
         
-        for entry in self.history:
+        for entry in self._entries.values():
             if (query_lower in entry.get("prompt", "").lower() or 
                 query_lower in entry.get("response", "").lower()):
                 results.append(entry)
         
         return results
     
+    def search_ranked(self, query: str, limit: int = 20, offset: int = 0) -> List[Dict]:
+        """Alaka sırasına göre sayfalı arama; sonuçlara 'snippet' ve 'rank' eklenir"""
+        if self._db:
+            return self._db.search_ranked(query, limit, offset)
+        
+        # JSON: geçen kelime sayısına göre basit sıralama
+        terms = [term for term in query.lower().split() if term]
+        scored = []
+        for position, entry in enumerate(self._entries.values()):
+            prompt = entry.get("prompt", "")
+            response = entry.get("response", "")
+            haystack = f"{prompt}\n{response}".lower()
+            score = sum(haystack.count(term) for term in terms) if terms else 1
+            if score:
+                scored.append((-score, position, entry))
+        scored.sort(key=lambda item: (item[0], item[1]))
+        
+        results = []
+        for neg_score, _, entry in scored[offset:offset + limit]:
+            text = f"{entry.get('prompt', '')}\n{entry.get('response', '')}"
+            hit = text.lower().find(terms[0]) if terms else 0
+            start = max(hit - 60, 0)
+            results.append(dict(entry, snippet=text[start:start + 120], rank=float(neg_score)))
+        return results
+    
     def filter_by_model(self, model: str) -> List[Dict]:
         """Modele göre filtrele"""
-        return [entry for entry in self.history if entry.get("model") == model]
+        if self._db:
+            return self._db.filter_by_model(model)
+        return [entry for entry in self._entries.values() if entry.get("model") == model]
     
     def filter_by_date(self, start_date: str = None, end_date: str = None) -> List[Dict]:
         """Tarihe göre filtrele"""
+        if self._db:
+            return self._db.filter_by_date(start_date, end_date)
+        
         results = []
         
-        for entry in self.history:
+        for entry in self._entries.values():
             timestamp = entry.get("timestamp", "")
             if not timestamp:
                 continue
@@ -100,21 +243,57 @@ class HistoryManager:
     
     def delete_entry(self, entry_id: str) -> bool:
         """Kayıt sil"""
-        for i, entry in enumerate(self.history):
-            if entry.get("id") == entry_id:
-                del self.history[i]
-                self._save_history()
-                return True
-        return False
+        if self._db:
+            return self._db.delete_many([entry_id]) > 0
+        
+        with self._journal.lock:
+            if self._entries.pop(entry_id, None) is None:
+                return False
+            try:
+                self._journal.append_delete(entry_id)
+            except Exception as e:
+                print(f"Geçmiş kaydetme hatası: {e}")
+        self._after_write()
+        return True
+    
+    def delete_entries(self, entry_ids: List[str]) -> int:
+        """Birden fazla kaydı tek yazma ile sil, silinen sayısını döndür"""
+        if self._db:
+            return self._db.delete_many(list(entry_ids))
+        
+        with self._journal.lock:
+            to_delete = {entry_id for entry_id in entry_ids if entry_id in self._entries}
+            if not to_delete:
+                return 0
+            for entry_id in to_delete:
+                del self._entries[entry_id]
+            try:
+                self._journal.append_delete_many(sorted(to_delete))
+            except Exception as e:
+                print(f"Geçmiş kaydetme hatası: {e}")
+        self._after_write()
+        return len(to_delete)
     
     def clear_history(self):
         """Tüm geçmişi temizle"""
-        self.history = []
-        self._save_history()
+        if self._db:
+            self._db.clear()
+            return
+        
+        with self._journal.lock:
+            self._entries = {}
+            try:
+                self._journal.append_clear()
+            except Exception as e:
+                print(f"Geçmiş kaydetme hatası: {e}")
+        self.compact()
     
     def get_statistics(self) -> Dict:
         """İstatistikler"""
-        if not self.history:
+        if self._db:
+            return self._db.get_statistics()
+        
+        if not self._entries:
             return {
                 "total_entries": 0,
                 "models_used": [],
@@ -124,12 +303,12 @@ class HistoryManager:
         models = set()
         total_files = 0
         
-        for entry in self.history:
+        for entry in self._entries.values():
             models.add(entry.get("model", "Unknown"))
             total_files += len(entry.get("files", []))
         
         return {
-            "total_entries": len(self.history),
+            "total_entries": len(self._entries),
             "models_used": list(models),
             "total_files": total_files
         }
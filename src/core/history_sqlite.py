@@ -0,0 +1,306 @@
+"""
+Geçmiş için SQLite deposu - model/tarih indeksleri, FTS5 tam metin ve trigram alt dize arama
+"""
+import json
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+
+class SQLiteHistoryStore:
+    """SQLite tabanlı geçmiş deposu"""
+    
+    def __init__(self, db_file: Path):
+        self.db_file = Path(db_file)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+    
+    def _create_schema(self):
+        """Tabloları ve indeksleri oluştur"""
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id TEXT NOT NULL UNIQUE,
+                    timestamp TEXT,
+                    model TEXT,
+                    data TEXT NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_model ON entries(model)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_timestamp ON entries(timestamp)")
+            # Tek seferlik işlemlerin işaretleri (ör. JSON geçmişinin içe aktarılması)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            try:
+                self._conn.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+                        prompt, response, web_text,
+                        tokenize = 'unicode61 remove_diacritics 2'
+                    )
+                """)
+                self.fts_available = True
+            except sqlite3.OperationalError as e:
+                # SQLite FTS5 olmadan derlenmiş olabilir
+                print(f"FTS5 kullanılamıyor, LIKE aramasına dönülüyor: {e}")
+                self.fts_available = False
+            self.substring_index = False
+            if self.fts_available:
+                self._create_substring_index()
+    
+    def _create_substring_index(self):
+        """search() için trigram indeksi (JSON deposundaki alt dize aramasıyla aynı sonuç)
+        
+        Trigram tokenizer SQLite 3.34+ gerektirir; yoksa search() tarama yapar.
+        Tablo yeni oluşturulduysa mevcut kayıtlar bir kez doldurulur.
+        """
+        try:
+            self._conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS entries_substr USING fts5(
+                    prompt, response, tokenize = 'trigram'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            print(f"Trigram indeksi kullanılamıyor, arama tarama ile yapılacak: {e}")
+            return
+        self.substring_index = True
+        if self._conn.execute("SELECT 1 FROM entries_substr LIMIT 1").fetchone() is None:
+            self._conn.execute("""
+                INSERT INTO entries_substr (rowid, prompt, response)
+                SELECT seq, COALESCE(json_extract(data, '$.prompt'), ''),
+                       COALESCE(json_extract(data, '$.response'), '')
+                FROM entries
+            """)
+    
+    @staticmethod
+    def _web_text(entry: Dict) -> str:
+        """Web sonuçlarının aranabilir metni"""
+        parts = []
+        for result in entry.get("web_search_results") or []:
+            parts.append(result.get("title", ""))
+            parts.append(result.get("snippet", ""))
+        return "\n".join(parts)
+    
+    @staticmethod
+    def _fts_query(query: str) -> str:
+        """Kullanıcı sorgusunu güvenli bir FTS5 önek sorgusuna çevir"""
+        tokens = re.findall(r"\w+", query, re.UNICODE)
+        return " ".join(f'"{token}"*' for token in tokens)
+    
+    def get_meta(self, key: str) -> Optional[str]:
+        """Meta değeri (yoksa None)"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def set_meta(self, key: str, value: str):
+        """Meta değeri yaz"""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+    
+    def is_empty(self) -> bool:
+        """Depoda kayıt yok mu"""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM entries LIMIT 1").fetchone()
+        return row is None
+    
+    def add(self, entry: Dict):
+        """Kayıt ekle"""
+        self.add_many([entry])
+    
+    def add_many(self, entries: List[Dict]):
+        """Birden fazla kaydı tek transaction'da ekle"""
+        with self._lock, self._conn:
+            for entry in entries:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO entries (id, timestamp, model, data) VALUES (?, ?, ?, ?)",
+                    (entry.get("id"), entry.get("timestamp", ""), entry.get("model", ""),
+                     json.dumps(entry, ensure_ascii=False))
+                )
+                if self.fts_available and cursor.rowcount:
+                    self._conn.execute(
+                        "INSERT INTO entries_fts (rowid, prompt, response, web_text) VALUES (?, ?, ?, ?)",
+                        (cursor.lastrowid, entry.get("prompt", ""), entry.get("response", ""),
+                         self._web_text(entry))
+                    )
+                if self.substring_index and cursor.rowcount:
+                    self._conn.execute(
+                        "INSERT INTO entries_substr (rowid, prompt, response) VALUES (?, ?, ?)",
+                        (cursor.lastrowid, entry.get("prompt", ""), entry.get("response", ""))
+                    )
+    
+    def delete_many(self, entry_ids: List[str]) -> int:
+        """Kayıtları sil, silinen sayısını döndür"""
+        deleted = 0
+        with self._lock, self._conn:
+            for entry_id in entry_ids:
+                row = self._conn.execute("SELECT seq FROM entries WHERE id = ?", (entry_id,)).fetchone()
+                if row is None:
+                    continue
+                self._conn.execute("DELETE FROM entries WHERE seq = ?", (row["seq"],))
+                if self.fts_available:
+                    self._conn.execute("DELETE FROM entries_fts WHERE rowid = ?", (row["seq"],))
+                if self.substring_index:
+                    self._conn.execute("DELETE FROM entries_substr WHERE rowid = ?", (row["seq"],))
+                deleted += 1
+        return deleted
+    
+    def clear(self):
+        """Tüm kayıtları sil"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+            if self.fts_available:
+                self._conn.execute("DELETE FROM entries_fts")
+            if self.substring_index:
+                self._conn.execute("DELETE FROM entries_substr")
+    
+    def _rows(self, sql: str, params: tuple = ()) -> List[Dict]:
+        """Sorgu sonucunu kayıt listesine çevir"""
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+    
+    def get(self, entry_id: str) -> Optional[Dict]:
+        """Id ile kayıt al"""
+        rows = self._rows("SELECT data FROM entries WHERE id = ?", (entry_id,))
+        return rows[0] if rows else None
+    
+    def get_many(self, entry_ids: List[str]) -> List[Dict]:
+        """Id listesindeki kayıtları (verilen sırayla) al"""
+        found = {}
+        for start in range(0, len(entry_ids), 500):
+            chunk = entry_ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for entry in self._rows(f"SELECT data FROM entries WHERE id IN ({placeholders})", tuple(chunk)):
+                found[entry.get("id")] = entry
+        return [found[entry_id] for entry_id in entry_ids if entry_id in found]
+    
+    def all_ids(self) -> List[str]:
+        """Tüm kayıt id'leri"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT id FROM entries").fetchall()]
+    
+    def exists(self, entry_id: str) -> bool:
+        """Id kayıtlı mı"""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM entries WHERE id = ?", (entry_id,)).fetchone() is not None
+    
+    def last(self) -> Optional[Dict]:
+        """Son eklenen kayıt"""
+        rows = self._rows("SELECT data FROM entries ORDER BY seq DESC LIMIT 1")
+        return rows[0] if rows else None
+    
+    def all(self) -> List[Dict]:
+        """Tüm kayıtlar (ekleme sırasıyla)"""
+        return self._rows("SELECT data FROM entries ORDER BY seq")
+    
+    def iter_all(self, batch_size: int = 500) -> Iterator[Dict]:
+        """Tüm kayıtlar (ekleme sırasıyla), parti parti okunur"""
+        last_seq = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT seq, data FROM entries WHERE seq > ? ORDER BY seq LIMIT ?", (last_seq, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_seq = rows[-1]["seq"]
+            for row in rows:
+                yield json.loads(row["data"])
+    
+    def count(self) -> int:
+        """Kayıt sayısı"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+    
+    def search(self, query: str) -> List[Dict]:
+        """Prompt/yanıt içinde büyük/küçük harf duyarsız alt dize ara (ekleme sırasıyla)
+        
+        JSON deposuyla aynı sonucu verir ("ython" "Python"u bulur). En az 3
+        karakterlik sorgularda aday kayıtlar trigram indeksinden gelir;
+        kısa sorgular ve indeks yoksa tüm kayıtlar taranır.
+        """
+        if not query:
+            return self.all()
+        if self.substring_index and len(query) >= 3:
+            phrase = '"' + query.replace('"', '""') + '"'
+            candidates = self._rows(
+                "SELECT e.data FROM entries_substr s JOIN entries e ON e.seq = s.rowid "
+                "WHERE entries_substr MATCH ? ORDER BY e.seq",
+                (f"{{prompt response}} : {phrase}",)
+            )
+        else:
+            candidates = self.all()
+        # Trigram eşleşmesi SQLite'ın harf katlamasıyla yapılır; kesin kontrol Python'da
+        query_lower = query.lower()
+        return [entry for entry in candidates
+                if query_lower in entry.get("prompt", "").lower()
+                or query_lower in entry.get("response", "").lower()]
+    
+    def search_ranked(self, query: str, limit: int = 20, offset: int = 0) -> List[Dict]:
+        """Alaka sırasına göre ara; her sonuca 'snippet' ve 'rank' ekler"""
+        fts_query = self._fts_query(query) if self.fts_available else ""
+        if not fts_query:
+            results = self.search(query)[offset:offset + limit]
+            return [dict(entry, snippet=entry.get("prompt", "")[:120], rank=0.0) for entry in results]
+        
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT e.data, bm25(entries_fts, 2.0, 1.0, 0.5) AS rank, "
+                "snippet(entries_fts, -1, '[', ']', '…', 12) AS snippet "
+                "FROM entries_fts f JOIN entries e ON e.seq = f.rowid "
+                "WHERE entries_fts MATCH ? ORDER BY rank LIMIT ? OFFSET ?",
+                (fts_query, limit, offset)
+            ).fetchall()
+        
+        results = []
+        for row in rows:
+            entry = json.loads(row["data"])
+            entry["snippet"] = row["snippet"]
+            entry["rank"] = row["rank"]
+            results.append(entry)
+        return results
+    
+    def filter_by_model(self, model: str) -> List[Dict]:
+        """Modele göre filtrele (indeksli)"""
+        return self._rows("SELECT data FROM entries WHERE model = ? ORDER BY seq", (model,))
+    
+    def filter_by_date(self, start_date: str = None, end_date: str = None) -> List[Dict]:
+        """Tarihe göre filtrele (indeksli)"""
+        clauses = ["timestamp IS NOT NULL", "timestamp != ''"]
+        params = []
+        if start_date:
+            clauses.append("timestamp >= ?")
+            params.append(start_date)
+        if end_date:
+            clauses.append("timestamp <= ?")
+            params.append(end_date)
+        return self._rows(
+            f"SELECT data FROM entries WHERE {' AND '.join(clauses)} ORDER BY seq",
+            tuple(params)
+        )
+    
+    def get_statistics(self) -> Dict:
+        """İstatistikler"""
+        with self._lock:
+            total = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            models = [row[0] or "Unknown" for row in
+                      self._conn.execute("SELECT DISTINCT model FROM entries").fetchall()]
+            total_files = self._conn.execute(
+                "SELECT COALESCE(SUM(json_array_length(json_extract(data, '$.files'))), 0) FROM entries"
+            ).fetchone()[0]
+        return {
+            "total_entries": total,
+            "models_used": models if total else [],
+            "total_files": total_files
+        }
+    
+    def close(self):
+        """Bağlantıyı kapat"""
+        with self._lock:
+            self._conn.close()
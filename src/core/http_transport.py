@@ -0,0 +1,141 @@
+"""
+HTTP taşıma katmanı - Havuzlu, keep-alive destekli requests oturumu
+"""
+import threading
+from typing import Optional, Dict, Any
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..utils.constants import (HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE,
+                               HTTP_POOL_BLOCK)
+
+
+class _CountingAdapter(HTTPAdapter):
+    """Gönderilen istekleri host bazında sayan adapter"""
+    
+    def __init__(self, transport: "PooledTransport", **kwargs):
+        self._transport = transport
+        super().__init__(**kwargs)
+    
+    def send(self, request, **kwargs):
+        self._transport._record_request(request.url)
+        return super().send(request, **kwargs)
+
+
+class PooledTransport:
+    """
+    Tek bir requests.Session üzerinden bağlantı havuzu yönetir.
+    
+    pool_connections: önbellekte tutulacak host havuzu sayısı
+    pool_maxsize: host başına açık tutulacak en fazla bağlantı
+    pool_block: True ise host limiti dolduğunda yeni bağlantı açmak yerine bekler
+    """
+    
+    def __init__(self, pool_connections: int = HTTP_POOL_CONNECTIONS,
+                 pool_maxsize: int = HTTP_POOL_MAXSIZE,
+                 pool_block: bool = HTTP_POOL_BLOCK,
+                 headers: Optional[Dict[str, str]] = None):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self._lock = threading.Lock()
+        self._requests_by_host: Dict[str, int] = {}
+        self._closed_connections = 0
+        self._closed_requests = 0
+        
+        self.session = requests.Session()
+        self.session.headers.update({"Connection": "keep-alive"})
+        if headers:
+            self.session.headers.update(headers)
+        
+        self.adapter = _CountingAdapter(
+            self,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+    
+    def _record_request(self, url: str):
+        """İstek sayacını güncelle"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            self._requests_by_host[host] = self._requests_by_host.get(host, 0) + 1
+    
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Havuzlu oturum üzerinden istek yap"""
+        return self.session.request(method, url, **kwargs)
+    
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET isteği"""
+        return self.request("GET", url, **kwargs)
+    
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """POST isteği"""
+        return self.request("POST", url, **kwargs)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Bağlantı yeniden kullanım istatistikleri"""
+        hosts = {}
+        pool_manager = self.adapter.poolmanager
+        if pool_manager is not None:
+            for key in list(pool_manager.pools.keys()):
+                pool = pool_manager.pools.get(key)
+                if pool is None:
+                    continue
+                opened = getattr(pool, "num_connections", 0)
+                served = getattr(pool, "num_requests", 0)
+                host = f"{pool.host}:{pool.port}" if pool.port else pool.host
+                hosts[host] = {
+                    "connections_opened": opened,
+                    "requests": served,
+                    "reused": max(served - opened, 0),
+                    "idle": pool.pool.qsize() if pool.pool is not None else 0,
+                }
+        
+        with self._lock:
+            total_requests = sum(self._requests_by_host.values())
+            requests_by_host = dict(self._requests_by_host)
+            closed_connections = self._closed_connections
+            closed_requests = self._closed_requests
+        
+        opened = closed_connections + sum(h["connections_opened"] for h in hosts.values())
+        served = closed_requests + sum(h["requests"] for h in hosts.values())
+        reused = max(served - opened, 0)
+        
+        return {
+            "pool_connections": self.pool_connections,
+            "pool_maxsize": self.pool_maxsize,
+            "pool_block": self.pool_block,
+            "total_requests": total_requests,
+            "connections_opened": opened,
+            "connections_reused": reused,
+            "reuse_ratio": (reused / served) if served else 0.0,
+            "requests_by_host": requests_by_host,
+            "hosts": hosts,
+        }
+    
+    def reset_stats(self):
+        """İstatistikleri sıfırla (açık havuzlar korunur)"""
+        with self._lock:
+            self._requests_by_host = {}
+            self._closed_connections = 0
+            self._closed_requests = 0
+        pool_manager = self.adapter.poolmanager
+        if pool_manager is not None:
+            for key in list(pool_manager.pools.keys()):
+                pool = pool_manager.pools.get(key)
+                if pool is not None:
+                    pool.num_connections = 0
+                    pool.num_requests = 0
+    
+    def close(self):
+        """Oturumu ve havuzdaki bağlantıları kapat"""
+        stats = self.get_stats()
+        with self._lock:
+            self._closed_connections = stats["connections_opened"]
+            self._closed_requests = stats["connections_opened"] + stats["connections_reused"]
+        self.session.close()
@@ -0,0 +1,191 @@
+"""
+Markdown render - Model yanıtlarını tek geçişte Qt uyumlu HTML'e çeviren renderer (sohbet ve export)
+"""
+import html
+import re
+from typing import List, Optional
+
+from .syntax_highlighter import SyntaxHighlighter
+
+# Blok düzeyi satır kalıpları
+_FENCE = re.compile(r"^\s{0,3}(`{3,}|~{3,})\s*([\w+#.-]*)[^\n]*$")
+_HEADING = re.compile(r"^\s{0,3}(#{1,6})\s+(.*?)\s*#*\s*$")
+_RULE = re.compile(r"^\s{0,3}([-*_])(?:\s*\1){2,}\s*$")
+_BULLET = re.compile(r"^(\s*)[-*+]\s+(.*)$")
+_ORDERED = re.compile(r"^(\s*)(\d{1,9})[.)]\s+(.*)$")
+_QUOTE = re.compile(r"^\s{0,3}>\s?(.*)$")
+
+# Satır içi belirteçler: tek bir alternasyon, metin soldan sağa bir kez taranır.
+# Kalın/italik/bağlantı metni kendi içinde yeniden (yalnızca o parça) işlenir.
+# Bağlantı metni iç içe "[" içermez ve URL uzunluğu sınırlıdır: kapanmayan çok
+# sayıda "[" / "[x](" içeren satırlarda her deneme satır sonuna kadar taramasın.
+# Vurgu ve kod gövdeleri kendi ayraç dizisini (ör. "**") içeremez ve gövdedeki
+# alternatifler ayrıktır: dengesiz "*" / "**" / "`" içeren metinde her deneme bir
+# sonraki ayraçta durur, geri izleme üstel (ya da satır boyu) büyümez.
+_INLINE = re.compile(r"""
+    (?P<code_ticks>`+)(?P<code>(?:[^`\n]|(?!(?P=code_ticks))`+)+?)(?P=code_ticks)(?!`)
+  | \*\*\*(?P<strong_em>(?![\s*])(?:[^*\n]|\*{1,2}(?!\*))+?)(?<![\s*])\*\*\*
+  | (?<![\w_])___(?P<strong_em_u>(?![\s_])(?:[^_\n]|_{1,2}(?!_))+?)(?<![\s_])___(?![\w_])
+  | \*\*(?P<strong>(?!\s)(?:[^*\n]|\*(?!\*))+?)(?<!\s)\*\*
+  | (?<![\w_])__(?P<strong_u>(?!\s)(?:[^_\n]|_(?!_))+?)(?<!\s)__(?![\w_])
+  | \*(?P<em>(?![\s*])(?:\*\*(?![\s*])[^*\n]+(?<!\s)\*\*|[^*\n])+?)(?<!\s)\*
+  | (?<![\w_])_(?P<em_u>(?![\s_])[^_\n]+?)(?<!\s)_(?![\w_])
+  | \[(?P<link_text>[^\[\]\n]{1,1024})\]\((?P<link_url>[^)\s]{1,2048})\)
+  | (?P<url>https?://[^\s<>()\[\]]{0,2047}[^\s<>()\[\].,;:!?'"])
+""", re.VERBOSE)
+
+
+class MarkdownRenderer:
+    """
+    Markdown -> HTML (QTextDocument'in desteklediği alt küme).
+    
+    Bloklar (kod bloğu, başlık, liste, alıntı, çizgi, paragraf) satırlar
+    üzerinde tek geçişte, satır içi biçimler derlenmiş tek bir desenle
+    belirlenir; metin her adımda baştan kopyalanmaz. Düz metin HTML'e
+    kaçışlanır. Kod blokları SyntaxHighlighter ile renklendirilir.
+    """
+    
+    CODE_BLOCK_STYLE = "background-color: #f4f4f4; padding: 10px; border-radius: 5px; margin: 5px 0;"
+    INLINE_CODE_STYLE = "background-color: #f0f0f0; padding: 2px 4px; border-radius: 3px;"
+    QUOTE_STYLE = "color: #555; margin: 4px 0 4px 12px;"
+    
+    def __init__(self, highlighter: Optional[SyntaxHighlighter] = None):
+        self.highlighter = highlighter or SyntaxHighlighter()
+    
+    # --- Satır içi ---
+    
+    def render_inline(self, text: str) -> str:
+        """Satır içi biçimleri (kod, kalın, italik, bağlantı) HTML'e çevir"""
+        parts = []
+        position = 0
+        for match in _INLINE.finditer(text):
+            parts.append(html.escape(text[position:match.start()], quote=False))
+            position = match.end()
+            kind = match.lastgroup
+            if kind == "code":
+                parts.append(f'<code style="{self.INLINE_CODE_STYLE}">'
+                             f'{html.escape(match.group("code").strip(), quote=False)}</code>')
+            elif kind in ("strong_em", "strong_em_u"):
+                parts.append(f"<b><i>{self.render_inline(match.group(kind))}</i></b>")
+            elif kind in ("strong", "strong_u"):
+                parts.append(f"<b>{self.render_inline(match.group(kind))}</b>")
+            elif kind in ("em", "em_u"):
+                parts.append(f"<i>{self.render_inline(match.group(kind))}</i>")
+            elif kind == "link_url":
+                url = html.escape(match.group("link_url"))
+                parts.append(f'<a href="{url}">{self.render_inline(match.group("link_text"))}</a>')
+            elif kind == "url":
+                url = html.escape(match.group("url"))
+                parts.append(f'<a href="{url}">{url}</a>')
+        parts.append(html.escape(text[position:], quote=False))
+        return "".join(parts)
+    
+    # --- Bloklar ---
+    
+    def _code_block(self, code: str, language: str, pending: Optional[List]) -> str:
+        if pending is None:
+            highlighted = self.highlighter.highlight(code, language)
+        else:
+            highlighted, future = self.highlighter.highlight_async(code, language)
+            if future is not None:
+                pending.append(future)
+        return f'<div style="{self.CODE_BLOCK_STYLE}"><pre style="margin: 0;">{highlighted}</pre></div>'
+    
+    def render(self, text: str, pending: Optional[List] = None) -> str:
+        """Markdown metnini HTML'e çevir
+        
+        pending verilirse önbellekte olmayan kod blokları arka planda
+        renklendirilir, yerlerine düz metin konur ve işleri pending'e eklenir;
+        verilmezse renklendirme senkron yapılır (export).
+        """
+        out: List[str] = []
+        paragraph: List[str] = []
+        # Açık listeler: (etiket, girinti)
+        lists: List[tuple] = []
+        lines = text.split("\n")
+        i = 0
+        
+        def flush_paragraph():
+            if paragraph:
+                out.append("<p>" + "<br>".join(self.render_inline(line) for line in paragraph) + "</p>")
+                paragraph.clear()
+        
+        def close_lists(indent: int = -1):
+            while lists and lists[-1][1] > indent:
+                out.append(f"</{lists.pop()[0]}>")
+        
+        while i < len(lines):
+            line = lines[i]
+            
+            fence = _FENCE.match(line)
+            if fence:
+                flush_paragraph()
+                close_lists()
+                marker = fence.group(1)
+                end = i + 1
+                while end < len(lines) and not lines[end].strip().startswith(marker):
+                    end += 1
+                out.append(self._code_block("\n".join(lines[i + 1:end]), fence.group(2), pending))
+                i = end + 1
+                continue
+            
+            if not line.strip():
+                flush_paragraph()
+                close_lists()
+                i += 1
+                continue
+            
+            heading = _HEADING.match(line)
+            if heading:
+                flush_paragraph()
+                close_lists()
+                level = len(heading.group(1))
+                out.append(f"<h{level}>{self.render_inline(heading.group(2))}</h{level}>")
+                i += 1
+                continue
+            
+            if _RULE.match(line):
+                flush_paragraph()
+                close_lists()
+                out.append("<hr>")
+                i += 1
+                continue
+            
+            quote = _QUOTE.match(line)
+            if quote:
+                flush_paragraph()
+                close_lists()
+                quoted = []
+                while i < len(lines) and _QUOTE.match(lines[i]):
+                    quoted.append(_QUOTE.match(lines[i]).group(1))
+                    i += 1
+                out.append(f'<blockquote style="{self.QUOTE_STYLE}">{self.render(chr(10).join(quoted), pending)}'
+                           f'</blockquote>')
+                continue
+            
+            item = _BULLET.match(line) or _ORDERED.match(line)
+            if item:
+                flush_paragraph()
+                tag = "ul" if item.re is _BULLET else "ol"
+                indent = len(item.group(1).expandtabs(4))
+                close_lists(indent)
+                if not lists or lists[-1][1] < indent or lists[-1][0] != tag:
+                    if lists and lists[-1][1] == indent:
+                        out.append(f"</{lists.pop()[0]}>")
+                    start = item.group(2) if tag == "ol" and item.group(2) != "1" else None
+                    out.append(f'<{tag} start="{start}">' if start else f"<{tag}>")
+                    lists.append((tag, indent))
+                out.append(f"<li>{self.render_inline(item.group(item.re.groups))}</li>")
+                i += 1
+                continue
+            
+            if lists and out[-1].endswith("</li>"):
+                # Liste öğesinin devam satırı
+                out[-1] = out[-1][:-len("</li>")] + "<br>" + self.render_inline(line.strip()) + "</li>"
+            else:
+                paragraph.append(line)
+            i += 1
+        
+        flush_paragraph()
+        close_lists()
+        return "".join(out)
@@ -0,0 +1,238 @@
+"""
+Model kataloğu - Hub yanıtlarından beslenen yerel SQLite model dizini (çevrimdışı arama)
+"""
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ..utils.constants import MODEL_CATALOG_TTL, MODEL_SEARCH_TTL
+
+
+class ModelCatalog:
+    """
+    Hub'dan görülen modelleri yerelde saklar.
+    
+    Arama sonuçları ve model bilgileri ETag'leriyle birlikte tutulur; TTL
+    dolana kadar Hub'a gidilmez, sonrasında If-None-Match ile yeniden
+    doğrulanır. search() tamamen yereldir ve ağ olmadan da çalışır.
+    """
+    
+    def __init__(self, db_file: str = "data/cache/models.db",
+                 info_ttl: float = MODEL_CATALOG_TTL, search_ttl: float = MODEL_SEARCH_TTL):
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.info_ttl = info_ttl
+        self.search_ttl = search_ttl
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+    
+    def _create_schema(self):
+        """Tabloları ve indeksleri oluştur"""
+        with self._lock, self._conn:
+            # data: Hub'dan gelen son model JSON'u; info_* alanları tam model bilgisi içindir
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS models (
+                    id TEXT PRIMARY KEY,
+                    id_lower TEXT NOT NULL,
+                    name_lower TEXT NOT NULL,
+                    tags TEXT NOT NULL DEFAULT '',
+                    pipeline_tag TEXT,
+                    downloads INTEGER NOT NULL DEFAULT 0,
+                    likes INTEGER NOT NULL DEFAULT 0,
+                    data TEXT NOT NULL,
+                    seen_at REAL NOT NULL,
+                    info_etag TEXT,
+                    info_fetched_at REAL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_models_id_lower ON models(id_lower)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_models_name_lower ON models(name_lower)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_models_downloads ON models(downloads DESC)")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS searches (
+                    query TEXT PRIMARY KEY,
+                    ids TEXT NOT NULL,
+                    etag TEXT,
+                    fetched_at REAL NOT NULL
+                )
+            """)
+    
+    @staticmethod
+    def _normalize(query: str) -> str:
+        return " ".join(query.lower().split())
+    
+    @staticmethod
+    def _escape_like(text: str) -> str:
+        return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    
+    def _upsert(self, model: Dict, info_etag: Optional[str] = None, full_info: bool = False):
+        """Modeli ekle/güncelle (kilit ve transaction altında çağrılır)"""
+        model_id = model.get("id") or model.get("modelId")
+        if not model_id:
+            return
+        tags = " ".join(str(tag).lower() for tag in model.get("tags") or [])
+        now = time.time()
+        values = (
+            model_id, model_id.lower(), model_id.rsplit("/", 1)[-1].lower(), tags,
+            model.get("pipeline_tag"), int(model.get("downloads") or 0), int(model.get("likes") or 0),
+            json.dumps(model, ensure_ascii=False), now,
+        )
+        if full_info:
+            self._conn.execute("""
+                INSERT INTO models (id, id_lower, name_lower, tags, pipeline_tag, downloads, likes, data,
+                                    seen_at, info_etag, info_fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    tags = excluded.tags, pipeline_tag = excluded.pipeline_tag,
+                    downloads = excluded.downloads, likes = excluded.likes, data = excluded.data,
+                    seen_at = excluded.seen_at, info_etag = excluded.info_etag,
+                    info_fetched_at = excluded.info_fetched_at
+            """, values + (info_etag, now))
+        else:
+            # Arama sonucu özet bilgidir; varsa tam bilgiyi (data) ezmez
+            self._conn.execute("""
+                INSERT INTO models (id, id_lower, name_lower, tags, pipeline_tag, downloads, likes, data, seen_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    tags = CASE WHEN excluded.tags != '' THEN excluded.tags ELSE models.tags END,
+                    pipeline_tag = COALESCE(excluded.pipeline_tag, models.pipeline_tag),
+                    downloads = excluded.downloads, likes = excluded.likes, seen_at = excluded.seen_at,
+                    data = CASE WHEN models.info_fetched_at IS NULL THEN excluded.data ELSE models.data END
+            """, values)
+    
+    # --- Model bilgisi ---
+    
+    def get_info(self, model_id: str) -> Tuple[Optional[Dict], bool, Optional[str]]:
+        """(tam bilgi, taze mi, etag); tam bilgi hiç alınmadıysa (None, False, None)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, info_etag, info_fetched_at FROM models WHERE id = ?", (model_id,)
+            ).fetchone()
+        if row is None or row["info_fetched_at"] is None:
+            return None, False, None
+        fresh = time.time() - row["info_fetched_at"] < self.info_ttl
+        return json.loads(row["data"]), fresh, row["info_etag"]
+    
+    def put_info(self, info: Dict, etag: Optional[str] = None):
+        """Hub'dan gelen tam model bilgisini kaydet"""
+        with self._lock, self._conn:
+            self._upsert(info, info_etag=etag, full_info=True)
+    
+    def touch_info(self, model_id: str):
+        """304 sonrası: bilgi değişmedi, tazelik süresini yenile"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE models SET info_fetched_at = ? WHERE id = ?", (time.time(), model_id))
+    
+    # --- Hub araması ---
+    
+    def get_search(self, query: str) -> Tuple[Optional[List[Dict]], bool, Optional[str]]:
+        """(önbellekteki Hub arama sonucu, taze mi, etag)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ids, etag, fetched_at FROM searches WHERE query = ?", (self._normalize(query),)
+            ).fetchone()
+            if row is None:
+                return None, False, None
+            ids = json.loads(row["ids"])
+            models = self._models_by_ids(ids)
+        fresh = time.time() - row["fetched_at"] < self.search_ttl
+        return models, fresh, row["etag"]
+    
+    def put_search(self, query: str, models: List[Dict], etag: Optional[str] = None):
+        """Hub arama sonucunu ve içindeki modelleri kaydet"""
+        ids = [model.get("id") or model.get("modelId") for model in models]
+        with self._lock, self._conn:
+            for model in models:
+                self._upsert(model)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO searches (query, ids, etag, fetched_at) VALUES (?, ?, ?, ?)",
+                (self._normalize(query), json.dumps([i for i in ids if i]), etag, time.time())
+            )
+    
+    def touch_search(self, query: str):
+        """304 sonrası: arama sonucu değişmedi, tazelik süresini yenile"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE searches SET fetched_at = ? WHERE query = ?",
+                               (time.time(), self._normalize(query)))
+    
+    def _models_by_ids(self, ids: List[str]) -> List[Dict]:
+        """Id listesindeki modeller (verilen sırayla)"""
+        if not ids:
+            return []
+        placeholders = ",".join("?" * len(ids))
+        rows = self._conn.execute(f"SELECT id, data FROM models WHERE id IN ({placeholders})", ids).fetchall()
+        by_id = {row["id"]: json.loads(row["data"]) for row in rows}
+        return [by_id[model_id] for model_id in ids if model_id in by_id]
+    
+    # --- Yerel arama ---
+    
+    def search(self, query: str, limit: int = 50) -> List[Dict]:
+        """Yerel arama: önek > alt dize > etiket eşleşmesi, sonra indirme sayısı
+        
+        Sorgudaki her kelime model id'sinde veya etiketlerinde geçmelidir.
+        "tag:xxx" biçimindeki kelimeler yalnızca etiketlerde aranır.
+        Dönen kayıtlar: {"id", "pipeline_tag", "downloads", "likes", "tags"}
+        """
+        terms = self._normalize(query).split()
+        if not terms:
+            return []
+        
+        conditions = []
+        params: List = []
+        for term in terms:
+            if term.startswith("tag:") and len(term) > 4:
+                conditions.append("(' ' || tags || ' ') LIKE ? ESCAPE '\\'")
+                params.append(f"% {self._escape_like(term[4:])} %")
+            else:
+                pattern = f"%{self._escape_like(term)}%"
+                conditions.append("(id_lower LIKE ? ESCAPE '\\' OR tags LIKE ? ESCAPE '\\')")
+                params.extend([pattern, pattern])
+        
+        first = next((term for term in terms if not term.startswith("tag:")), "")
+        prefix = f"{self._escape_like(first)}%"
+        substring = f"%{self._escape_like(first)}%"
+        sql = f"""
+            SELECT id, pipeline_tag, downloads, likes, tags,
+                   CASE
+                       WHEN ? = '' THEN 2
+                       WHEN name_lower LIKE ? ESCAPE '\\' OR id_lower LIKE ? ESCAPE '\\' THEN 0
+                       WHEN id_lower LIKE ? ESCAPE '\\' THEN 1
+                       ELSE 2
+                   END AS rank
+            FROM models
+            WHERE {" AND ".join(conditions)}
+            ORDER BY rank, downloads DESC, id
+            LIMIT ?
+        """
+        with self._lock:
+            rows = self._conn.execute(sql, [first, prefix, prefix, substring] + params + [limit]).fetchall()
+        return [{
+            "id": row["id"],
+            "pipeline_tag": row["pipeline_tag"],
+            "downloads": row["downloads"],
+            "likes": row["likes"],
+            "tags": row["tags"].split() if row["tags"] else [],
+        } for row in rows]
+    
+    def count(self) -> int:
+        """Katalogdaki model sayısı"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM models").fetchone()[0]
+    
+    def clear(self):
+        """Kataloğu temizle"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM models")
+            self._conn.execute("DELETE FROM searches")
+    
+    def close(self):
+        """Bağlantıyı kapat"""
+        with self._lock:
+            self._conn.close()
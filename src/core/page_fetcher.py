@@ -0,0 +1,339 @@
+"""
+Sayfa getirme - Web arama sonuçlarının sayfalarını indirip düz metne çevirir
+"""
+import hashlib
+import ipaddress
+import json
+import os
+import re
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlsplit
+
+from .http_transport import PooledTransport
+from ..utils.constants import (PAGE_FETCH_MAX_BYTES, PAGE_FETCH_MAX_CHARS, PAGE_FETCH_MAX_WORKERS,
+                               PAGE_FETCH_MAX_REDIRECTS, PAGE_FETCH_TIMEOUT, PAGE_CACHE_TTL)
+
+# Metin çıkarılabilen içerik türleri
+TEXT_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+USER_AGENT = "Mozilla/5.0 (compatible; TinleraResearchTool/1.0)"
+
+
+class _HTMLTextExtractor(HTMLParser):
+    """HTML'den görünür metni ve başlığı çıkaran basit ayrıştırıcı"""
+    
+    SKIP_TAGS = {"script", "style", "noscript", "svg", "template", "iframe", "nav", "footer", "header",
+                 "form", "button", "select"}
+    BLOCK_TAGS = {"p", "div", "br", "li", "ul", "ol", "section", "article", "main", "h1", "h2", "h3",
+                  "h4", "h5", "h6", "tr", "table", "pre", "blockquote", "dd", "dt", "hr"}
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.title = ""
+        self._skip_depth = 0
+        self._in_title = False
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+    
+    def handle_startendtag(self, tag, attrs):
+        if tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+    
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif tag == "title":
+            self._in_title = False
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+    
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip_depth:
+            self.parts.append(data)
+    
+    def text(self) -> str:
+        lines = (re.sub(r"[ \t\r\f\v]+", " ", line).strip() for line in "".join(self.parts).split("\n"))
+        return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def html_to_text(html: str) -> Dict[str, str]:
+    """HTML'i (başlık, düz metin) sözlüğüne çevir"""
+    parser = _HTMLTextExtractor()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception as e:
+        print(f"HTML ayrıştırma hatası: {e}")
+    return {"title": re.sub(r"\s+", " ", parser.title).strip(), "text": parser.text()}
+
+
+class PageFetcher:
+    """
+    Web sonuçlarının sayfalarını havuzlu bir istemciyle paralel indirir.
+    
+    Her sayfa için max_bytes ve toplam timeout sınırı uygulanır. Çıkarılan
+    metin URL'e göre disk önbelleğinde tutulur; cache_ttl içinde ağa hiç
+    çıkılmaz, sonrasında ETag / Last-Modified ile koşullu istek yapılır ve
+    304 yanıtında önbellekteki metin kullanılır.
+    
+    URL'ler arama sonuçlarından (dışarıdan) geldiği için yalnızca http/https
+    ve genel (global) adreslere çözülen sunuculara istek yapılır; loopback,
+    link-local ve özel ağ adresleri, yönlendirme hedefleri dahil, reddedilir.
+    allow_private_hosts=True yalnızca yerel test sunucusu içindir.
+    """
+    
+    def __init__(self, transport: Optional[PooledTransport] = None,
+                 max_bytes: int = PAGE_FETCH_MAX_BYTES,
+                 timeout: float = PAGE_FETCH_TIMEOUT,
+                 max_chars: int = PAGE_FETCH_MAX_CHARS,
+                 max_workers: int = PAGE_FETCH_MAX_WORKERS,
+                 cache_dir: Optional[str] = "data/cache/pages",
+                 cache_ttl: float = PAGE_CACHE_TTL,
+                 max_redirects: int = PAGE_FETCH_MAX_REDIRECTS,
+                 allow_private_hosts: bool = False):
+        self.transport = transport or PooledTransport(headers={"User-Agent": USER_AGENT})
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.max_chars = max_chars
+        self.max_workers = max_workers
+        self.cache_ttl = cache_ttl
+        self.max_redirects = max_redirects
+        self.allow_private_hosts = allow_private_hosts
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.stats = {"fetched": 0, "fresh_hits": 0, "not_modified": 0, "errors": 0, "blocked": 0}
+    
+    def fetch_many(self, urls: List[str]) -> List[Dict]:
+        """URL'leri paralel getir; sonuçlar girdi sırasıyla döner"""
+        if not urls:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls))) as executor:
+            return list(executor.map(self.fetch, urls))
+    
+    def fetch(self, url: str) -> Dict:
+        """Tek sayfayı getir (önbellekli)"""
+        cached = self._cache_get(url)
+        if cached and time.time() - cached.get("fetched_at", 0) < self.cache_ttl:
+            self._count("fresh_hits")
+            return self._page_result(url, cached, cached=True)
+        
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        
+        response, error = self._request(url, headers)
+        if response is None:
+            return self._error_result(url, error)
+        
+        try:
+            if response.status_code == 304 and cached:
+                cached["fetched_at"] = time.time()
+                self._cache_put(url, cached)
+                self._count("not_modified")
+                return self._page_result(url, cached, cached=True)
+            if response.status_code != 200:
+                self._count("errors")
+                return self._error_result(url, f"HTTP {response.status_code}")
+            
+            content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if content_type and content_type not in TEXT_CONTENT_TYPES:
+                self._count("errors")
+                return self._error_result(url, f"Desteklenmeyen içerik türü: {content_type}")
+            
+            body, truncated = self._read_limited(response)
+            if body is None:
+                self._count("errors")
+                return self._error_result(url, f"Zaman aşımı ({self.timeout:g} sn)")
+            # requests charset yoksa text/* için ISO-8859-1 varsayar; önce <meta>'ya bak
+            declared = "charset" in response.headers.get("Content-Type", "").lower()
+            encoding = (response.encoding if declared else None) or self._sniff_charset(body) or "utf-8"
+            try:
+                html = body.decode(encoding, errors="replace")
+            except LookupError:
+                html = body.decode("utf-8", errors="replace")
+        finally:
+            response.close()
+        
+        if content_type == "text/plain":
+            page = {"title": "", "text": html.strip()}
+        else:
+            page = html_to_text(html)
+        entry = {
+            "title": page["title"],
+            "text": page["text"][:self.max_chars],
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+            "truncated": truncated or len(page["text"]) > self.max_chars,
+        }
+        self._cache_put(url, entry)
+        self._count("fetched")
+        return self._page_result(url, entry, cached=False)
+    
+    def _check_url(self, url: str) -> Optional[str]:
+        """URL getirilebilir mi; değilse hata mesajı
+        
+        Sunucu adı çözülür ve tüm adresleri genel olmalıdır. Çözümleme ile
+        bağlantı arasında adres değişebilir (DNS rebinding); bu denetim
+        arama sonuçlarındaki doğrudan yerel/özel bağlantıları ve bunlara
+        yönlendirmeleri engeller.
+        """
+        try:
+            parts = urlsplit(url)
+            port = parts.port
+        except ValueError:
+            return "Geçersiz URL"
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            return f"Desteklenmeyen URL: {url}"
+        if self.allow_private_hosts:
+            return None
+        try:
+            infos = socket.getaddrinfo(parts.hostname, port or (443 if parts.scheme == "https" else 80),
+                                       proto=socket.IPPROTO_TCP)
+        except (socket.gaierror, UnicodeError) as e:
+            return f"Adres çözülemedi: {parts.hostname} ({e})"
+        for info in infos:
+            address = ipaddress.ip_address(info[4][0].split("%", 1)[0])
+            if not address.is_global or address.is_multicast:
+                return f"Yerel/özel ağ adresine istek engellendi: {parts.hostname}"
+        return None
+    
+    def _request(self, url: str, headers: Dict[str, str]):
+        """Yönlendirmeleri tek tek denetleyerek GET yap -> (yanıt, None) / (None, hata)"""
+        current = url
+        for _ in range(self.max_redirects + 1):
+            error = self._check_url(current)
+            if error:
+                self._count("blocked")
+                return None, error
+            try:
+                response = self.transport.get(current, headers=headers, stream=True, timeout=self.timeout,
+                                              allow_redirects=False)
+            except Exception as e:
+                self._count("errors")
+                return None, f"İstek hatası: {e}"
+            location = response.headers.get("Location")
+            if not (response.is_redirect and location):
+                return response, None
+            response.close()
+            current = urljoin(current, location)
+        self._count("errors")
+        return None, f"Çok fazla yönlendirme (>{self.max_redirects})"
+    
+    def _read_limited(self, response):
+        """Gövdeyi bayt ve süre sınırıyla oku; süre aşılırsa (None, False)"""
+        deadline = time.monotonic() + self.timeout
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=16 * 1024):
+            if time.monotonic() > deadline:
+                return None, False
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_bytes:
+                return b"".join(chunks)[:self.max_bytes], True
+        return b"".join(chunks), False
+    
+    @staticmethod
+    def _sniff_charset(body: bytes) -> Optional[str]:
+        """<meta charset> bildirimini bul"""
+        match = re.search(rb"<meta[^>]+charset=[\"']?([\w-]+)", body[:4096], re.IGNORECASE)
+        return match.group(1).decode("ascii") if match else None
+    
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+    
+    @staticmethod
+    def _page_result(url: str, entry: Dict, cached: bool) -> Dict:
+        """Başarılı sayfa sonucu"""
+        return {
+            "success": True,
+            "error": None,
+            "url": url,
+            "title": entry.get("title") or url,
+            "text": entry.get("text", ""),
+            "truncated": entry.get("truncated", False),
+            "cached": cached,
+        }
+    
+    @staticmethod
+    def _error_result(url: str, error: str) -> Dict:
+        """Hata sonucu"""
+        return {"success": False, "error": error, "url": url, "title": url, "text": "",
+                "truncated": False, "cached": False}
+    
+    @staticmethod
+    def to_prompt_sources(pages: List[Dict]) -> List[Dict]:
+        """Başarılı sayfaları format_for_prompt'un beklediği dosya formatına çevir
+        
+        Böylece sayfalar yüklenen dosyalarla aynı bütçe paylaşımına ve
+        doküman seçimine (retrieval) girer.
+        """
+        return [{
+            "success": True,
+            "error": None,
+            "type": "text",
+            "content": page["text"],
+            "path": page["url"],
+            "name": f"Web: {page['title']} ({page['url']})",
+        } for page in pages if page.get("success") and page.get("text")]
+    
+    def _cache_path(self, url: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.json"
+    
+    def _cache_get(self, url: str) -> Optional[Dict]:
+        """Önbellekteki sayfa kaydı"""
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._cache_path(url), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("url") == url else None
+    
+    def _cache_put(self, url: str, entry: Dict):
+        """Sayfa kaydını atomik yaz"""
+        if not self.cache_dir:
+            return
+        path = self._cache_path(url)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(dict(entry, url=url), f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Sayfa önbelleği yazma hatası: {e}")
+    
+    def clear_cache(self):
+        """Sayfa önbelleğini temizle"""
+        if self.cache_dir:
+            for path in self.cache_dir.glob("*.json"):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+    
+    def close(self):
+        """Bağlantı havuzunu kapat"""
+        self.transport.close()
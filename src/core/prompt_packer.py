@@ -0,0 +1,85 @@
+"""
+Prompt paketleme - Model bağlam penceresine göre token bütçesi dağıtımı
+"""
+import math
+from typing import List, Optional, Tuple
+
+from ..utils.constants import (CHARS_PER_TOKEN, DEFAULT_CONTEXT_LENGTH, PROMPT_OUTPUT_RESERVE,
+                               PROMPT_WEB_SHARE)
+
+TRUNCATION_MARKER = "\n[... içerik bağlam sınırı nedeniyle kısaltıldı ...]"
+
+
+class PromptPacker:
+    """
+    Kullanıcı prompt'u, dosyalar ve web sonuçları arasında token bütçesi dağıtır.
+    
+    Token sayısı karakter/token oranı ile kaba ama hızlı tahmin edilir; aynı
+    girdi her zaman aynı kısaltmayı verir (deterministik).
+    """
+    
+    def __init__(self, context_length: Optional[int] = None,
+                 reserve_tokens: int = PROMPT_OUTPUT_RESERVE,
+                 chars_per_token: float = CHARS_PER_TOKEN):
+        self.context_length = context_length or DEFAULT_CONTEXT_LENGTH
+        self.reserve_tokens = reserve_tokens
+        self.chars_per_token = chars_per_token
+    
+    def estimate_tokens(self, text: str) -> int:
+        """Metnin yaklaşık token sayısı"""
+        if not text:
+            return 0
+        return math.ceil(len(text) / self.chars_per_token)
+    
+    def tokens_to_chars(self, tokens: int) -> int:
+        """Token bütçesinin karakter karşılığı"""
+        return max(int(tokens * self.chars_per_token), 0)
+    
+    def available_tokens(self, user_prompt: str) -> int:
+        """Kullanıcı prompt'u ve yanıt payı düşüldükten sonra kalan bütçe"""
+        return max(self.context_length - self.reserve_tokens - self.estimate_tokens(user_prompt), 0)
+    
+    def split_budget(self, budget: int, file_tokens: int, web_tokens: int) -> Tuple[int, int]:
+        """Bütçeyi (dosyalar, web) arasında böl
+        
+        İkisi birden sığıyorsa kısaltma yapılmaz. Sığmıyorsa web sonuçlarına
+        en az PROMPT_WEB_SHARE oranında yer ayrılır, kalan dosyalara gider.
+        """
+        if file_tokens + web_tokens <= budget:
+            return file_tokens, web_tokens
+        web_budget = min(web_tokens, max(int(budget * PROMPT_WEB_SHARE), budget - file_tokens))
+        return budget - web_budget, web_budget
+    
+    @staticmethod
+    def allocate(sizes: List[int], budget: int) -> List[int]:
+        """Bütçeyi parçalar arasında adil böl (küçükler tamamen sığar, kalan eşit bölünür)"""
+        allocation = [0] * len(sizes)
+        remaining = budget
+        pending = sorted(range(len(sizes)), key=lambda i: (sizes[i], i))
+        while pending:
+            share = remaining // len(pending)
+            index = pending[0]
+            if sizes[index] <= share:
+                allocation[index] = sizes[index]
+                remaining -= sizes[index]
+                pending.pop(0)
+                continue
+            # Kalanların hepsi paydan büyük: eşit böl
+            for index in pending:
+                allocation[index] = share
+            break
+        return allocation
+    
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Metni token bütçesine sığacak şekilde baştan itibaren kes"""
+        if self.estimate_tokens(text) <= max_tokens:
+            return text
+        max_chars = self.tokens_to_chars(max_tokens) - len(TRUNCATION_MARKER)
+        if max_chars <= 0:
+            return ""
+        cut = text[:max_chars]
+        # Mümkünse satır sonunda kes
+        newline = cut.rfind("\n")
+        if newline >= max_chars * 0.8:
+            cut = cut[:newline]
+        return cut + TRUNCATION_MARKER
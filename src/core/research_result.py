@@ -0,0 +1,64 @@
+"""
+Araştırma sonucu - ResearchThread'in ürettiği, geçmiş ve export'un tükettiği yapı
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List
+
+
+@dataclass
+class ResearchResult:
+    """Tek bir araştırma isteğinin çıktısı ve modelin gördüğü girdiler"""
+    model: str
+    prompt: str
+    response: str = ""
+    # Kullanıcının eklediği dosya yolları
+    file_paths: List[str] = field(default_factory=list)
+    # İşlenen dosyaların özet bilgisi (içerik hariç)
+    processed_files: List[Dict] = field(default_factory=list)
+    # Modele gönderilen web arama sonuçları (aynen)
+    web_results: List[Dict] = field(default_factory=list)
+    # İndirilen sonuç sayfalarının özet bilgisi (metin hariç)
+    fetched_pages: List[Dict] = field(default_factory=list)
+    # Aşama -> saniye
+    timings: Dict[str, float] = field(default_factory=dict)
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+    
+    @staticmethod
+    def summarize_file(file_info: Dict) -> Dict:
+        """Dosya sonucundan içerik olmadan meta veri çıkar"""
+        return {
+            "path": file_info.get("path"),
+            "name": file_info.get("name"),
+            "type": file_info.get("type"),
+            "size": file_info.get("size"),
+            "success": file_info.get("success", False),
+            "error": file_info.get("error"),
+            "cached": file_info.get("cached", False),
+        }
+    
+    @staticmethod
+    def summarize_page(page: Dict) -> Dict:
+        """Sayfa sonucundan metin olmadan meta veri çıkar"""
+        return {
+            "url": page.get("url"),
+            "title": page.get("title"),
+            "success": page.get("success", False),
+            "error": page.get("error"),
+            "chars": len(page.get("text") or ""),
+            "cached": page.get("cached", False),
+        }
+    
+    def to_entry(self) -> Dict:
+        """Geçmiş/export kaydı formatına çevir"""
+        return {
+            "timestamp": self.timestamp,
+            "model": self.model,
+            "prompt": self.prompt,
+            "response": self.response,
+            "files": list(self.file_paths),
+            "web_search_results": list(self.web_results),
+            "processed_files": list(self.processed_files),
+            "fetched_pages": list(self.fetched_pages),
+            "timings": dict(self.timings),
+        }
@@ -0,0 +1,175 @@
+"""
+Yerel doküman erişimi - Yüklenen dosyaları parçalara bölüp BM25 ile en alakalı parçaları seçer
+"""
+import importlib.util
+import re
+from typing import Dict, List, Optional, Tuple
+
+# numpy yalnızca indeks kurulurken yüklenir (başlangıç süresi); burada sadece varlığı kontrol edilir
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+from ..utils.constants import RETRIEVAL_CHUNK_CHARS, RETRIEVAL_CHUNK_OVERLAP, RETRIEVAL_TOP_K
+
+_TOKEN_PATTERN = re.compile(r"\w\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Metni küçük harfli kelimelere ayır (tek harfliler atılır)"""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def chunk_text(text: str, chunk_chars: int = RETRIEVAL_CHUNK_CHARS,
+               overlap: int = RETRIEVAL_CHUNK_OVERLAP) -> List[str]:
+    """Metni mümkünse paragraf/satır sınırlarında, örtüşmeli parçalara böl"""
+    if len(text) <= chunk_chars:
+        return [text] if text.strip() else []
+    
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_chars, len(text))
+        if end < len(text):
+            # Parçanın son yarısındaki en yakın paragraf / satır sonunda kes
+            for separator in ("\n\n", "\n", ". "):
+                cut = text.rfind(separator, start + chunk_chars // 2, end)
+                if cut != -1:
+                    end = cut + len(separator)
+                    break
+        chunk = text[start:end]
+        if chunk.strip():
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+class BM25Index:
+    """
+    NumPy tabanlı BM25 indeksi.
+    
+    Terim -> (parça, frekans) listeleri CSR benzeri düz dizilerde tutulur;
+    sorgu skoru her terim için vektörel olarak hesaplanır.
+    """
+    
+    def __init__(self, documents: List[str], k1: float = 1.5, b: float = 0.75):
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("BM25 indeksi için numpy gerekli")
+        import numpy as np
+        self.k1 = k1
+        self.b = b
+        self.vocabulary: Dict[str, int] = {}
+        
+        term_ids = []
+        doc_ids = []
+        counts = []
+        lengths = np.zeros(len(documents), dtype=np.float32)
+        for doc_id, document in enumerate(documents):
+            frequencies: Dict[int, int] = {}
+            tokens = tokenize(document)
+            lengths[doc_id] = len(tokens)
+            for token in tokens:
+                term_id = self.vocabulary.setdefault(token, len(self.vocabulary))
+                frequencies[term_id] = frequencies.get(term_id, 0) + 1
+            term_ids.extend(frequencies.keys())
+            doc_ids.extend([doc_id] * len(frequencies))
+            counts.extend(frequencies.values())
+        
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind="stable")
+        self._postings_doc = np.asarray(doc_ids, dtype=np.int64)[order]
+        self._postings_tf = np.asarray(counts, dtype=np.float32)[order]
+        document_frequency = np.bincount(term_ids, minlength=len(self.vocabulary))
+        self._offsets = np.concatenate(([0], np.cumsum(document_frequency)))
+        
+        self.num_docs = len(documents)
+        average_length = float(lengths.mean()) if self.num_docs else 0.0
+        self._length_norm = self.k1 * (1 - self.b + self.b * lengths / max(average_length, 1.0))
+        self._idf = np.log(1 + (self.num_docs - document_frequency + 0.5) / (document_frequency + 0.5))
+    
+    def scores(self, query: str) -> "np.ndarray":
+        """Her parça için BM25 skoru"""
+        import numpy as np
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        for token in set(tokenize(query)):
+            term_id = self.vocabulary.get(token)
+            if term_id is None:
+                continue
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            docs = self._postings_doc[start:end]
+            tf = self._postings_tf[start:end]
+            scores[docs] += self._idf[term_id] * tf * (self.k1 + 1) / (tf + self._length_norm[docs])
+        return scores
+    
+    def top_k(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """En yüksek skorlu k parça (skor > 0)"""
+        import numpy as np
+        scores = self.scores(query)
+        k = min(k, self.num_docs)
+        if k <= 0:
+            return []
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(i), float(scores[i])) for i in ranked if scores[i] > 0]
+
+
+class DocumentRetriever:
+    """Yüklenen dosyalardan soruyla en alakalı parçaları seçer"""
+    
+    def __init__(self, chunk_chars: int = RETRIEVAL_CHUNK_CHARS,
+                 overlap: int = RETRIEVAL_CHUNK_OVERLAP, top_k: int = RETRIEVAL_TOP_K):
+        self.chunk_chars = chunk_chars
+        self.overlap = overlap
+        self.top_k = top_k
+    
+    def select(self, files: List[Dict[str, any]], query: str,
+               max_chars: Optional[int] = None) -> List[Dict[str, any]]:
+        """Metin dosyalarının içeriğini yalnızca seçilen parçalarla değiştir
+        
+        Parçalar dosya içindeki orijinal sırasıyla birleştirilir. Hiçbir parça
+        eşleşmezse dosyaların baş kısımları korunur. Resimler olduğu gibi döner.
+        """
+        chunks: List[Tuple[int, int, str]] = []
+        for file_index, file_info in enumerate(files):
+            if file_info.get("type") != "text":
+                continue
+            for chunk_index, chunk in enumerate(chunk_text(file_info.get("content", ""),
+                                                           self.chunk_chars, self.overlap)):
+                chunks.append((file_index, chunk_index, chunk))
+        if not chunks:
+            return files
+        
+        index = BM25Index([chunk for _, _, chunk in chunks])
+        ranked = index.top_k(query, self.top_k)
+        if not ranked:
+            # Eşleşme yok: her dosyanın ilk parçası
+            ranked = [(i, 0.0) for i, (_, chunk_index, _) in enumerate(chunks) if chunk_index == 0]
+        
+        selected = []
+        used_chars = 0
+        for chunk_id, _ in ranked:
+            length = len(chunks[chunk_id][2])
+            if max_chars is not None and used_chars + length > max_chars and selected:
+                break
+            selected.append(chunk_id)
+            used_chars += length
+        
+        by_file: Dict[int, List[Tuple[int, str]]] = {}
+        for chunk_id in selected:
+            file_index, chunk_index, chunk = chunks[chunk_id]
+            by_file.setdefault(file_index, []).append((chunk_index, chunk))
+        
+        result = []
+        for file_index, file_info in enumerate(files):
+            if file_info.get("type") != "text":
+                result.append(file_info)
+                continue
+            parts = sorted(by_file.get(file_index, []))
+            if not parts:
+                result.append(dict(file_info, content="[Bu dosyada soruyla ilgili bölüm bulunamadı]",
+                                   retrieved_chunks=0))
+                continue
+            content = "\n[...]\n".join(chunk.strip("\n") for _, chunk in parts)
+            result.append(dict(file_info, content=content, retrieved_chunks=len(parts)))
+        return result
+
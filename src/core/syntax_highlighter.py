@@ -0,0 +1,187 @@
+"""
+Kod renklendirme servisi - Pygments çıktısını önbellekleyen, arka planda çalışabilen renklendirici
+"""
+import hashlib
+import html
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from ..utils.constants import HIGHLIGHT_CACHE_SIZE, HIGHLIGHT_WORKERS, HIGHLIGHT_MAX_CHARS, HIGHLIGHT_MAX_LINES
+
+# Dil belirtilmemiş bloklar (eski "temp.py" tahmini pratikte hep Python lexer'ını seçiyordu)
+DEFAULT_LANGUAGE = "python"
+
+
+def plain_code(code: str) -> str:
+    """Renklendirilmemiş, kaçışlanmış kod"""
+    return html.escape(code)
+
+
+class SyntaxHighlighter:
+    """
+    Kod bloklarını HTML'e renklendirir.
+    
+    Lexer'lar dil adına göre, formatter tek sefer oluşturulur. Çıktı
+    (dil, kod özeti) anahtarıyla LRU önbellekte tutulur. max_chars /
+    max_lines sınırını aşan bloklar renklendirilmez (düz metin). Aynı blok
+    için eşzamanlı istekler tek işte birleştirilir.
+    """
+    
+    def __init__(self, cache_size: int = HIGHLIGHT_CACHE_SIZE, max_workers: int = HIGHLIGHT_WORKERS,
+                 max_chars: int = HIGHLIGHT_MAX_CHARS, max_lines: int = HIGHLIGHT_MAX_LINES):
+        self.cache_size = cache_size
+        self.max_chars = max_chars
+        self.max_lines = max_lines
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        # Dil -> lexer (bilinmeyen dil için None)
+        self._lexers: Dict[str, object] = {}
+        self._formatter = None
+        # (highlight, get_lexer_by_name, ClassNotFound); ilk kullanımda yüklenir,
+        # Pygments kurulu değilse False
+        self._pygments = None
+        self.stats = {"hits": 0, "misses": 0, "plain": 0}
+    
+    @staticmethod
+    def _key(code: str, language: str) -> Tuple[str, str]:
+        return language, hashlib.sha1(code.encode("utf-8", "surrogatepass")).hexdigest()
+    
+    def _too_large(self, code: str) -> bool:
+        return len(code) > self.max_chars or code.count("\n") >= self.max_lines
+    
+    def _load_pygments(self):
+        """Pygments'i ve formatter'ı tek sefer yükle (self._lock altında çağrılır)
+        
+        Modül içe aktarımı ve lexer kaydı thread güvenli olmadığından ilk
+        iş başlamadan önce, kilit altında yapılır.
+        """
+        if self._pygments is None:
+            try:
+                from pygments import highlight
+                from pygments.formatters import HtmlFormatter
+                from pygments.lexers import get_lexer_by_name
+                from pygments.util import ClassNotFound
+            except ImportError as e:
+                print(f"Kod renklendirme kullanılamıyor: {e}")
+                self._pygments = False
+            else:
+                self._formatter = HtmlFormatter(style='default', nowrap=True, noclasses=True)
+                self._pygments = (highlight, get_lexer_by_name, ClassNotFound)
+        return self._pygments or None
+    
+    def _lexer(self, language: str):
+        """Dil adına göre lexer (önbellekli, kilit altında oluşturulur)"""
+        with self._lock:
+            if language not in self._lexers:
+                pygments = self._load_pygments()
+                if pygments is None:
+                    return None
+                _, get_lexer_by_name, class_not_found = pygments
+                try:
+                    self._lexers[language] = get_lexer_by_name(language, stripall=True)
+                except class_not_found:
+                    self._lexers[language] = None
+            return self._lexers[language]
+    
+    def _render(self, code: str, language: str) -> Tuple[str, bool]:
+        """Pygments ile renklendir -> (HTML, önbelleğe alınabilir mi)
+        
+        Bilinmeyen dilde (veya Pygments yoksa) düz metin kalıcı sonuçtur;
+        hata durumunda düz metin döner ama önbelleğe alınmaz (sonraki
+        istekte yeniden denenir).
+        """
+        try:
+            lexer = self._lexer(language)
+            if lexer is None:
+                return plain_code(code), True
+            highlight = self._pygments[0]
+            return highlight(code, lexer, self._formatter), True
+        except Exception as e:
+            print(f"Kod renklendirme hatası: {e}")
+            return plain_code(code), False
+    
+    def cached(self, code: str, language: str = "") -> Optional[str]:
+        """Önbellekteki (veya hesaplanması gerekmeyen) çıktı, yoksa None"""
+        if self._too_large(code):
+            self.stats["plain"] += 1
+            return plain_code(code)
+        key = self._key(code, (language or DEFAULT_LANGUAGE).lower())
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+            return result
+    
+    def _store(self, key: Tuple[str, str], result: str):
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+    
+    def highlight(self, code: str, language: str = "") -> str:
+        """Senkron renklendirme (önbellekli)"""
+        result = self.cached(code, language)
+        if result is not None:
+            return result
+        language = (language or DEFAULT_LANGUAGE).lower()
+        self.stats["misses"] += 1
+        result, cacheable = self._render(code, language)
+        if cacheable:
+            self._store(self._key(code, language), result)
+        return result
+    
+    def highlight_async(self, code: str, language: str = "") -> Tuple[str, Optional[Future]]:
+        """(HTML, Future): önbellekteyse (sonuç, None), değilse (düz metin yer tutucu, iş)
+        
+        Future tamamlandığında sonuç önbellektedir; çağıran bloğu yeniden
+        render ederek yer tutucuyu değiştirir.
+        """
+        result = self.cached(code, language)
+        if result is not None:
+            return result, None
+        language = (language or DEFAULT_LANGUAGE).lower()
+        key = self._key(code, language)
+        with self._lock:
+            # İş bu arada bitmiş olabilir
+            result = self._cache.get(key)
+            if result is not None:
+                return result, None
+            future = self._inflight.get(key)
+            if future is None:
+                if self._executor is None:
+                    # İlk iş gönderilmeden önce, kilit altında
+                    if self._load_pygments() is None:
+                        return plain_code(code), None
+                    self._executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                        thread_name_prefix="highlight")
+                self.stats["misses"] += 1
+                future = self._executor.submit(self._highlight_job, key, code, language)
+                self._inflight[key] = future
+        return plain_code(code), future
+    
+    def _highlight_job(self, key: Tuple[str, str], code: str, language: str) -> str:
+        try:
+            result, cacheable = self._render(code, language)
+            if cacheable:
+                self._store(key, result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+    
+    def clear_cache(self):
+        """Renklendirme önbelleğini temizle"""
+        with self._lock:
+            self._cache.clear()
+    
+    def shutdown(self):
+        """Arka plan işlerini durdur"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
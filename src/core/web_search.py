@@ -1,37 +1,346 @@
 """
 Web arama modülü - DuckDuckGo entegrasyonu
 """
-from typing import List, Dict, Optional
-try:
-    from ddgs import DDGS
-except ImportError:
-    from duckduckgo_search import DDGS
+import hashlib
+import json
+import os
+import re
+import math
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .retrieval import tokenize
+from ..utils.constants import WEB_SEARCH_CACHE_TTL, WEB_SEARCH_CACHE_SIZE, WEB_SEARCH_FANOUT_QUERIES
+
+# Alt sorgu türetirken ve yeniden sıralarken atlanan yaygın kelimeler
+_STOPWORDS = {
+    "about", "acaba", "ama", "ancak", "and", "anlat", "arasında", "arasındaki", "are", "açıkla",
+    "bana", "bir", "biri", "birkaç", "bu", "bunu", "bunun", "can", "da", "daha", "de", "diye",
+    "does", "en", "explain", "for", "from", "gibi", "hangi", "hangisi", "hem", "how", "ile", "ise",
+    "için", "kadar", "ki", "lütfen", "mi", "mu", "mü", "mı", "nasıl", "ne", "neden", "nedir",
+    "olan", "olarak", "please", "tell", "that", "the", "this", "ve", "veya", "what", "when",
+    "where", "which", "who", "why", "with", "ya", "yani", "you", "your", "çok", "şu",
+}
+# Normalize edilen URL'lerden atılan izleme parametreleri: önek ve tam adlar
+# ("ref" öneki "reference", "refresh" gibi anlamlı parametreleri de silerdi)
+_TRACKING_PREFIXES = ("utm_",)
+_TRACKING_PARAMS = {"fbclid", "gclid", "ref", "ref_src"}
+# Alt sorgu başına en fazla kelime (çok uzun sorgular arama motorunda kötü sonuç verir)
+_MAX_QUERY_WORDS = 12
+
+
+def _ddgs_class():
+    """DDGS sınıfını ilk kullanımda yükle (yeni paket adı, yoksa eskisi)"""
+    try:
+        from ddgs import DDGS
+    except ImportError:
+        from duckduckgo_search import DDGS
+    return DDGS
+
+
+def _copy_results(results: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Önbellekteki sonuçların kopyası (çağıranın değişiklikleri önbelleğe sızmaz)"""
+    return [dict(result) for result in results]
+
+
+def normalize_query(query: str) -> str:
+    """Sorguyu önbellek anahtarı için normalize et (küçük harf, tek boşluk, uç noktalama yok)"""
+    query = re.sub(r"\s+", " ", query.lower()).strip()
+    return query.strip(" ?!.,;:")
+
+
+def normalize_url(url: str) -> str:
+    """Tekrarları bulmak için URL'i normalize et (şema, www, izleme parametreleri, fragment)"""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip().lower()
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not (key.lower().startswith(_TRACKING_PREFIXES) or key.lower() in _TRACKING_PARAMS)
+    ))
+    path = parts.path.rstrip("/")
+    return urlunsplit(("", host, path, query, ""))
+
+
+def _content_words(text: str) -> List[str]:
+    """Stopword olmayan, en az 3 harfli kelimeler (ilk görülme sırasıyla, tekrarsız)"""
+    words = []
+    for token in tokenize(text):
+        if len(token) >= 3 and token not in _STOPWORDS and token not in words:
+            words.append(token)
+    return words
+
+
+def derive_queries(prompt: str, max_queries: int = WEB_SEARCH_FANOUT_QUERIES) -> List[str]:
+    """Prompt'tan alt sorgular türet
+    
+    Sırasıyla: kısa prompt'un kendisi (uzunsa anahtar kelimeleri), içerik
+    taşıyan her cümle ve prompt'un ilk anahtar kelimeleri. Normalize edilmiş
+    hali aynı olan sorgular tekrar edilmez.
+    """
+    prompt = re.sub(r"\s+", " ", prompt).strip()
+    if not prompt:
+        return []
+    keywords = _content_words(prompt)
+    
+    candidates = []
+    if len(prompt.split()) <= _MAX_QUERY_WORDS:
+        candidates.append(prompt)
+    else:
+        candidates.append(" ".join(keywords[:_MAX_QUERY_WORDS]))
+    for sentence in re.split(r"[.?!;\n]+", prompt):
+        words = _content_words(sentence)
+        if len(words) >= 2:
+            candidates.append(" ".join(words[:_MAX_QUERY_WORDS]))
+    if len(keywords) >= 2:
+        candidates.append(" ".join(keywords[:6]))
+    
+    queries = []
+    seen = set()
+    for candidate in candidates:
+        key = normalize_query(candidate)
+        if key and key not in seen:
+            seen.add(key)
+            queries.append(candidate)
+        if len(queries) >= max_queries:
+            break
+    return queries
+
+
+def rerank_results(results: List[Dict[str, str]], question: str,
+                   hits: Optional[Dict[str, float]] = None) -> List[Dict[str, str]]:
+    """Sonuçları başlık + snippet'in soruyla BM25 benzerliğine göre sırala
+    
+    hits verilirse (normalize URL -> alt sorgulardaki sıra puanı) sonuç
+    0.3 ağırlıkla bu puanla birleştirilir; birden fazla alt sorguda üst
+    sıralarda çıkan sayfalar öne geçer. Eşitlikte ilk görülme sırası korunur.
+    """
+    if len(results) < 2:
+        return list(results)
+    query_terms = set(_content_words(question)) or set(tokenize(question))
+    documents = [tokenize(f"{r.get('title', '')} {r.get('snippet', '')}") for r in results]
+    average_length = sum(len(doc) for doc in documents) / len(documents) or 1.0
+    document_frequency = {term: sum(1 for doc in documents if term in doc) for term in query_terms}
+    
+    k1, b = 1.5, 0.75
+    lexical = []
+    for doc in documents:
+        score = 0.0
+        for term in query_terms:
+            tf = doc.count(term)
+            if not tf:
+                continue
+            idf = math.log(1 + (len(documents) - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(doc) / average_length))
+        lexical.append(score)
+    
+    max_lexical = max(lexical) or 1.0
+    fusion = [hits.get(normalize_url(r.get("url", "")), 0.0) if hits else 0.0 for r in results]
+    max_fusion = max(fusion) or 1.0
+    combined = [0.7 * lex / max_lexical + 0.3 * fus / max_fusion for lex, fus in zip(lexical, fusion)]
+    order = sorted(range(len(results)), key=lambda i: (-combined[i], i))
+    return [results[i] for i in order]
 
 
 class WebSearch:
     """Web arama sınıfı"""
     
-    def __init__(self):
-        self.ddgs = DDGS()
+    def __init__(self, cache_ttl: float = WEB_SEARCH_CACHE_TTL, cache_size: int = WEB_SEARCH_CACHE_SIZE,
+                 cache_dir: Optional[str] = None):
+        # DDGS istemcisi ilk aramada oluşturulur; paralel alt sorgularda her
+        # thread kendi istemcisini kullanır. Alt sorgu havuzu kalıcıdır, böylece
+        # thread'ler ve istemcileri (bağlantıları) aramalar arasında yeniden kullanılır
+        self._local = threading.local()
+        self._fanout_executor: Optional[ThreadPoolExecutor] = None
+        # Önbellek: bellek içi LRU + opsiyonel disk katmanı
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0}
     
     def search(self, query: str, max_results: int = 5) -> List[Dict[str, str]]:
-        """Web araması yap"""
-        try:
-            results = []
-            search_results = self.ddgs.text(query, max_results=max_results)
-            
-            for result in search_results:
-                results.append({
-                    "title": result.get("title", ""),
-                    "url": result.get("href", ""),
-                    "snippet": result.get("body", "")
-                })
+        """Web araması yap (önbellekli; aynı anda gelen aynı sorgular tek istek paylaşır)"""
+        key = f"{normalize_query(query)}|{max_results}"
+        
+        with self._lock:
+            cached = self._memory_get(key)
+            if cached is not None:
+                self.stats["memory_hits"] += 1
+                return _copy_results(cached)
             
-            return results
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.stats["coalesced"] += 1
+        
+        if not owner:
+            return _copy_results(future.result())
         
+        results: List[Dict[str, str]] = []
+        try:
+            cached = self._disk_get(key)
+            if cached is not None:
+                # Bellek katmanı diskteki son kullanma zamanını devralır
+                expires, results = cached
+                with self._lock:
+                    self.stats["disk_hits"] += 1
+                    self._memory_put(key, results, expires)
+            else:
+                with self._lock:
+                    self.stats["misses"] += 1
+                results = self._fetch(query, max_results)
+                # Hatalar ve boş sonuçlar önbelleğe alınmaz
+                if results:
+                    with self._lock:
+                        self._memory_put(key, results)
+                    self._disk_put(key, query, results)
         except Exception as e:
             print(f"Web arama hatası: {e}")
-            return []
+            results = []
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_result(results)
+        
+        return _copy_results(results)
+    
+    def search_many(self, prompt: str, max_results: int = 5,
+                    max_queries: int = WEB_SEARCH_FANOUT_QUERIES) -> List[Dict[str, str]]:
+        """Prompt'tan türetilen alt sorguları paralel ara, birleştir ve yeniden sırala
+        
+        Aynı sayfa (normalize URL) bir kez alınır; en uzun snippet korunur.
+        Sonuçlar soruya göre yerel olarak yeniden sıralanıp ilk max_results döner.
+        """
+        queries = derive_queries(prompt, max_queries)
+        if len(queries) < 2:
+            return self.search(queries[0] if queries else prompt, max_results=max_results)
+        
+        with self._lock:
+            if self._fanout_executor is None:
+                self._fanout_executor = ThreadPoolExecutor(max_workers=WEB_SEARCH_FANOUT_QUERIES,
+                                                           thread_name_prefix="web-search")
+            executor = self._fanout_executor
+        batches = list(executor.map(lambda q: self.search(q, max_results=max_results), queries))
+        
+        merged: Dict[str, Dict[str, str]] = {}
+        hits: Dict[str, float] = {}
+        for batch in batches:
+            for rank, result in enumerate(batch):
+                key = normalize_url(result.get("url", ""))
+                if not key:
+                    continue
+                # Reciprocal rank fusion puanı
+                hits[key] = hits.get(key, 0.0) + 1.0 / (60 + rank)
+                existing = merged.get(key)
+                if existing is None:
+                    merged[key] = dict(result)
+                elif len(result.get("snippet", "")) > len(existing.get("snippet", "")):
+                    existing["snippet"] = result["snippet"]
+        
+        return rerank_results(list(merged.values()), prompt, hits)[:max_results]
+    
+    def _fetch(self, query: str, max_results: int) -> List[Dict[str, str]]:
+        """DuckDuckGo'dan sonuçları getir"""
+        ddgs = getattr(self._local, "ddgs", None)
+        if ddgs is None:
+            ddgs = self._local.ddgs = _ddgs_class()()
+        results = []
+        search_results = ddgs.text(query, max_results=max_results)
+        
+        for result in search_results:
+            results.append({
+                "title": result.get("title", ""),
+                "url": result.get("href", ""),
+                "snippet": result.get("body", "")
+            })
+        
+        return results
+    
+    def _memory_get(self, key: str) -> Optional[List[Dict[str, str]]]:
+        """Bellek katmanından oku (kilit altında çağrılır)"""
+        item = self._memory.get(key)
+        if item is None:
+            return None
+        expires, results = item
+        if expires < time.time():
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return results
+    
+    def _memory_put(self, key: str, results: List[Dict[str, str]], expires: Optional[float] = None):
+        """Bellek katmanına yaz (kilit altında çağrılır)"""
+        self._memory[key] = (expires or time.time() + self.cache_ttl, results)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.cache_size:
+            self._memory.popitem(last=False)
+    
+    def _disk_path(self, key: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json"
+    
+    def _disk_get(self, key: str) -> Optional[Tuple[float, List[Dict[str, str]]]]:
+        """Disk katmanından oku -> (son kullanma zamanı, sonuçlar)"""
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        expires = data.get("expires", 0)
+        if data.get("key") != key or expires < time.time() or not data.get("results"):
+            return None
+        return expires, data["results"]
+    
+    def _disk_put(self, key: str, query: str, results: List[Dict[str, str]]):
+        """Disk katmanına atomik yaz"""
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"key": key, "query": query, "expires": time.time() + self.cache_ttl,
+                           "results": results}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Web arama önbelleği yazma hatası: {e}")
+    
+    def shutdown(self):
+        """Alt sorgu thread'lerini bırak"""
+        with self._lock:
+            executor, self._fanout_executor = self._fanout_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def clear_cache(self):
+        """Önbelleği temizle (bellek + disk)"""
+        with self._lock:
+            self._memory.clear()
+        if self.cache_dir:
+            for path in self.cache_dir.glob("*.json"):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
     
     def format_results(self, results: List[Dict[str, str]]) -> str:
         """Arama sonuçlarını formatla"""
@@ -49,4 +358,3 @@ class WebSearch:
     def get_sources(self, results: List[Dict[str, str]]) -> List[str]:
         """Kaynak URL'lerini al"""
         return [result['url'] for result in results if result.get('url')]
-
@@ -2,36 +2,60 @@
 Sohbet arayüzü widget - Mesaj gönderme/alma, markdown render
 """
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTextEdit, 
-                             QPushButton, QScrollArea, QLabel)
-from PyQt6.QtCore import Qt, pyqtSignal, QThread
-from PyQt6.QtGui import QFont, QTextCharFormat, QColor, QTextCursor
-import markdown
-from pygments import highlight
-from pygments.lexers import get_lexer_by_name, guess_lexer_for_filename
-from pygments.formatters import HtmlFormatter
-import re
+                             QPushButton, QApplication)
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer
+from PyQt6.QtGui import QFont
+from typing import List, Optional
+
+from .transcript import TranscriptModel, TranscriptView, RenderWorker
+from ..core.syntax_highlighter import SyntaxHighlighter
+from ..core.markdown_renderer import MarkdownRenderer
+from ..utils.constants import STREAM_REFRESH_MS
 
 
 class ChatWidget(QWidget):
     """Sohbet widget"""
     
     message_sent = pyqtSignal(str)
+    stop_requested = pyqtSignal()
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self.messages = []
+        self._stream_id = None
+        self._stream_parts = []
+        
+        # Mesajlar bir kez, arka planda render edilir; görünüm yalnızca görünenleri yerleştirir
+        # Kod blokları ayrıca arka planda renklendirilir; hazır olana kadar düz metin
+        self.transcript = TranscriptModel(self)
+        self.highlighter = SyntaxHighlighter()
+        self.markdown = MarkdownRenderer(self.highlighter)
+        self._renderer = RenderWorker(self._render_message, self)
+        self._renderer.rendered.connect(self.transcript.set_html)
+        self._renderer.start()
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self._renderer.stop)
+            app.aboutToQuit.connect(self.highlighter.shutdown)
+        
+        # Stream parçaları bu aralıkla birleştirilip görünüme yansıtılır
+        self._stream_timer = QTimer(self)
+        self._stream_timer.setSingleShot(True)
+        self._stream_timer.setInterval(STREAM_REFRESH_MS)
+        self._stream_timer.timeout.connect(self._flush_stream)
+        
         self.init_ui()
     
     def init_ui(self):
         """UI oluştur"""
         layout = QVBoxLayout()
         
-        # Mesaj alanı (scrollable)
-        self.chat_area = QTextEdit()
-        self.chat_area.setReadOnly(True)
+        # Mesaj alanı (scrollable, sanallaştırılmış)
+        self.chat_area = TranscriptView()
+        self.chat_area.setModel(self.transcript)
         self.chat_area.setFont(QFont("Consolas", 10))
         self.chat_area.setStyleSheet("""
-            QTextEdit {
+            QListView {
                 background-color: #f5f5f5;
                 border: 1px solid #ddd;
                 border-radius: 5px;
@@ -91,6 +115,11 @@ class ChatWidget(QWidget):
         """)
         btn_layout.addWidget(self.send_btn)
         
+        self.stop_btn = QPushButton("Durdur")
+        self.stop_btn.setEnabled(False)
+        self.stop_btn.clicked.connect(self.stop_requested.emit)
+        btn_layout.addWidget(self.stop_btn)
+        
         self.clear_btn = QPushButton("Temizle")
         self.clear_btn.clicked.connect(self._clear_chat)
         btn_layout.addWidget(self.clear_btn)
@@ -115,72 +144,99 @@ class ChatWidget(QWidget):
     def add_user_message(self, text: str):
         """Kullanıcı mesajı ekle"""
         self.messages.append({"role": "user", "content": text})
-        self._append_message("Kullanıcı", text, "#2196F3")
+        self._append_message("user", text)
     
     def add_assistant_message(self, text: str):
         """AI mesajı ekle"""
         self.messages.append({"role": "assistant", "content": text})
-        self._append_message("Asistan", text, "#4CAF50")
+        self._append_message("assistant", text)
     
-    def add_system_message(self, text: str):
-        """Sistem mesajı ekle"""
-        self._append_message("Sistem", text, "#FF9800")
+    def begin_assistant_stream(self):
+        """Parça parça gelecek AI mesajı için boş mesaj ekle"""
+        self._stream_id = self.transcript.append("assistant", "").id
+        self._stream_parts = []
+        self.chat_area.follow_bottom()
     
-    def _append_message(self, role: str, text: str, color: str):
-        """Mesaj ekle (formatlanmış)"""
-        cursor = self.chat_area.textCursor()
-        cursor.movePosition(QTextCursor.MoveOperation.End)
-        
-        # Role başlığı
-        format_role = QTextCharFormat()
-        format_role.setForeground(QColor(color))
-        format_role.setFontWeight(QFont.Weight.Bold)
-        format_role.setFontPointSize(11)
-        
-        cursor.insertText(f"\n{role}:\n", format_role)
-        
-        # Mesaj içeriği (basit markdown desteği)
-        formatted_text = self._format_text(text)
-        cursor.insertHtml(formatted_text)
-        
-        # Scroll to bottom
-        self.chat_area.setTextCursor(cursor)
-        self.chat_area.ensureCursorVisible()
+    def append_assistant_chunk(self, chunk: str):
+        """Stream parçasını ekle (görünüm en fazla STREAM_REFRESH_MS'de bir güncellenir)"""
+        if self._stream_id is None:
+            self.begin_assistant_stream()
+        self._stream_parts.append(chunk)
+        if not self._stream_timer.isActive():
+            self._stream_timer.start()
+    
+    def _flush_stream(self):
+        """Biriken stream metnini düz metin olarak göster (render stream bitince yapılır)"""
+        if self._stream_id is not None:
+            self.transcript.update_content(self._stream_id, "".join(self._stream_parts))
     
-    def _format_text(self, text: str) -> str:
-        """Metni formatla (basit markdown ve kod desteği)"""
-        # Kod bloklarını işle
-        code_pattern = r'```(\w+)?\n(.*?)```'
+    def end_assistant_stream(self, text: Optional[str] = None):
+        """Stream'i bitir; yalnızca bu mesaj formatlanmış haliyle değiştirilir"""
+        if self._stream_id is None:
+            if text:
+                self.add_assistant_message(text)
+            return
         
-        def replace_code(match):
-            lang = match.group(1) or ""
-            code = match.group(2)
-            
-            try:
-                if lang:
-                    lexer = get_lexer_by_name(lang, stripall=True)
-                else:
-                    lexer = guess_lexer_for_filename("temp.py", code)
-                formatter = HtmlFormatter(style='default', nowrap=True)
-                highlighted = highlight(code, lexer, formatter)
-                return f'<div style="background-color: #f4f4f4; padding: 10px; border-radius: 5px; margin: 5px 0;"><pre style="margin: 0;">{highlighted}</pre></div>'
-            except:
-                return f'<div style="background-color: #f4f4f4; padding: 10px; border-radius: 5px; margin: 5px 0;"><pre style="margin: 0;">{code}</pre></div>'
+        self._stream_timer.stop()
+        if text is None:
+            text = "".join(self._stream_parts)
+        self.messages.append({"role": "assistant", "content": text})
         
-        text = re.sub(code_pattern, replace_code, text, flags=re.DOTALL)
+        message = self.transcript.update_content(self._stream_id, text)
+        if message is not None:
+            self._render(message, urgent=True)
+        self._stream_id = None
+        self._stream_parts = []
+    
+    def is_streaming(self) -> bool:
+        """Aktif bir stream var mı"""
+        return self._stream_id is not None
+    
+    def add_system_message(self, text: str):
+        """Sistem mesajı ekle"""
+        self._append_message("system", text)
+    
+    def _append_message(self, role: str, text: str):
+        """Mesaj ekle (render arka planda; hazır olana kadar düz metin)"""
+        message = self.transcript.append(role, text)
+        self._render(message, urgent=True)
+        self.chat_area.follow_bottom()
+    
+    def _render(self, message, urgent: bool = False):
+        """Mesajı önbellekten uygula ya da render kuyruğuna ekle"""
+        rendered = self._renderer.cached(message.content)
+        if rendered is not None:
+            self.transcript.set_html(message.id, message.version, rendered)
+        else:
+            self._renderer.request(message.id, message.version, message.content, urgent=urgent)
+    
+    def _render_message(self, text: str, background: bool = True):
+        """Render thread'i için: (HTML, renklendirmesi süren kod blokları)
         
-        # Basit markdown
-        text = text.replace('\n', '<br>')
-        text = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', text)
-        text = re.sub(r'\*(.*?)\*', r'<i>\1</i>', text)
-        text = re.sub(r'`(.*?)`', r'<code style="background-color: #f0f0f0; padding: 2px 4px; border-radius: 3px;">\1</code>', text)
+        background=False ise kod blokları bu thread'de senkron renklendirilir.
+        """
+        if not background:
+            return self._format_text(text), []
+        pending = []
+        return self._format_text(text, pending), pending
+    
+    def _format_text(self, text: str, pending: Optional[List] = None) -> str:
+        """Metni formatla (markdown ve kod desteği)
         
-        return text
+        pending verilirse önbellekte olmayan kod blokları arka planda
+        renklendirilir, yerlerine düz metin konur ve işleri pending'e eklenir.
+        """
+        return self.markdown.render(text, pending)
     
     def _clear_chat(self):
         """Sohbeti temizle"""
-        self.chat_area.clear()
+        self._stream_timer.stop()
+        self._renderer.cancel_all()
+        self.transcript.clear()
+        self.chat_area.delegate.clear_cache()
         self.messages = []
+        self._stream_id = None
+        self._stream_parts = []
         self.add_system_message("Sohbet temizlendi.")
     
     def get_messages(self) -> list:
@@ -190,11 +246,17 @@ class ChatWidget(QWidget):
     def set_messages(self, messages: list):
         """Mesajları ayarla"""
         self._clear_chat()
+        items = []
         for msg in messages:
             role = msg.get("role", "user")
             content = msg.get("content", "")
-            if role == "user":
-                self.add_user_message(content)
-            elif role == "assistant":
-                self.add_assistant_message(content)
+            if role in ("user", "assistant"):
+                self.messages.append({"role": role, "content": content})
+                items.append((role, content))
+        
+        # Tek seferde ekle; render en alttaki (görünen) mesajlardan başlar
+        added = self.transcript.extend(items)
+        for message in reversed(added):
+            self._render(message)
+        self.chat_area.follow_bottom()
 
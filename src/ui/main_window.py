@@ -1,9 +1,14 @@
 """
 Ana pencere - Main window
 """
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from pathlib import Path
+
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QPushButton, QMenuBar, QStatusBar, QSplitter,
-                             QMessageBox, QFileDialog, QDialog)
+                             QMessageBox, QFileDialog, QDialog, QApplication)
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtGui import QAction, QFont
 
@@ -12,57 +17,153 @@ from .file_uploader import FileUploader
 from .chat_widget import ChatWidget
 from .settings_dialog import SettingsDialog
 from ..core.hf_api import HuggingFaceAPI
-from ..core.file_processor import FileProcessor
+from ..core.model_catalog import ModelCatalog
+from ..core.file_processor import FileProcessor, IMAGE_EXTENSIONS
+from ..core.page_fetcher import PageFetcher
+from ..core.extraction_cache import ExtractionCache
+from ..core.prompt_packer import PromptPacker
+from ..core.research_result import ResearchResult
+from ..core.retrieval import DocumentRetriever, NUMPY_AVAILABLE
 from ..core.web_search import WebSearch
 from ..core.history_manager import HistoryManager
 from ..core.export_manager import ExportManager
+from ..core.export_queue import ExportQueue, ExportJob
 from ..utils.config_manager import ConfigManager
+from ..utils.constants import (HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_POOL_BLOCK,
+                               RETRIEVAL_MIN_TOKENS, PAGE_FETCH_TOP_N)
+
+
+class ResearchCancelled(Exception):
+    """Araştırma kullanıcı tarafından iptal edildi"""
 
 
 class ResearchThread(QThread):
-    """Araştırma thread'i"""
-    finished = pyqtSignal(str)
+    """Araştırma thread'i
+    
+    Aşamalar: [dosyalar || web arama] -> prompt -> model. Dosya işleme ve web
+    arama birbirinden bağımsız olduğu için eşzamanlı çalışır; arama süresi
+    dosya işlemenin arkasına gizlenir. timings her aşamanın kendi süresini,
+    "ingest" ise eşzamanlı bölümün toplam (duvar saati) süresini tutar.
+    """
+    finished = pyqtSignal(object)  # ResearchResult
     error = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    chunk_received = pyqtSignal(str)
+    progress = pyqtSignal(int, int, str)
     
-    def __init__(self, hf_api, model, prompt, files, web_search_enabled):
+    def __init__(self, hf_api, model, prompt, files, web_search_enabled, stream=False, file_processor=None,
+                 retrieval_enabled=False, web_search=None, web_fanout=False, page_fetcher=None):
         super().__init__()
         self.hf_api = hf_api
         self.model = model
         self.prompt = prompt
         self.files = files
         self.web_search_enabled = web_search_enabled
-        self.file_processor = FileProcessor()
-        self.web_search = WebSearch()
+        self.stream = stream
+        self.retrieval_enabled = retrieval_enabled
+        self.web_fanout = web_fanout
+        # Verilirse ilk sonuçların sayfaları indirilip dosyalarla aynı bütçeye girer
+        self.page_fetcher = page_fetcher
+        self.file_processor = file_processor or FileProcessor()
+        self.web_search = web_search or WebSearch()
+        self._cancel_event = threading.Event()
+    
+    def cancel(self):
+        """Araştırmayı iptal et (aşama aralarında ve stream sırasında kontrol edilir)"""
+        self._cancel_event.set()
+    
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+    
+    def _check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise ResearchCancelled()
     
     def run(self):
         """Thread çalıştır"""
         try:
-            # Dosyaları işle
-            processed_files = []
-            image_files = []
+            result = ResearchResult(model=self.model, prompt=self.prompt, file_paths=list(self.files))
+            started = time.perf_counter()
+            
+            # Resim varsa multimodal yol kullanılır ve web arama yapılmaz;
+            # bu karar uzantıdan verilir ki arama dosyalarla birlikte başlayabilsin
+            has_images = any(Path(f).suffix.lower() in IMAGE_EXTENSIONS for f in self.files)
+            
+            # Web arama (opsiyonel) arka planda, dosya işleme bu thread'de
+            executor = None
+            search_future = None
+            if self.web_search_enabled and not has_images:
+                executor = ThreadPoolExecutor(max_workers=1)
+                search_future = executor.submit(self._search_and_fetch)
             
-            if self.files:
-                file_results = self.file_processor.process_multiple_files(self.files)
-                for result in file_results:
-                    if result.get("success"):
-                        if result.get("type") == "image":
-                            image_files.append(result.get("path"))
-                        else:
-                            processed_files.append(result)
+            try:
+                processed_files = []
+                image_files = []
+                
+                if self.files:
+                    file_results, elapsed = self._timed(
+                        self.file_processor.process_multiple_files,
+                        self.files,
+                        parallel=True,
+                        progress_callback=lambda done, total, path: self.progress.emit(done, total, path),
+                        cancel_event=self._cancel_event
+                    )
+                    result.timings["files"] = elapsed
+                    for file_result in file_results:
+                        result.processed_files.append(ResearchResult.summarize_file(file_result))
+                        if file_result.get("success"):
+                            if file_result.get("type") == "image":
+                                image_files.append(file_result.get("path"))
+                            else:
+                                processed_files.append(file_result)
+                self._check_cancelled()
+                
+                search_text = ""
+                if search_future is not None:
+                    search_results, pages, search_timings = self._wait_cancellable(search_future)
+                    result.timings.update(search_timings)
+                    if search_results:
+                        result.web_results = search_results
+                        search_text = self.web_search.format_results(search_results)
+                    result.fetched_pages = [ResearchResult.summarize_page(page) for page in pages]
+                    processed_files.extend(PageFetcher.to_prompt_sources(pages))
+            finally:
+                if executor is not None:
+                    # İptalde arama isteği arka planda biter; beklenmez
+                    executor.shutdown(wait=False, cancel_futures=True)
+            stage_started = self._mark(result, "ingest", started)
+            
+            # Prompt'u modelin bağlam penceresine sığacak şekilde hazırla
+            packer = PromptPacker(self.hf_api.get_context_length(self.model))
+            file_tokens = sum(packer.estimate_tokens(f.get("content", "")) for f in processed_files)
+            
+            # Büyük dokümanlarda yalnızca soruyla alakalı parçaları gönder
+            if self.retrieval_enabled and NUMPY_AVAILABLE and file_tokens > RETRIEVAL_MIN_TOKENS:
+                file_budget, _ = packer.split_budget(
+                    packer.available_tokens(self.prompt),
+                    file_tokens,
+                    packer.estimate_tokens(search_text)
+                )
+                processed_files = DocumentRetriever().select(
+                    processed_files, self.prompt, max_chars=packer.tokens_to_chars(file_budget)
+                )
+                file_tokens = sum(packer.estimate_tokens(f.get("content", "")) for f in processed_files)
+            file_budget, web_budget = packer.split_budget(
+                packer.available_tokens(self.prompt),
+                file_tokens,
+                packer.estimate_tokens(search_text)
+            )
             
-            # Prompt'u hazırla
             final_prompt = self.prompt
             if processed_files:
-                final_prompt = self.file_processor.format_for_prompt(processed_files, self.prompt)
-            
-            # Web arama (opsiyonel)
-            web_results = []
-            if self.web_search_enabled and not image_files:
-                search_results = self.web_search.search(self.prompt, max_results=5)
-                if search_results:
-                    web_results = search_results
-                    search_text = self.web_search.format_results(search_results)
-                    final_prompt = f"{final_prompt}\n\nWeb Arama Sonuçları:\n{search_text}"
+                final_prompt = self.file_processor.format_for_prompt(
+                    processed_files, self.prompt, max_tokens=file_budget, packer=packer
+                )
+            if search_text:
+                search_text = packer.truncate(search_text, web_budget)
+                final_prompt = f"{final_prompt}\n\nWeb Arama Sonuçları:\n{search_text}"
+            stage_started = self._mark(result, "prompt", stage_started)
+            self._check_cancelled()
             
             # API çağrısı
             if image_files:
@@ -80,10 +181,35 @@ class ResearchThread(QThread):
                         final_prompt,
                         image_files[0]
                     )
+            elif self.stream:
+                # Text generation (stream) - parçalar geldikçe UI'a gönder
+                messages = [{"role": "user", "content": final_prompt}]
+                parts = []
+                stream = self.hf_api.chat_completion_stream(self.model, messages)
+                try:
+                    for chunk in stream:
+                        if self._cancel_event.is_set():
+                            stream.close()
+                            raise ResearchCancelled()
+                        if not parts:
+                            result.timings["first_token"] = round(time.perf_counter() - stage_started, 3)
+                        parts.append(chunk)
+                        self.chunk_received.emit(chunk)
+                    response = {"generated_text": "".join(parts)}
+                except RuntimeError as e:
+                    # İlk parçadan önce başarısızsa (ör. yalnızca text-generation destekleyen
+                    # model) stream'siz yola dön; parça gösterildiyse metin tekrarlanmasın
+                    if parts:
+                        raise
+                    print(f"Stream başarısız, stream'siz istek deneniyor: {e}")
+                    response = self.hf_api.chat_completion(self.model, messages)
             else:
                 # Text generation
                 messages = [{"role": "user", "content": final_prompt}]
                 response = self.hf_api.chat_completion(self.model, messages)
+            self._check_cancelled()
+            self._mark(result, "model", stage_started)
+            result.timings["total"] = round(time.perf_counter() - started, 3)
             
             if response and "error" not in response:
                 # Response'u çıkar
@@ -94,37 +220,159 @@ class ResearchThread(QThread):
                 else:
                     result_text = str(response)
                 
-                self.finished.emit(result_text)
+                result.response = result_text
+                self.finished.emit(result)
             else:
                 error_msg = response.get("error", "Bilinmeyen hata") if isinstance(response, dict) else "API hatası"
                 self.error.emit(error_msg)
         
+        except ResearchCancelled:
+            self.cancelled.emit()
         except Exception as e:
             self.error.emit(f"Hata: {str(e)}")
+    
+    def _search_and_fetch(self):
+        """Web arama ve (açıksa) sayfa getirme; dosya işlemeyle eşzamanlı çalışır"""
+        search = self.web_search.search_many if self.web_fanout else self.web_search.search
+        search_results, elapsed = self._timed(search, self.prompt, 5)
+        timings = {"web_search": elapsed}
+        pages = []
+        if self.page_fetcher and search_results and not self._cancel_event.is_set():
+            urls = self.web_search.get_sources(search_results)[:PAGE_FETCH_TOP_N]
+            pages, timings["page_fetch"] = self._timed(self.page_fetcher.fetch_many, urls)
+        return search_results, pages, timings
+    
+    @staticmethod
+    def _timed(func, *args, **kwargs):
+        """Fonksiyonu çalıştır, (sonuç, süre) döndür"""
+        stage_started = time.perf_counter()
+        value = func(*args, **kwargs)
+        return value, round(time.perf_counter() - stage_started, 3)
+    
+    def _wait_cancellable(self, future):
+        """Future sonucunu iptal isteğini kontrol ederek bekle"""
+        while True:
+            self._check_cancelled()
+            try:
+                return future.result(timeout=0.2)
+            except FutureTimeoutError:
+                continue
+    
+    @staticmethod
+    def _mark(result: ResearchResult, stage: str, stage_started: float) -> float:
+        """Aşama süresini kaydet, sonraki aşamanın başlangıcını döndür"""
+        now = time.perf_counter()
+        result.timings[stage] = round(now - stage_started, 3)
+        return now
 
 
 class MainWindow(QMainWindow):
     """Ana pencere"""
     
+    # Export kuyruğu worker thread'lerinden gelir; slot ana thread'de çalışır
+    export_job_updated = pyqtSignal(object)
+    
     def __init__(self):
         super().__init__()
         self.config_manager = ConfigManager()
         self.hf_api = None
-        self.file_processor = FileProcessor()
-        self.web_search = WebSearch()
-        self.history_manager = HistoryManager()
-        self.export_manager = ExportManager()
+        # Alt sistemler ilk kullanımda oluşturulur; geçmiş arka planda yüklenir
+        self._model_catalog = None
+        self._model_catalog_lock = threading.Lock()
+        self._extraction_cache = None
+        self._file_processor = None
+        self._web_search = None
+        self._export_manager = None
+        self._export_queue = None
+        self._history_manager = None
+        self._history_loader = threading.Thread(target=self._load_history, daemon=True)
+        self._history_loader.start()
         
         self.current_files = []
+        self.last_result = None
         self.web_search_enabled = True
         self.history_enabled = True
         self.export_enabled = True
+        self.streaming_enabled = True
+        self.retrieval_enabled = True
+        self.web_fanout_enabled = True
+        self.page_fetch_enabled = False
+        self.page_fetcher = None
         
         self.init_ui()
         self.load_config()
         self.setWindowTitle("Tinlera Research Tool")
         self.setMinimumSize(1000, 700)
     
+    def _load_history(self):
+        """Geçmişi arka planda yükle (pencere beklemeden açılır)"""
+        try:
+            self._history_manager = HistoryManager(
+                backend=self.config_manager.load_config().get("history_backend", "json")
+            )
+        except Exception as e:
+            print(f"Geçmiş yükleme hatası: {e}")
+    
+    @property
+    def history_manager(self) -> HistoryManager:
+        """Geçmiş yöneticisi; arka plan yüklemesi bitmediyse bekler"""
+        if self._history_manager is None:
+            self._history_loader.join()
+            if self._history_manager is None:
+                # Arka plan yüklemesi başarısız oldu; hatayı burada göster
+                self._history_manager = HistoryManager(
+                    backend=self.config_manager.load_config().get("history_backend", "json")
+                )
+        return self._history_manager
+    
+    @property
+    def model_catalog(self) -> ModelCatalog:
+        # Model sorgu thread'inden de erişilir
+        with self._model_catalog_lock:
+            if self._model_catalog is None:
+                self._model_catalog = ModelCatalog()
+            return self._model_catalog
+    
+    @property
+    def extraction_cache(self) -> ExtractionCache:
+        if self._extraction_cache is None:
+            self._extraction_cache = ExtractionCache()
+        return self._extraction_cache
+    
+    @property
+    def file_processor(self) -> FileProcessor:
+        if self._file_processor is None:
+            self._file_processor = FileProcessor(cache=self.extraction_cache)
+            app = QApplication.instance()
+            if app is not None:
+                app.aboutToQuit.connect(self._file_processor.shutdown)
+        return self._file_processor
+    
+    @property
+    def web_search(self) -> WebSearch:
+        if self._web_search is None:
+            self._web_search = WebSearch(cache_dir="data/cache/web_search")
+            app = QApplication.instance()
+            if app is not None:
+                app.aboutToQuit.connect(self._web_search.shutdown)
+        return self._web_search
+    
+    @property
+    def export_manager(self) -> ExportManager:
+        if self._export_manager is None:
+            self._export_manager = ExportManager()
+        return self._export_manager
+    
+    @property
+    def export_queue(self) -> ExportQueue:
+        if self._export_queue is None:
+            self._export_queue = ExportQueue(self.export_manager, on_update=self.export_job_updated.emit)
+            self.export_job_updated.connect(self._on_export_job_updated)
+            app = QApplication.instance()
+            if app is not None:
+                app.aboutToQuit.connect(self._export_queue.shutdown)
+        return self._export_queue
+    
     def init_ui(self):
         """UI oluştur"""
         # Menü çubuğu
@@ -137,6 +385,14 @@ class MainWindow(QMainWindow):
         export_action.triggered.connect(self._export_research)
         file_menu.addAction(export_action)
         
+        export_all_action = QAction("Tüm Geçmişi Export Et", self)
+        export_all_action.triggered.connect(self._export_all_history)
+        file_menu.addAction(export_all_action)
+        
+        cancel_exports_action = QAction("Export'ları İptal Et", self)
+        cancel_exports_action.triggered.connect(self._cancel_exports)
+        file_menu.addAction(cancel_exports_action)
+        
         file_menu.addSeparator()
         
         exit_action = QAction("Çıkış", self)
@@ -150,6 +406,10 @@ class MainWindow(QMainWindow):
         settings_action.triggered.connect(self._show_settings)
         settings_menu.addAction(settings_action)
         
+        cache_action = QAction("Dosya Önbelleği", self)
+        cache_action.triggered.connect(self._show_cache)
+        settings_menu.addAction(cache_action)
+        
         # Geçmiş menüsü
         history_menu = menubar.addMenu("Geçmiş")
         
@@ -207,7 +467,7 @@ class MainWindow(QMainWindow):
         left_layout = QVBoxLayout()
         
         # Model seçici (placeholder, sonra gerçek widget eklenecek)
-        self.model_selector = ModelSelector(None, self)
+        self.model_selector = ModelSelector(None, self, catalog_getter=lambda: self.model_catalog)
         left_layout.addWidget(self.model_selector)
         
         # Dosya yükleyici
@@ -222,6 +482,7 @@ class MainWindow(QMainWindow):
         # Sağ panel (sohbet)
         self.chat_widget = ChatWidget(self)
         self.chat_widget.message_sent.connect(self._on_message_sent)
+        self.chat_widget.stop_requested.connect(self._cancel_research)
         splitter.addWidget(self.chat_widget)
         
         splitter.setStretchFactor(0, 1)
@@ -236,12 +497,25 @@ class MainWindow(QMainWindow):
         """Config yükle"""
         token = self.config_manager.get_token()
         if token:
-            self.hf_api = HuggingFaceAPI(token)
-            self.model_selector.hf_api = self.hf_api
+            pool_settings = self.config_manager.load_config().get("http_pool", {})
+            if self.hf_api:
+                self.hf_api.close()
+            self.hf_api = HuggingFaceAPI(
+                token,
+                pool_connections=pool_settings.get("connections", HTTP_POOL_CONNECTIONS),
+                pool_maxsize=pool_settings.get("maxsize", HTTP_POOL_MAXSIZE),
+                pool_block=pool_settings.get("block", HTTP_POOL_BLOCK),
+                catalog_getter=lambda: self.model_catalog,
+            )
+            self.model_selector.set_api(self.hf_api)
         
         self.web_search_enabled = self.config_manager.get_feature_enabled("web_search")
         self.history_enabled = self.config_manager.get_feature_enabled("history")
         self.export_enabled = self.config_manager.get_feature_enabled("export")
+        self.streaming_enabled = self.config_manager.get_feature_enabled("streaming")
+        self.retrieval_enabled = self.config_manager.get_feature_enabled("retrieval")
+        self.web_fanout_enabled = self.config_manager.get_feature_enabled("web_fanout")
+        self.page_fetch_enabled = self.config_manager.get_feature_enabled("page_fetch")
         
         self.web_search_toggle.setChecked(self.web_search_enabled)
         self.history_toggle.setChecked(self.history_enabled)
@@ -300,45 +574,96 @@ class MainWindow(QMainWindow):
         
         # Thread başlat
         self.statusBar().showMessage("Araştırma yapılıyor...")
-        self.chat_widget.send_btn.setEnabled(False)
+        self._set_research_running(True)
         
         self.research_thread = ResearchThread(
             self.hf_api,
             model,
             message,
             self.current_files,
-            self.web_search_enabled
+            self.web_search_enabled,
+            stream=self.streaming_enabled,
+            file_processor=self.file_processor,
+            retrieval_enabled=self.retrieval_enabled,
+            web_search=self.web_search,
+            web_fanout=self.web_fanout_enabled,
+            page_fetcher=self._get_page_fetcher() if self.page_fetch_enabled else None
         )
+        self.research_thread.progress.connect(self._on_research_progress)
+        self.research_thread.chunk_received.connect(self._on_research_chunk)
         self.research_thread.finished.connect(self._on_research_finished)
         self.research_thread.error.connect(self._on_research_error)
+        self.research_thread.cancelled.connect(self._on_research_cancelled)
         self.research_thread.start()
     
-    def _on_research_finished(self, response: str):
+    def _get_page_fetcher(self) -> PageFetcher:
+        """Sayfa getiriciyi ilk kullanımda oluştur (bağlantı havuzu araştırmalar arasında paylaşılır)"""
+        if self.page_fetcher is None:
+            self.page_fetcher = PageFetcher()
+        return self.page_fetcher
+    
+    def _set_research_running(self, running: bool):
+        """Gönder/Durdur butonlarını araştırma durumuna göre ayarla"""
+        self.chat_widget.send_btn.setEnabled(not running)
+        self.chat_widget.stop_btn.setEnabled(running)
+    
+    def _cancel_research(self):
+        """Çalışan araştırmayı iptal et"""
+        thread = getattr(self, "research_thread", None)
+        if thread and thread.isRunning():
+            thread.cancel()
+            self.chat_widget.stop_btn.setEnabled(False)
+            self.statusBar().showMessage("İptal ediliyor...")
+    
+    def _on_research_progress(self, done: int, total: int, path: str):
+        """Dosya işleme ilerlemesi"""
+        self.statusBar().showMessage(f"Dosyalar işleniyor ({done}/{total}): {Path(path).name}")
+    
+    def _on_research_chunk(self, chunk: str):
+        """Stream parçası geldiğinde"""
+        if not self.chat_widget.is_streaming():
+            self.chat_widget.begin_assistant_stream()
+            self.statusBar().showMessage("Yanıt alınıyor...")
+        self.chat_widget.append_assistant_chunk(chunk)
+    
+    def _on_research_finished(self, result: ResearchResult):
         """Araştırma tamamlandığında"""
-        self.chat_widget.add_assistant_message(response)
-        self.statusBar().showMessage("Hazır")
-        self.chat_widget.send_btn.setEnabled(True)
-        
-        # Geçmişe kaydet
+        if self.chat_widget.is_streaming():
+            self.chat_widget.end_assistant_stream(result.response)
+        else:
+            self.chat_widget.add_assistant_message(result.response)
+        self.statusBar().showMessage(f"Hazır ({result.timings.get('total', 0):.1f} sn)")
+        self._set_research_running(False)
+        self.last_result = result
+        
+        # Geçmişe kaydet (modelin gördüğü arama sonuçlarıyla)
         if self.history_enabled:
-            model = self.model_selector.get_selected_model()
-            web_results = []
-            if self.web_search_enabled:
-                web_results = self.web_search.search(self.chat_widget.messages[-2]["content"], max_results=5)
-            
             self.history_manager.add_entry(
-                model,
-                self.chat_widget.messages[-2]["content"],
-                response,
-                self.current_files,
-                web_results
+                result.model,
+                result.prompt,
+                result.response,
+                result.file_paths,
+                result.web_results,
+                processed_files=result.processed_files,
+                timings=result.timings,
+                fetched_pages=result.fetched_pages
             )
     
     def _on_research_error(self, error: str):
         """Araştırma hatası"""
+        if self.chat_widget.is_streaming():
+            self.chat_widget.end_assistant_stream()
         self.chat_widget.add_system_message(f"Hata: {error}")
         self.statusBar().showMessage("Hata oluştu")
-        self.chat_widget.send_btn.setEnabled(True)
+        self._set_research_running(False)
+    
+    def _on_research_cancelled(self):
+        """Araştırma iptal edildi"""
+        if self.chat_widget.is_streaming():
+            self.chat_widget.end_assistant_stream()
+        self.chat_widget.add_system_message("Araştırma iptal edildi.")
+        self.statusBar().showMessage("İptal edildi")
+        self._set_research_running(False)
     
     def _show_settings(self):
         """Ayarlar penceresini göster"""
@@ -347,6 +672,23 @@ class MainWindow(QMainWindow):
             # Config'i yeniden yükle
             self.load_config()
     
+    def _show_cache(self):
+        """Dosya çıkarım önbelleğini göster / temizle"""
+        stats = self.extraction_cache.stats()
+        reply = QMessageBox.question(
+            self,
+            "Dosya Önbelleği",
+            f"Kayıt: {stats['entries']}\n"
+            f"Boyut: {stats['bytes'] / (1024 * 1024):.1f} / {stats['max_bytes'] / (1024 * 1024):.0f} MB\n"
+            f"İsabet / Iska: {stats['hits']} / {stats['misses']}\n\n"
+            "Önbelleği temizlemek ister misiniz?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        
+        if reply == QMessageBox.StandardButton.Yes:
+            self.extraction_cache.clear()
+            self.statusBar().showMessage("Dosya önbelleği temizlendi")
+    
     def _view_history(self):
         """Geçmişi görüntüle"""
         from PyQt6.QtWidgets import QDialog, QVBoxLayout, QListWidget, QTextEdit, QPushButton
@@ -445,80 +787,101 @@ class MainWindow(QMainWindow):
             user_msg = self.chat_widget.messages[-2]
             assistant_msg = self.chat_widget.messages[-1]
             
-            # Geçmişten web search sonuçlarını al
-            web_results = []
-            if self.history_manager.history:
-                last_entry = self.history_manager.history[-1]
-                web_results = last_entry.get("web_search_results", [])
-            
-            entry = {
-                "timestamp": self.history_manager.history[-1]["timestamp"] if self.history_manager.history else "",
-                "model": self.model_selector.get_selected_model(),
-                "prompt": user_msg.get("content", ""),
-                "response": assistant_msg.get("content", ""),
-                "files": self.current_files,
-                "web_search_results": web_results
-            }
-            
-            # Format seç dialog
-            from PyQt6.QtWidgets import QDialog, QVBoxLayout, QPushButton, QLabel
-            
-            format_dialog = QDialog(self)
-            format_dialog.setWindowTitle("Export Formatı Seç")
-            format_dialog.setMinimumWidth(300)
-            
-            layout = QVBoxLayout()
-            layout.addWidget(QLabel("Export formatını seçin:"))
-            
-            selected_format = {"format": "txt"}
-            
-            def select_txt():
-                selected_format["format"] = "txt"
-                format_dialog.accept()
-            
-            def select_md():
-                selected_format["format"] = "markdown"
-                format_dialog.accept()
-            
-            def select_docx():
-                selected_format["format"] = "docx"
-                format_dialog.accept()
-            
-            txt_btn = QPushButton("TXT (Metin Dosyası)")
-            txt_btn.clicked.connect(select_txt)
-            layout.addWidget(txt_btn)
-            
-            md_btn = QPushButton("Markdown")
-            md_btn.clicked.connect(select_md)
-            layout.addWidget(md_btn)
-            
-            docx_btn = QPushButton("DOCX (Word Belgesi)")
-            docx_btn.clicked.connect(select_docx)
-            layout.addWidget(docx_btn)
-            
-            cancel_btn = QPushButton("İptal")
-            cancel_btn.clicked.connect(format_dialog.reject)
-            layout.addWidget(cancel_btn)
-            
-            format_dialog.setLayout(layout)
+            if self.last_result and self.last_result.response == assistant_msg.get("content", ""):
+                # Son araştırmanın yapılandırılmış sonucu
+                entry = self.last_result.to_entry()
+            else:
+                # Geçmişten yüklenen sohbet: son kayıttan tamamla
+                last_entry = self.history_manager.get_last_entry() or {}
+                entry = {
+                    "timestamp": last_entry.get("timestamp", ""),
+                    "model": self.model_selector.get_selected_model(),
+                    "prompt": user_msg.get("content", ""),
+                    "response": assistant_msg.get("content", ""),
+                    "files": self.current_files,
+                    "web_search_results": last_entry.get("web_search_results", [])
+                }
             
-            if format_dialog.exec():
-                format_type = selected_format["format"]
-                try:
-                    if format_type == "txt":
-                        filepath = self.export_manager.export_to_txt(entry)
-                    elif format_type == "markdown":
-                        filepath = self.export_manager.export_to_markdown(entry)
-                    else:
-                        filepath = self.export_manager.export_to_docx(entry)
-                    
-                    QMessageBox.information(
-                        self,
-                        "Başarılı",
-                        f"Dosya kaydedildi:\n{filepath}"
-                    )
-                except Exception as e:
-                    QMessageBox.critical(self, "Hata", f"Export hatası: {str(e)}")
+            format_type = self._choose_export_format()
+            if format_type:
+                # python-docx uzun belgelerde yavaş; export arka planda çalışır
+                self.export_queue.submit_entry(entry, format_type)
+    
+    def _export_all_history(self):
+        """Tüm geçmişi arka planda, akış halinde export et"""
+        if not self.export_enabled:
+            QMessageBox.warning(self, "Uyarı", "Export özelliği kapalı.")
+            return
+        
+        total = self.history_manager.count()
+        if not total:
+            QMessageBox.warning(self, "Uyarı", "Export edilecek kayıt yok.")
+            return
+        
+        format_type = self._choose_export_format()
+        if format_type:
+            self.export_queue.submit_batch(self.history_manager.iter_entries(), format_type, total=total,
+                                           description="Tüm geçmiş")
+    
+    def _cancel_exports(self):
+        """Sıradaki ve çalışan export işlerini iptal et"""
+        # Kuyruk hiç kullanılmadıysa yalnızca iptal için oluşturulmaz
+        if self._export_queue is None or not self._export_queue.cancel_all():
+            self.statusBar().showMessage("İptal edilecek export yok")
+    
+    def _choose_export_format(self):
+        """Export formatı seçme dialog'u; iptal edilirse None"""
+        from PyQt6.QtWidgets import QDialog, QVBoxLayout, QPushButton, QLabel
+        
+        format_dialog = QDialog(self)
+        format_dialog.setWindowTitle("Export Formatı Seç")
+        format_dialog.setMinimumWidth(300)
+        
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("Export formatını seçin:"))
+        
+        selected_format = {"format": "txt"}
+        
+        def select(format_type):
+            selected_format["format"] = format_type
+            format_dialog.accept()
+        
+        for label, format_type in (("TXT (Metin Dosyası)", "txt"), ("Markdown", "markdown"),
+                                   ("HTML (Web Sayfası)", "html"), ("DOCX (Word Belgesi)", "docx")):
+            button = QPushButton(label)
+            button.clicked.connect(lambda _checked=False, f=format_type: select(f))
+            layout.addWidget(button)
+        
+        cancel_btn = QPushButton("İptal")
+        cancel_btn.clicked.connect(format_dialog.reject)
+        layout.addWidget(cancel_btn)
+        
+        format_dialog.setLayout(layout)
+        
+        return selected_format["format"] if format_dialog.exec() else None
+    
+    def _on_export_job_updated(self, job: ExportJob):
+        """Export işi ilerledi / bitti (ana thread'de)"""
+        if job.status == "queued":
+            self.statusBar().showMessage(f"Export sıraya alındı: {job.description}")
+        elif job.status == "running":
+            if job.total:
+                self.statusBar().showMessage(f"Export: {job.description} ({job.done}/{job.total})")
+            else:
+                self.statusBar().showMessage(f"Export: {job.description} ({job.done})")
+        elif job.status == "done":
+            self.statusBar().showMessage(f"Export tamamlandı: {job.description}")
+            files = "\n".join(job.paths)
+            QMessageBox.information(
+                self,
+                "Başarılı",
+                f"Dosya kaydedildi:\n{files}"
+            )
+        elif job.status == "cancelled":
+            self.statusBar().showMessage(f"Export iptal edildi: {job.description}")
+        elif job.status == "failed":
+            self.statusBar().showMessage(f"Export başarısız: {job.description}")
+            QMessageBox.critical(self, "Hata", f"Export hatası: {job.error}")
     
     def _show_about(self):
         """Hakkında"""
@@ -1,13 +1,109 @@
 """
 Model seçici widget - Dropdown + arama
 """
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QComboBox, 
-                             QLineEdit, QLabel, QPushButton, QTextEdit)
-from PyQt6.QtCore import Qt, pyqtSignal
+                             QLineEdit, QLabel, QPushButton, QTextEdit, QApplication)
+from PyQt6.QtCore import Qt, pyqtSignal, QThread, QTimer
 from PyQt6.QtGui import QFont
 
-from ..utils.constants import POPULAR_MODELS
+from ..utils.constants import (POPULAR_MODELS, MODEL_INFO_DEBOUNCE_MS, MODEL_SEARCH_DEBOUNCE_MS,
+                               MODEL_SEARCH_MIN_CHARS, MODEL_CATALOG_DEBOUNCE_MS,
+                               MODEL_LOOKUP_STOP_TIMEOUT_MS)
 from ..core.hf_api import HuggingFaceAPI
+from ..core.model_catalog import ModelCatalog
+
+# Zamanında durmayan thread'ler; üst widget silinirken çalışan QThread yok
+# edilmesin diye process sonuna kadar burada tutulur
+_DETACHED_WORKERS = []
+
+
+class ModelLookupWorker(QThread):
+    """
+    Model bilgisi ve arama isteklerini arka planda çalıştıran tek thread.
+    
+    Her tür ("info", "search") için yalnızca en son istek tutulur: henüz
+    başlamamış eski istekler hiç çalıştırılmaz, çalışırken yenisi gelen
+    isteklerin sonucu da yayınlanmaz. Sonuçlar istek numarasıyla döner;
+    widget yalnızca son numaralı sonucu uygular.
+    """
+    info_ready = pyqtSignal(int, str, object)    # istek no, model, bilgi (dict / None)
+    search_ready = pyqtSignal(int, str, object)  # istek no, sorgu, model listesi
+    
+    def __init__(self, api_getter: Callable[[], Optional[HuggingFaceAPI]], parent=None):
+        super().__init__(parent)
+        self._api_getter = api_getter
+        self._condition = threading.Condition()
+        self._pending: Dict[str, Tuple[int, str]] = {}
+        self._latest: Dict[str, int] = {"info": 0, "search": 0}
+        self._stopping = False
+    
+    def request(self, kind: str, argument: str) -> int:
+        """İstek ekle (aynı türdeki bekleyen isteğin yerine geçer), istek no döndür"""
+        with self._condition:
+            self._latest[kind] += 1
+            self._pending[kind] = (self._latest[kind], argument)
+            self._condition.notify()
+            return self._latest[kind]
+    
+    def cancel(self, kind: str):
+        """Bekleyen isteği düşür ve çalışan isteğin sonucunu geçersiz kıl"""
+        with self._condition:
+            self._latest[kind] += 1
+            self._pending.pop(kind, None)
+    
+    def is_latest(self, kind: str, request_id: int) -> bool:
+        with self._condition:
+            return self._latest[kind] == request_id
+    
+    def stop(self, timeout_ms: int = MODEL_LOOKUP_STOP_TIMEOUT_MS) -> bool:
+        """Thread'i durdur; çalışan HTTP isteği en fazla timeout_ms beklenir
+        
+        Süre dolarsa kapanış bekletilmez: thread üst nesnesinden ayrılır,
+        sonucu yayınlanmaz ve process çıkışında sonlanır.
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self.wait(timeout_ms):
+            return True
+        print("Model sorgu thread'i zamanında durmadı, beklenmeden kapatılıyor")
+        self.setParent(None)
+        _DETACHED_WORKERS.append(self)
+        return False
+    
+    def run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                # Seçim bilgisi aramadan önce gelir (kullanıcı bunu bekliyor)
+                kind = "info" if "info" in self._pending else "search"
+                request_id, argument = self._pending.pop(kind)
+            
+            api = self._api_getter()
+            try:
+                if kind == "info":
+                    result = api.get_model_info(argument) if api else None
+                else:
+                    result = api.search_models(argument) if api else []
+            except Exception as e:
+                print(f"Model {'bilgisi' if kind == 'info' else 'araması'} hatası: {e}")
+                result = None if kind == "info" else []
+            
+            with self._condition:
+                if self._stopping:
+                    return
+            if not self.is_latest(kind, request_id):
+                continue
+            if kind == "info":
+                self.info_ready.emit(request_id, argument, result)
+            else:
+                self.search_ready.emit(request_id, argument, result)
 
 
 class ModelSelector(QWidget):
@@ -16,10 +112,40 @@ class ModelSelector(QWidget):
     model_changed = pyqtSignal(str)
     model_searched = pyqtSignal(str)
     
-    def __init__(self, hf_api: HuggingFaceAPI, parent=None):
+    def __init__(self, hf_api: HuggingFaceAPI, parent=None,
+                 catalog_getter: Optional[Callable[[], Optional[ModelCatalog]]] = None):
         super().__init__(parent)
         self.hf_api = hf_api
+        # Daha önce Hub'da görülen modeller; yazarken ve çevrimdışı öneri için
+        # (katalog ilk kullanımda açılır)
+        self._catalog_getter = catalog_getter
         self.all_models = POPULAR_MODELS.copy()
+        
+        # Hub istekleri arka planda; hızlı değişikliklerde yalnızca sonuncusu işlenir
+        self._worker = ModelLookupWorker(lambda: self.hf_api, self)
+        self._worker.info_ready.connect(self._on_info_ready)
+        self._worker.search_ready.connect(self._on_search_ready)
+        self._worker.start()
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self._worker.stop)
+        
+        self._info_timer = QTimer(self)
+        self._info_timer.setSingleShot(True)
+        self._info_timer.setInterval(MODEL_INFO_DEBOUNCE_MS)
+        self._info_timer.timeout.connect(self._request_model_info)
+        
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(MODEL_SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self._do_search)
+        
+        # Yerel katalog her tuşta değil, yazma kısa süre durunca sorgulanır
+        self._catalog_timer = QTimer(self)
+        self._catalog_timer.setSingleShot(True)
+        self._catalog_timer.setInterval(MODEL_CATALOG_DEBOUNCE_MS)
+        self._catalog_timer.timeout.connect(self._add_catalog_matches)
+        
         self.init_ui()
     
     def init_ui(self):
@@ -67,6 +193,16 @@ class ModelSelector(QWidget):
         # İlk model bilgisini yükle
         self._load_model_info(self.all_models[0] if self.all_models else "")
     
+    @property
+    def catalog(self) -> Optional[ModelCatalog]:
+        """Model kataloğu (yoksa None)"""
+        return self._catalog_getter() if self._catalog_getter else None
+    
+    def set_api(self, hf_api: Optional[HuggingFaceAPI]):
+        """API istemcisini değiştir ve seçili modelin bilgisini yeniden yükle"""
+        self.hf_api = hf_api
+        self._load_model_info(self.get_selected_model())
+    
     def _on_model_changed(self, model: str):
         """Model değiştiğinde"""
         if model:
@@ -74,12 +210,18 @@ class ModelSelector(QWidget):
             self._load_model_info(model)
     
     def _on_search(self, text: str):
-        """Arama metni değiştiğinde filtrele"""
+        """Arama metni değiştiğinde filtrele (Hub araması yazma durunca yapılır)"""
+        self._search_timer.stop()
+        self._catalog_timer.stop()
         if not text:
+            self._worker.cancel("search")
             self.model_combo.clear()
             self.model_combo.addItems(self.all_models)
             return
         
+        if len(text.strip()) >= MODEL_SEARCH_MIN_CHARS:
+            self._search_timer.start()
+        
         filtered = [m for m in self.all_models if text.lower() in m.lower()]
         current_text = self.model_combo.currentText()
         self.model_combo.clear()
@@ -87,24 +229,52 @@ class ModelSelector(QWidget):
             self.model_combo.addItems(filtered)
         else:
             self.model_combo.addItem(text)  # Kullanıcı yazdığı modeli ekle
+        if self._catalog_getter:
+            self._catalog_timer.start()
+    
+    def _add_catalog_matches(self):
+        """Yazma durunca yerel katalogdaki eşleşmeleri listeye ekle"""
+        text = self.search_input.text()
+        catalog = self.catalog
+        if not text or catalog is None:
+            return
+        try:
+            matches = [m["id"] for m in catalog.search(text, limit=20)]
+        except Exception as e:
+            print(f"Model kataloğu arama hatası: {e}")
+            return
+        shown = [self.model_combo.itemText(i) for i in range(self.model_combo.count())]
+        if shown == [text] and text not in self.all_models:
+            # Yalnızca yazılan metin vardı; katalog eşleşmeleri onun yerine geçer
+            if not matches:
+                return
+            self.model_combo.clear()
+            shown = []
+        self.model_combo.addItems([m for m in matches if m not in shown])
     
     def _do_search(self):
-        """Model araması yap"""
-        query = self.search_input.text()
+        """Model araması yap (arka planda)"""
+        self._search_timer.stop()
+        query = self.search_input.text().strip()
         if not query:
             return
         
         self.model_searched.emit(query)
         
-        # HuggingFace'den model ara
-        if self.hf_api and self.hf_api.token:
-            models = self.hf_api.search_models(query)
-            if models:
-                model_names = [m.get("id", "") for m in models[:20]]  # İlk 20
-                self.model_combo.clear()
-                self.model_combo.addItems(model_names)
-                if model_names:
-                    self.model_combo.setCurrentIndex(0)
+        # HuggingFace'den model ara (token yoksa API yerel kataloğa düşer)
+        if self.hf_api:
+            self._worker.request("search", query)
+    
+    def _on_search_ready(self, request_id: int, query: str, models):
+        """Arama sonucu geldiğinde (eski sorguların sonuçları yok sayılır)"""
+        if not self._worker.is_latest("search", request_id) or query != self.search_input.text().strip():
+            return
+        if models:
+            model_names = [m.get("id", "") for m in models[:20]]  # İlk 20
+            self.model_combo.clear()
+            self.model_combo.addItems(model_names)
+            if model_names:
+                self.model_combo.setCurrentIndex(0)
     
     def _refresh_models(self):
         """Model listesini yenile"""
@@ -115,26 +285,49 @@ class ModelSelector(QWidget):
             self.model_combo.setCurrentIndex(0)
     
     def _load_model_info(self, model: str):
-        """Model bilgisini yükle"""
+        """Model bilgisini yükle (ok tuşlarıyla hızlı gezinmede yalnızca son seçim sorgulanır)"""
+        self._info_timer.stop()
         if not model or not self.hf_api or not self.hf_api.token:
+            self._worker.cancel("info")
             self.info_label.setText("Model bilgisi yüklenemiyor (token gerekli)")
+            if model and self._catalog_getter:
+                # Çevrimdışı bilgi de bekleme sonrası katalogdan okunur
+                self._info_timer.start()
             return
         
         self.info_label.setText("Yükleniyor...")
-        
-        # Async olarak yükle (basit yaklaşım)
-        try:
-            info = self.hf_api.get_model_info(model)
-            if info:
-                downloads = info.get("downloads", 0)
-                tags = ", ".join(info.get("tags", [])[:5])
-                self.info_label.setText(
-                    f"İndirmeler: {downloads:,} | Etiketler: {tags}"
-                )
-            else:
-                self.info_label.setText(f"Model: {model}")
-        except Exception as e:
-            self.info_label.setText(f"Model: {model} (bilgi yüklenemedi)")
+        self._info_timer.start()
+    
+    def _request_model_info(self):
+        """Bekleme süresi dolunca seçili modelin bilgisini iste"""
+        model = self.get_selected_model()
+        if not model:
+            return
+        if self.hf_api and self.hf_api.token:
+            self._worker.request("info", model)
+            return
+        # Çevrimdışı: katalogdaki (bayat olabilecek) bilgiyi göster
+        catalog = self.catalog
+        info = catalog.get_info(model)[0] if catalog else None
+        if info:
+            self._show_info(info)
+    
+    def _on_info_ready(self, request_id: int, model: str, info):
+        """Model bilgisi geldiğinde (yalnızca hâlâ seçili model için)"""
+        if not self._worker.is_latest("info", request_id) or model != self.get_selected_model():
+            return
+        if info:
+            self._show_info(info)
+        else:
+            self.info_label.setText(f"Model: {model}")
+    
+    def _show_info(self, info: Dict):
+        """Model bilgisini etikete yaz"""
+        downloads = info.get("downloads", 0)
+        tags = ", ".join(info.get("tags", [])[:5])
+        self.info_label.setText(
+            f"İndirmeler: {downloads:,} | Etiketler: {tags}"
+        )
     
     def get_selected_model(self) -> str:
         """Seçili modeli al"""
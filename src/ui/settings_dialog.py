@@ -58,6 +58,22 @@ class SettingsDialog(QDialog):
         self.export_cb.setToolTip("Araştırma sonuçlarını export et")
         features_layout.addWidget(self.export_cb)
         
+        self.streaming_cb = QCheckBox("Akış Modu (Streaming)")
+        self.streaming_cb.setToolTip("Yanıtı model ürettikçe parça parça göster")
+        features_layout.addWidget(self.streaming_cb)
+        
+        self.retrieval_cb = QCheckBox("Akıllı Doküman Seçimi")
+        self.retrieval_cb.setToolTip("Büyük dosyalarda yalnızca soruyla alakalı bölümleri gönder")
+        features_layout.addWidget(self.retrieval_cb)
+        
+        self.web_fanout_cb = QCheckBox("Çoklu Web Sorgusu")
+        self.web_fanout_cb.setToolTip("Sorudan birkaç alt sorgu türetip paralel ara, sonuçları birleştir")
+        features_layout.addWidget(self.web_fanout_cb)
+        
+        self.page_fetch_cb = QCheckBox("Sayfa İçeriklerini Getir")
+        self.page_fetch_cb.setToolTip("İlk arama sonuçlarının sayfalarını indirip metnini modele gönder")
+        features_layout.addWidget(self.page_fetch_cb)
+        
         features_group.setLayout(features_layout)
         layout.addWidget(features_group)
         
@@ -112,6 +128,18 @@ class SettingsDialog(QDialog):
         self.export_cb.setChecked(
             self.config_manager.get_feature_enabled("export")
         )
+        self.streaming_cb.setChecked(
+            self.config_manager.get_feature_enabled("streaming")
+        )
+        self.retrieval_cb.setChecked(
+            self.config_manager.get_feature_enabled("retrieval")
+        )
+        self.web_fanout_cb.setChecked(
+            self.config_manager.get_feature_enabled("web_fanout")
+        )
+        self.page_fetch_cb.setChecked(
+            self.config_manager.get_feature_enabled("page_fetch")
+        )
     
     def _save_settings(self):
         """Ayarları kaydet"""
@@ -124,10 +152,16 @@ class SettingsDialog(QDialog):
                 "HuggingFace token'ı genellikle 'hf_' ile başlar. Lütfen kontrol edin."
             )
         
-        self.config_manager.set_token(token)
-        self.config_manager.set_feature_enabled("web_search", self.web_search_cb.isChecked())
-        self.config_manager.set_feature_enabled("history", self.history_cb.isChecked())
-        self.config_manager.set_feature_enabled("export", self.export_cb.isChecked())
+        # Tüm değişiklikler tek atomik yazımla kaydedilir
+        with self.config_manager.transaction():
+            self.config_manager.set_token(token)
+            self.config_manager.set_feature_enabled("web_search", self.web_search_cb.isChecked())
+            self.config_manager.set_feature_enabled("history", self.history_cb.isChecked())
+            self.config_manager.set_feature_enabled("export", self.export_cb.isChecked())
+            self.config_manager.set_feature_enabled("streaming", self.streaming_cb.isChecked())
+            self.config_manager.set_feature_enabled("retrieval", self.retrieval_cb.isChecked())
+            self.config_manager.set_feature_enabled("web_fanout", self.web_fanout_cb.isChecked())
+            self.config_manager.set_feature_enabled("page_fetch", self.page_fetch_cb.isChecked())
         
         QMessageBox.information(self, "Başarılı", "Ayarlar kaydedildi!")
         self.accept()
@@ -0,0 +1,442 @@
+"""
+Sohbet dökümü - Mesaj modeli, yalnızca görünen mesajları yerleştiren görünüm ve arka plan render thread'i
+"""
+import hashlib
+import html
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PyQt6.QtWidgets import (QListView, QStyledItemDelegate, QStyle, QAbstractItemView, QApplication,
+                             QTextBrowser, QFrame)
+from PyQt6.QtCore import (Qt, QAbstractListModel, QModelIndex, QPersistentModelIndex, QSize, QThread,
+                          QTimer, pyqtSignal)
+from PyQt6.QtGui import QTextDocument, QAbstractTextDocumentLayout, QAction, QKeySequence
+
+from ..utils.constants import TRANSCRIPT_HTML_CACHE_SIZE, TRANSCRIPT_DOC_CACHE_SIZE
+
+# Rol -> (başlık, renk)
+ROLE_STYLES = {
+    "user": ("Kullanıcı", "#2196F3"),
+    "assistant": ("Asistan", "#4CAF50"),
+    "system": ("Sistem", "#FF9800"),
+}
+
+# Delegate'in önbellek anahtarı: (mesaj id, sürüm, render edildi mi)
+MessageKeyRole = Qt.ItemDataRole.UserRole + 1
+HtmlRole = Qt.ItemDataRole.UserRole + 2
+
+
+@dataclass
+class TranscriptMessage:
+    """Dökümdeki tek mesaj"""
+    id: int
+    role: str
+    content: str
+    # İçerik her değiştiğinde artar; eski sürümün render sonucu uygulanmaz
+    version: int = 0
+    # Aynı sürüm için her set_html'de artar: yer tutucu (Pygments beklenirken) ve
+    # renklendirilmiş HTML farklı anahtar alır, delegate eski belgeyi kullanmaz
+    render: int = 0
+    # Render edilmiş gövde (None: henüz render edilmedi, düz metin gösterilir)
+    html: Optional[str] = None
+
+
+def plain_html(text: str) -> str:
+    """Render beklenirken gösterilecek düz metin"""
+    return f'<div style="white-space: pre-wrap;">{html.escape(text)}</div>'
+
+
+def message_html(message: TranscriptMessage) -> str:
+    """Rol başlığı + gövde"""
+    label, color = ROLE_STYLES.get(message.role, (message.role, "#666"))
+    body = message.html if message.html is not None else plain_html(message.content)
+    return (f'<p style="color: {color}; font-weight: bold; font-size: 11pt; margin: 0 0 4px 0;">'
+            f'{label}:</p>{body}')
+
+
+class TranscriptModel(QAbstractListModel):
+    """
+    Sohbet mesajlarının listesi.
+    
+    Her mesaj bir kez render edilir ve HTML'i mesajla birlikte saklanır;
+    stream sırasında yalnızca son mesajın içeriği (ve sürümü) değişir.
+    """
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._messages: List[TranscriptMessage] = []
+        self._rows: Dict[int, int] = {}
+        self._next_id = 1
+    
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._messages)
+    
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._messages):
+            return None
+        message = self._messages[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return message.content
+        if role == HtmlRole:
+            return message_html(message)
+        if role == MessageKeyRole:
+            return (message.id, message.version, message.render)
+        return None
+    
+    def flags(self, index: QModelIndex):
+        # Düzenlenebilir: çift tıklamada metin seçimi için salt okunur editör açılır
+        flags = super().flags(index)
+        if index.isValid():
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+    
+    def _new_message(self, role: str, content: str) -> TranscriptMessage:
+        message = TranscriptMessage(self._next_id, role, content)
+        self._next_id += 1
+        return message
+    
+    def append(self, role: str, content: str) -> TranscriptMessage:
+        """Sona mesaj ekle"""
+        return self.extend([(role, content)])[0]
+    
+    def extend(self, items: List[Tuple[str, str]]) -> List[TranscriptMessage]:
+        """Birden çok mesajı tek seferde ekle (geçmiş yükleme)"""
+        messages = [self._new_message(role, content) for role, content in items]
+        if not messages:
+            return []
+        first = len(self._messages)
+        self.beginInsertRows(QModelIndex(), first, first + len(messages) - 1)
+        for offset, message in enumerate(messages):
+            self._rows[message.id] = first + offset
+            self._messages.append(message)
+        self.endInsertRows()
+        return messages
+    
+    def get(self, message_id: int) -> Optional[TranscriptMessage]:
+        row = self._rows.get(message_id)
+        return self._messages[row] if row is not None else None
+    
+    def update_content(self, message_id: int, content: str) -> Optional[TranscriptMessage]:
+        """İçeriği değiştir; mesaj yeniden render edilene kadar düz metin gösterilir"""
+        message = self.get(message_id)
+        if message is None:
+            return None
+        message.content = content
+        message.version += 1
+        message.html = None
+        self._changed(message_id)
+        return message
+    
+    def set_html(self, message_id: int, version: int, rendered: str):
+        """Render sonucunu uygula (içerik bu arada değiştiyse yok sayılır)"""
+        message = self.get(message_id)
+        if message is None or message.version != version:
+            return
+        message.html = rendered
+        message.render += 1
+        self._changed(message_id)
+    
+    def _changed(self, message_id: int):
+        index = self.index(self._rows[message_id])
+        self.dataChanged.emit(index, index)
+    
+    def clear(self):
+        """Tüm mesajları sil"""
+        self.beginResetModel()
+        self._messages = []
+        self._rows = {}
+        self.endResetModel()
+
+
+class RenderWorker(QThread):
+    """
+    Mesaj HTML'ini (markdown + kod renklendirme) arka planda üreten thread.
+    
+    Her mesaj için yalnızca son sürüm bekler; sonuçlar metnin özetine göre
+    LRU önbellekte tutulur, böylece aynı geçmiş yeniden açıldığında tekrar
+    render edilmez.
+    
+    render(text, background) -> (HTML, bekleyen işler). Bekleyen iş varsa
+    (ör. arka planda renklendirilen kod blokları) HTML yer tutucu içerir:
+    hemen gösterilir ama önbelleğe alınmaz. İşler bitince mesaj bir kez,
+    background=False ile (bekleyen iş üretmeden) yeniden render edilir;
+    böylece önbellekten düşen bloklar döngüye girmez.
+    """
+    rendered = pyqtSignal(int, int, str)  # mesaj id, sürüm, HTML
+    
+    def __init__(self, render: Callable[[str, bool], Tuple[str, List[Future]]], parent=None,
+                 cache_size: int = TRANSCRIPT_HTML_CACHE_SIZE):
+        super().__init__(parent)
+        self._render = render
+        self._condition = threading.Condition()
+        # Mesaj id -> (sürüm, metin, son render mı)
+        self._pending: "OrderedDict[int, Tuple[int, str, bool]]" = OrderedDict()
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_size = cache_size
+        self._stopping = False
+    
+    @staticmethod
+    def _cache_key(text: str) -> str:
+        return hashlib.sha1(text.encode("utf-8", "surrogatepass")).hexdigest()
+    
+    def cached(self, text: str) -> Optional[str]:
+        """Önbellekteki HTML (yoksa None)"""
+        key = self._cache_key(text)
+        with self._condition:
+            rendered = self._cache.get(key)
+            if rendered is not None:
+                self._cache.move_to_end(key)
+            return rendered
+    
+    def request(self, message_id: int, version: int, text: str, urgent: bool = False,
+                final: bool = False):
+        """Render isteği ekle; urgent istekler kuyruğun başına alınır
+        
+        final=True istekler arka plan işi beklemeden (senkron) render edilir.
+        """
+        with self._condition:
+            waiting = self._pending.get(message_id)
+            if waiting is not None:
+                if waiting[0] > version:
+                    return
+                if waiting[0] == version:
+                    final = final or waiting[2]
+            self._pending[message_id] = (version, text, final)
+            if urgent:
+                self._pending.move_to_end(message_id, last=False)
+            self._condition.notify()
+    
+    def cancel_all(self):
+        """Bekleyen istekleri bırak"""
+        with self._condition:
+            self._pending.clear()
+    
+    def stop(self):
+        """Thread'i durdur"""
+        with self._condition:
+            self._stopping = True
+            self._pending.clear()
+            self._condition.notify()
+        self.wait()
+    
+    def run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                message_id, (version, text, final) = self._pending.popitem(last=False)
+            
+            rendered = self.cached(text)
+            if rendered is None:
+                try:
+                    rendered, waiting = self._render(text, not final)
+                except Exception as e:
+                    print(f"Mesaj render hatası: {e}")
+                    rendered, waiting = plain_html(text), []
+                if waiting:
+                    self._rerender_when_done(message_id, version, text, waiting)
+                else:
+                    with self._condition:
+                        self._cache[self._cache_key(text)] = rendered
+                        while len(self._cache) > self._cache_size:
+                            self._cache.popitem(last=False)
+            self.rendered.emit(message_id, version, rendered)
+    
+    def _rerender_when_done(self, message_id: int, version: int, text: str, waiting: List[Future]):
+        """Bekleyen işlerin hepsi bitince mesajı son kez yeniden kuyruğa al"""
+        def on_done(_future):
+            if all(future.done() for future in waiting):
+                self.request(message_id, version, text, urgent=True, final=True)
+        for future in waiting:
+            future.add_done_callback(on_done)
+
+
+class MessageDelegate(QStyledItemDelegate):
+    """
+    Mesajları QTextDocument ile çizen delegate.
+    
+    Belge yerleşimi (pahalı kısım) yalnızca çizilen, yani görünen mesajlar
+    için yapılır ve LRU'da tutulur. Henüz çizilmemiş mesajların yüksekliği
+    metin uzunluğundan tahmin edilir; gerçek yükseklik ilk çizimde
+    hesaplanıp sizeHintChanged ile görünüme bildirilir.
+    
+    Çizilen mesajlar seçilemez; çift tıklanan mesajın üzerinde metnin
+    seçilip kopyalanabildiği salt okunur bir QTextBrowser açılır (Esc veya
+    odak kaybıyla kapanır, model değiştirilmez).
+    """
+    MARGIN = 8
+    
+    def __init__(self, view: QListView, doc_cache_size: int = TRANSCRIPT_DOC_CACHE_SIZE):
+        super().__init__(view)
+        self._view = view
+        self._docs: "OrderedDict[tuple, QTextDocument]" = OrderedDict()
+        self._doc_cache_size = doc_cache_size
+        # mesaj id -> (anahtar, boyut, kesin mi)
+        self._sizes: Dict[int, Tuple[tuple, QSize, bool]] = {}
+    
+    def clear_cache(self):
+        self._docs.clear()
+        self._sizes.clear()
+    
+    def _text_width(self) -> int:
+        return max(self._view.viewport().width() - 2 * self.MARGIN, 50)
+    
+    def _document(self, index: QModelIndex, key: tuple, font) -> QTextDocument:
+        """Mesajın yerleştirilmiş belgesi (LRU önbellekli)"""
+        document = self._docs.get(key)
+        if document is not None:
+            self._docs.move_to_end(key)
+            return document
+        document = QTextDocument()
+        document.setDefaultFont(font)
+        document.setDocumentMargin(0)
+        document.setHtml(index.data(HtmlRole))
+        document.setTextWidth(key[-1])
+        self._docs[key] = document
+        while len(self._docs) > self._doc_cache_size:
+            self._docs.popitem(last=False)
+        return document
+    
+    def _estimate(self, text: str, option) -> QSize:
+        """Yerleşim yapmadan yaklaşık yükseklik"""
+        metrics = option.fontMetrics
+        per_line = max(self._text_width() // max(metrics.averageCharWidth(), 1), 20)
+        lines = 1 + sum(len(line) // per_line + 1 for line in text.split("\n"))
+        return QSize(self._text_width() + 2 * self.MARGIN, lines * metrics.lineSpacing() + 2 * self.MARGIN)
+    
+    def sizeHint(self, option, index: QModelIndex) -> QSize:
+        message_key = index.data(MessageKeyRole)
+        if message_key is None:
+            return super().sizeHint(option, index)
+        key = message_key + (self._text_width(),)
+        known = self._sizes.get(message_key[0])
+        if known and known[0] == key:
+            return known[1]
+        document = self._docs.get(key)
+        if document is not None:
+            size = self._document_size(document)
+            self._sizes[message_key[0]] = (key, size, True)
+        else:
+            size = self._estimate(index.data(Qt.ItemDataRole.DisplayRole) or "", option)
+            self._sizes[message_key[0]] = (key, size, False)
+        return size
+    
+    def createEditor(self, parent, option, index: QModelIndex):
+        editor = QTextBrowser(parent)
+        editor.setFrameShape(QFrame.Shape.NoFrame)
+        editor.setOpenExternalLinks(True)
+        editor.setTextInteractionFlags(Qt.TextInteractionFlag.TextBrowserInteraction
+                                       | Qt.TextInteractionFlag.TextSelectableByKeyboard)
+        editor.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        editor.document().setDefaultFont(option.font)
+        editor.document().setDocumentMargin(self.MARGIN)
+        return editor
+    
+    def setEditorData(self, editor, index: QModelIndex):
+        # Aynı sürüm için yeniden yükleme seçimi sıfırlamasın
+        message_key = index.data(MessageKeyRole)
+        if editor.property("message_key") == message_key:
+            return
+        editor.setProperty("message_key", message_key)
+        editor.setHtml(index.data(HtmlRole))
+    
+    def setModelData(self, editor, model, index: QModelIndex):
+        # Salt okunur: yalnızca seçim ve kopyalama içindir
+        pass
+    
+    def updateEditorGeometry(self, editor, option, index: QModelIndex):
+        editor.setGeometry(option.rect)
+    
+    def _document_size(self, document: QTextDocument) -> QSize:
+        return QSize(self._text_width() + 2 * self.MARGIN,
+                     int(document.size().height()) + 2 * self.MARGIN)
+    
+    def paint(self, painter, option, index: QModelIndex):
+        message_key = index.data(MessageKeyRole)
+        if message_key is None:
+            return super().paint(painter, option, index)
+        key = message_key + (self._text_width(),)
+        document = self._document(index, key, option.font)
+        
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(option.rect, option.palette.alternateBase())
+        
+        painter.save()
+        painter.translate(option.rect.left() + self.MARGIN, option.rect.top() + self.MARGIN)
+        painter.setClipRect(0, 0, key[-1], option.rect.height() - 2 * self.MARGIN)
+        document.documentLayout().draw(painter, QAbstractTextDocumentLayout.PaintContext())
+        painter.restore()
+        
+        # Tahmini yükseklik yanlışsa görünüme bildir (çizim bittikten sonra)
+        size = self._document_size(document)
+        known = self._sizes.get(message_key[0])
+        if not known or known[0] != key or known[1] != size:
+            self._sizes[message_key[0]] = (key, size, True)
+            persistent = QPersistentModelIndex(index)
+            QTimer.singleShot(0, lambda: persistent.isValid()
+                              and self.sizeHintChanged.emit(QModelIndex(persistent)))
+
+
+class TranscriptView(QListView):
+    """
+    Sohbet dökümü görünümü.
+    
+    QListView yalnızca görünen satırları çizer; satırlar parça parça
+    (Batched) yerleştirilir. Kullanıcı en alttaysa yeni içerik geldikçe en
+    altta kalınır, yukarı kaydırdıysa konumu korunur.
+    """
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setLayoutMode(QListView.LayoutMode.Batched)
+        self.setBatchSize(50)
+        self.setUniformItemSizes(False)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        # Çift tıklama mesaj üzerinde metin seçimi için salt okunur editör açar
+        self.setEditTriggers(QAbstractItemView.EditTrigger.DoubleClicked)
+        self.delegate = MessageDelegate(self)
+        self.setItemDelegate(self.delegate)
+        
+        self._stick_to_bottom = True
+        scrollbar = self.verticalScrollBar()
+        scrollbar.valueChanged.connect(self._on_scrolled)
+        scrollbar.rangeChanged.connect(self._on_range_changed)
+        
+        # Seçili mesajın ham metnini kopyala
+        copy_action = QAction("Mesajı Kopyala", self)
+        copy_action.setShortcut(QKeySequence.StandardKey.Copy)
+        copy_action.triggered.connect(self.copy_current)
+        self.addAction(copy_action)
+        self.setContextMenuPolicy(Qt.ContextMenuPolicy.ActionsContextMenu)
+    
+    def copy_current(self):
+        """Seçili mesajı panoya kopyala"""
+        index = self.currentIndex()
+        if index.isValid():
+            QApplication.clipboard().setText(index.data(Qt.ItemDataRole.DisplayRole) or "")
+    
+    def _on_scrolled(self, value: int):
+        self._stick_to_bottom = value >= self.verticalScrollBar().maximum() - 4
+    
+    def _on_range_changed(self, minimum: int, maximum: int):
+        if self._stick_to_bottom:
+            self.verticalScrollBar().setValue(maximum)
+    
+    def follow_bottom(self):
+        """En alta kaydır ve yeni içerikte orada kal"""
+        self._stick_to_bottom = True
+        self.scrollToBottom()
+    
+    def resizeEvent(self, event):
+        # Genişlik değişince yerleşimler geçersiz; görünen satırlar yeniden yerleşir
+        if event.size().width() != event.oldSize().width():
+            self.delegate.clear_cache()
+        super().resizeEvent(event)
@@ -1,9 +1,13 @@
 """
 Ayarlar yönetimi - JSON tabanlı config sistemi
 """
+import copy
 import json
 import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator, Optional, Tuple
 from cryptography.fernet import Fernet
 import base64
 import hashlib
@@ -19,7 +23,15 @@ class ConfigManager:
         self.config_path.parent.mkdir(parents=True, exist_ok=True)
         self._key = self._get_or_create_key()
         self._cipher = Fernet(self._key)
-        
+        # Bellekteki ayar görüntüsü ve okunduğu andaki dosya imzası
+        self._lock = threading.RLock()
+        self._snapshot: Optional[dict] = None
+        self._snapshot_signature: Optional[Tuple[int, int]] = None
+        # Açık transaction'ın bekleyen ayarları
+        self._pending: Optional[dict] = None
+        # (düz token, şifreli token): Fernet her seferinde farklı çıktı verir, gereksiz yazımı önler
+        self._token_cipher_cache: Tuple[str, str] = ("", "")
+    
     def _get_or_create_key(self) -> bytes:
         """Şifreleme anahtarı oluştur veya yükle"""
         key_file = self.config_path.parent / ".key"
@@ -46,10 +58,18 @@ class ConfigManager:
         except Exception:
             return ""
     
-    def load_config(self) -> dict:
-        """Ayarları yükle"""
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        """Dosyanın (mtime, boyut) imzası; dosya yoksa None"""
+        try:
+            stat = self.config_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _read_file(self) -> dict:
+        """Ayar dosyasını okuyup token'ı çöz"""
         if not self.config_path.exists():
-            return DEFAULT_SETTINGS.copy()
+            return copy.deepcopy(DEFAULT_SETTINGS)
         
         try:
             with open(self.config_path, 'r', encoding='utf-8') as f:
@@ -57,69 +77,131 @@ class ConfigManager:
             
             # Token'ı çöz
             if "hf_token_encrypted" in config:
-                config["hf_token"] = self._decrypt_token(config["hf_token_encrypted"])
-                del config["hf_token_encrypted"]
+                encrypted = config.pop("hf_token_encrypted")
+                config["hf_token"] = self._decrypt_token(encrypted)
+                self._token_cipher_cache = (config["hf_token"], encrypted)
             
             # Eksik ayarları varsayılanlarla doldur
             for key, value in DEFAULT_SETTINGS.items():
                 if key not in config:
-                    config[key] = value
+                    config[key] = copy.deepcopy(value)
             
             return config
         except Exception as e:
             print(f"Config yükleme hatası: {e}")
-            return DEFAULT_SETTINGS.copy()
+            return copy.deepcopy(DEFAULT_SETTINGS)
+    
+    def _current(self) -> dict:
+        """Geçerli ayarlar (kopyalanmaz, değiştirilmemeli)
+        
+        Açık bir transaction varsa onun bekleyen hali döner. Aksi halde dosya
+        imzası değişmediği sürece bellekteki anlık görüntü kullanılır; dosya
+        dışarıdan değişirse yeniden okunur.
+        """
+        with self._lock:
+            if self._pending is not None:
+                return self._pending
+            signature = self._file_signature()
+            if self._snapshot is None or signature != self._snapshot_signature:
+                self._snapshot = self._read_file()
+                self._snapshot_signature = signature
+            return self._snapshot
+    
+    def load_config(self) -> dict:
+        """Ayarları yükle (çağıran değiştirebileceği için kopya döner)"""
+        return copy.deepcopy(self._current())
     
     def save_config(self, config: dict):
-        """Ayarları kaydet"""
-        config_copy = config.copy()
+        """Ayarları kaydet (transaction içindeyse çıkışta tek seferde yazılır)"""
+        with self._lock:
+            if self._pending is not None:
+                if config is not self._pending:
+                    self._pending = copy.deepcopy(config)
+                return
+            self._write_file(config)
+    
+    def _write_file(self, config: dict):
+        """Ayarları geçici dosyaya yazıp atomik olarak yerine taşı"""
+        config_copy = copy.deepcopy(config)
         
-        # Token'ı şifrele ve kaydet
+        # Token'ı şifrele ve kaydet (değişmediyse önceki şifreli hali kullanılır)
         if "hf_token" in config_copy:
             token = config_copy.pop("hf_token")
-            config_copy["hf_token_encrypted"] = self._encrypt_token(token)
+            cached_token, cached_encrypted = self._token_cipher_cache
+            if token != cached_token:
+                cached_encrypted = self._encrypt_token(token)
+                self._token_cipher_cache = (token, cached_encrypted)
+            config_copy["hf_token_encrypted"] = cached_encrypted
         
+        tmp_path = self.config_path.with_suffix(".json.tmp")
         try:
-            with open(self.config_path, 'w', encoding='utf-8') as f:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 json.dump(config_copy, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            
+            # Dosya izinlerini kısıtla (taşımadan önce, token hiç açıkta kalmasın)
+            tmp_path.chmod(0o600)
+            os.replace(tmp_path, self.config_path)
             
-            # Dosya izinlerini kısıtla
-            self.config_path.chmod(0o600)
+            self._snapshot = copy.deepcopy(config)
+            self._snapshot_signature = self._file_signature()
         except Exception as e:
             print(f"Config kaydetme hatası: {e}")
     
+    @contextmanager
+    def transaction(self) -> Iterator[dict]:
+        """Birden fazla değişikliği tek yazımda uygula
+        
+        with config_manager.transaction() as config:
+            config["default_model"] = ...
+            config_manager.set_feature_enabled("history", False)
+        
+        Blok içindeki setter'lar dosyaya yazmaz; blok hatasız biterse tek bir
+        atomik yazım yapılır, hata olursa değişiklikler atılır. İç içe
+        kullanılabilir, yazım en dıştaki blok bitince olur.
+        """
+        with self._lock:
+            outermost = self._pending is None
+            if outermost:
+                self._pending = copy.deepcopy(self._current())
+            try:
+                yield self._pending
+            except BaseException:
+                if outermost:
+                    self._pending = None
+                raise
+            if outermost:
+                pending, self._pending = self._pending, None
+                self._write_file(pending)
+    
     def get_token(self) -> str:
         """HuggingFace token'ı al"""
-        config = self.load_config()
-        return config.get("hf_token", "")
+        return self._current().get("hf_token", "")
     
     def set_token(self, token: str):
         """HuggingFace token'ı ayarla"""
-        config = self.load_config()
-        config["hf_token"] = token
-        self.save_config(config)
+        with self.transaction() as config:
+            config["hf_token"] = token
     
     def get_feature_enabled(self, feature: str) -> bool:
         """Özellik durumunu kontrol et"""
-        config = self.load_config()
-        return config.get("features", {}).get(feature, False)
+        default = DEFAULT_SETTINGS["features"].get(feature, False)
+        return self._current().get("features", {}).get(feature, default)
     
     def set_feature_enabled(self, feature: str, enabled: bool):
         """Özellik durumunu ayarla"""
-        config = self.load_config()
-        if "features" not in config:
-            config["features"] = {}
-        config["features"][feature] = enabled
-        self.save_config(config)
+        if self.get_feature_enabled(feature) == enabled and feature in self._current().get("features", {}):
+            return
+        with self.transaction() as config:
+            config.setdefault("features", {})[feature] = enabled
     
     def get_default_model(self) -> str:
         """Varsayılan modeli al"""
-        config = self.load_config()
-        return config.get("default_model", DEFAULT_SETTINGS["default_model"])
+        return self._current().get("default_model", DEFAULT_SETTINGS["default_model"])
     
     def set_default_model(self, model: str):
         """Varsayılan modeli ayarla"""
-        config = self.load_config()
-        config["default_model"] = model
-        self.save_config(config)
+        with self.transaction() as config:
+            config["default_model"] = model
 
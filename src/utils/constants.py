@@ -1,6 +1,7 @@
 """
 Sabitler ve varsayılan değerler
 """
+import os
 
 # Popüler HuggingFace modelleri
 POPULAR_MODELS = [
@@ -16,6 +17,36 @@ POPULAR_MODELS = [
     "HuggingFaceH4/zephyr-7b-beta",
 ]
 
+# Model seçici: Hub isteklerinden önce beklenen süre (ms) ve arama için en az karakter
+MODEL_INFO_DEBOUNCE_MS = 250
+MODEL_SEARCH_DEBOUNCE_MS = 500
+MODEL_SEARCH_MIN_CHARS = 3
+# Yazarken yerel katalog aramasından önce beklenen süre (ms)
+MODEL_CATALOG_DEBOUNCE_MS = 150
+# Kapanışta model sorgu thread'inin çalışan isteği bitirmesi için beklenen en uzun süre (ms)
+MODEL_LOOKUP_STOP_TIMEOUT_MS = 2000
+# Model kataloğu: model bilgisi ve Hub arama sonuçlarının tazelik süresi (sn)
+MODEL_CATALOG_TTL = 24 * 3600
+MODEL_SEARCH_TTL = 6 * 3600
+
+# Sohbet dökümü: render edilmiş mesaj HTML önbelleği (mesaj), yerleşimi tutulan belge sayısı
+# ve stream sırasında görünümün en sık yenilenme aralığı (ms)
+TRANSCRIPT_HTML_CACHE_SIZE = 256
+TRANSCRIPT_DOC_CACHE_SIZE = 64
+STREAM_REFRESH_MS = 50
+# Kod renklendirme: önbellekteki blok sayısı, arka plan iş sayısı ve bu sınırları
+# aşan blokların renklendirilmeden düz metin gösterilmesi
+HIGHLIGHT_CACHE_SIZE = 512
+HIGHLIGHT_WORKERS = 2
+HIGHLIGHT_MAX_CHARS = 200_000
+HIGHLIGHT_MAX_LINES = 5000
+
+# Toplu export: DOCX bu kadar kayıtta bir yeni cilde (dosyaya) bölünür; ilerleme bildirim aralığı (kayıt)
+EXPORT_DOCX_VOLUME_ENTRIES = 500
+EXPORT_PROGRESS_EVERY = 10
+# Aynı anda çalışan en fazla export işi
+EXPORT_WORKERS = 2
+
 # Multimodal modeller
 MULTIMODAL_MODELS = [
     "llava-hf/llava-1.5-7b-hf",
@@ -36,12 +67,86 @@ SUPPORTED_FILE_EXTENSIONS = {
     "image": [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp"],
 }
 
+# Paralel dosya işleme: en fazla eşzamanlı iş ve dosya başına zaman aşımı (sn)
+FILE_INGEST_MAX_WORKERS = max(1, min(4, os.cpu_count() or 1))
+FILE_INGEST_TIMEOUT = 120
+
+# PDF çıkarım bütçesi: bu kadar karakterden sonrası okunmaz (model bağlamına sığmaz)
+PDF_MAX_CHARS = 400_000
+
+# Prompt paketleme
+# Token tahmini için ortalama karakter/token oranı (kod ve Türkçe için temkinli)
+CHARS_PER_TOKEN = 3.5
+# Model bilgisi alınamazsa kullanılacak bağlam uzunluğu
+DEFAULT_CONTEXT_LENGTH = 8192
+# Yanıt için ayrılan token payı (max_new_tokens + güvenlik payı)
+PROMPT_OUTPUT_RESERVE = 512
+# Sığmayan durumlarda web sonuçlarına ayrılacak en az bütçe oranı
+PROMPT_WEB_SHARE = 0.25
+
+# Doküman erişimi (retrieval): dosyalar bu boyutu aşınca yalnızca alakalı parçalar gönderilir
+RETRIEVAL_MIN_TOKENS = 3000
+RETRIEVAL_CHUNK_CHARS = 1200
+RETRIEVAL_CHUNK_OVERLAP = 200
+RETRIEVAL_TOP_K = 12
+
+# Web arama önbelleği: sonuçların geçerlilik süresi (sn) ve bellekte tutulan sorgu sayısı
+WEB_SEARCH_CACHE_TTL = 3600
+WEB_SEARCH_CACHE_SIZE = 256
+# Çoklu sorgu (fan-out): prompt'tan türetilen en fazla alt sorgu sayısı
+WEB_SEARCH_FANOUT_QUERIES = 3
+
+# Sayfa getirme: ilk N sonucun sayfası indirilir (sayfa başına bayt / süre / karakter sınırı)
+PAGE_FETCH_TOP_N = 3
+PAGE_FETCH_MAX_BYTES = 2 * 1024 * 1024
+PAGE_FETCH_TIMEOUT = 8
+PAGE_FETCH_MAX_CHARS = 40_000
+PAGE_FETCH_MAX_WORKERS = 4
+# Takip edilen en fazla yönlendirme (her adımın hedefi ayrıca denetlenir)
+PAGE_FETCH_MAX_REDIRECTS = 5
+# Bu süre içinde getirilen sayfa için ağa çıkılmaz; sonrasında koşullu istek yapılır
+PAGE_CACHE_TTL = 3600
+
+# Bilinen modellerin bağlam uzunlukları (Hub bilgisi yoksa kullanılır)
+MODEL_CONTEXT_LENGTHS = {
+    "meta-llama/Llama-3.1-8B-Instruct": 131072,
+    "mistralai/Mistral-7B-Instruct-v0.2": 32768,
+    "google/gemma-7b-it": 8192,
+    "Qwen/Qwen2.5-7B-Instruct": 32768,
+    "microsoft/Phi-3-mini-4k-instruct": 4096,
+    "meta-llama/Llama-3-8B-Instruct": 8192,
+    "mistralai/Mixtral-8x7B-Instruct-v0.1": 32768,
+    "google/gemma-2b-it": 8192,
+    "NousResearch/Nous-Hermes-2-Mixtral-8x7B-DPO": 32768,
+    "HuggingFaceH4/zephyr-7b-beta": 32768,
+    "llava-hf/llava-1.5-7b-hf": 4096,
+    "microsoft/kosmos-2-patch14-224": 2048,
+    "Salesforce/blip-image-captioning-base": 512,
+}
+
+# Başlangıç süresi bütçesi (ms): süreç başından pencerenin ilk çizimine kadar
+STARTUP_BUDGET_MS = 1500
+
 # HuggingFace API endpoint
 # Not: Eski endpoint (api-inference.huggingface.co) artık desteklenmiyor
 # Router API kullanılıyor ancak bazı modeller için Inference Endpoints gerekebilir
 # Alternatif: https://api-inference.huggingface.co/models (eski, deprecated)
 HF_API_BASE_URL = "https://api-inference.huggingface.co/models"
 
+# OpenAI uyumlu chat completions endpoint'i (SSE stream fallback)
+HF_CHAT_COMPLETIONS_URL = "https://router.huggingface.co/v1/chat/completions"
+
+# HuggingFace Hub API endpoint (model arama / bilgi)
+HF_HUB_API_URL = "https://huggingface.co/api/models"
+
+# HTTP bağlantı havuzu ayarları
+# pool_connections: önbellekte tutulan host havuzu sayısı
+# pool_maxsize: host başına en fazla açık bağlantı
+# pool_block: host limiti dolunca yeni bağlantı açmak yerine bekle
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 8
+HTTP_POOL_BLOCK = False
+
 # Varsayılan ayarlar
 DEFAULT_SETTINGS = {
     "hf_token": "",
@@ -50,8 +155,18 @@ DEFAULT_SETTINGS = {
         "web_search": True,
         "history": True,
         "export": True,
+        "streaming": True,
+        "retrieval": True,
+        "web_fanout": True,
+        "page_fetch": False,
     },
+    "history_backend": "json",  # "json" veya "sqlite"
     "api_timeout": 60,
     "max_retries": 3,
+    "http_pool": {
+        "connections": HTTP_POOL_CONNECTIONS,
+        "maxsize": HTTP_POOL_MAXSIZE,
+        "block": HTTP_POOL_BLOCK,
+    },
 }
 